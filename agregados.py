@@ -0,0 +1,173 @@
+"""
+Consultas Agregadas dos Painéis:
+Calcula no próprio SQLite (GROUP BY e funções de janela) os indicadores do
+'painel_master3.py', trazendo para o Python apenas os resultados já resumidos
+em vez de todas as linhas de itens do período.
+
+Todas as funções recebem a conexão, o período (AAAA-MM-DD) e a lista de ids
+de localidades selecionadas, e retornam DataFrames com os mesmos nomes de
+coluna que os gráficos já utilizavam. UF, rótulo e coordenadas vêm da junção
+com a dimensão 'localidades' (localidades.py).
+
+FONTES:
+- 'resumo_vendas_diario' (resumo_diario.py) para faturamento por dia, estado,
+  produto e Curva ABC (classificada em lote por curva_abc.py).
+- 'fato_vendas' (fato_vendas.py) para o que o resumo não guarda (pedidos
+  distintos, clientes e contagem de itens por localidade): uma só tabela, com
+  o preço da venda, agregada antes de qualquer junção com as dimensões.
+- 'ranking_vendas' (ranking.py) para os melhores clientes, quando o filtro
+  coincide com um período/UF mantido pelo checkout; nos demais, os fatos.
+
+Os resultados passam pelo cache compartilhado (cache_consultas.py) e só são
+recalculados quando o banco recebe alguma escrita.
+"""
+
+import pandas as pd
+
+from cache_consultas import ler_sql
+from curva_abc import CORTES, classificar, com_nomes
+from filtros import montar_filtro
+from localidades import SQL_ROTULO
+import ranking
+
+# Rótulos das classes da Curva ABC (curva_abc.py) no gráfico
+CLASSES_ABC = {
+    "A": "Classe A (Altamente Lucrativo)",
+    "B": "Classe B (Intermediário)",
+    "C": "Classe C (Baixo Impacto)",
+}
+
+# Cada consulta recebe '{filtro}' (condição de período/localidade, filtros.py) já montado
+SQL_KPIS = """
+SELECT COALESCE(SUM(f.total_item), 0) AS faturamento,
+       COUNT(DISTINCT f.pedido_id) AS pedidos,
+       COALESCE(SUM(f.quantidade), 0) AS itens
+FROM fato_vendas f
+WHERE {filtro}
+"""
+
+SQL_SERIE_DIARIA = """
+SELECT r.data, SUM(r.faturamento) AS total_item
+FROM resumo_vendas_diario r
+WHERE {filtro}
+GROUP BY r.data
+ORDER BY r.data
+"""
+
+SQL_PARTICIPACAO_UF = """
+SELECT l.uf, SUM(r.faturamento) AS total_item
+FROM resumo_vendas_diario r
+JOIN localidades l ON r.localidade_id = l.id
+WHERE {filtro}
+GROUP BY l.uf
+ORDER BY total_item DESC
+"""
+
+SQL_VENDAS_POR_LOCALIDADE = f"""
+WITH por_localidade AS (
+    SELECT f.localidade_id, COUNT(*) AS vendas
+    FROM fato_vendas f
+    WHERE {{filtro}}
+    GROUP BY f.localidade_id
+)
+SELECT {SQL_ROTULO} AS localidade, l.lat, l.lon, pl.vendas
+FROM por_localidade pl
+JOIN localidades l ON pl.localidade_id = l.id
+"""
+
+SQL_TOP_PRODUTOS_POR_UF = """
+WITH uf_prod AS (
+    SELECT l.uf, r.produto_id, SUM(r.faturamento) AS total_item
+    FROM resumo_vendas_diario r
+    JOIN localidades l ON r.localidade_id = l.id
+    WHERE {filtro}
+    GROUP BY l.uf, r.produto_id
+),
+melhores_ufs AS (
+    SELECT uf FROM uf_prod GROUP BY uf ORDER BY SUM(total_item) DESC LIMIT :qtd_ufs
+),
+ranking AS (
+    SELECT uf, produto_id, total_item,
+           ROW_NUMBER() OVER (PARTITION BY uf ORDER BY total_item DESC) AS posicao
+    FROM uf_prod
+    WHERE uf IN (SELECT uf FROM melhores_ufs)
+)
+SELECT rk.uf, pr.nome AS produto, rk.total_item
+FROM ranking rk
+JOIN produtos pr ON rk.produto_id = pr.id
+WHERE rk.posicao <= :qtd_produtos
+ORDER BY rk.uf, rk.total_item DESC
+"""
+
+SQL_TOP_CLIENTES = """
+WITH por_cliente AS (
+    SELECT f.cliente_id, SUM(f.total_item) AS total_item
+    FROM fato_vendas f
+    WHERE {filtro}
+    GROUP BY f.cliente_id
+    ORDER BY total_item DESC
+    LIMIT :limite
+)
+SELECT c.nome AS cliente, pc.total_item
+FROM por_cliente pc
+JOIN clientes c ON pc.cliente_id = c.id
+ORDER BY pc.total_item DESC
+"""
+
+def _ler(conn, sql, dt_inicio, dt_fim, localidades, resumo=False, **extras):
+    # Resumo (r) e fatos (f) têm as mesmas colunas de data e localidade
+    apelido = "r" if resumo else "f"
+    filtro, params = montar_filtro(conn, dt_inicio, dt_fim, localidades,
+                                   f"{apelido}.data", f"{apelido}.localidade_id")
+    params.update(extras)
+    return ler_sql(conn, sql.format(filtro=filtro), params=params)
+
+
+# ==========================================
+# INDICADORES
+# ==========================================
+def kpis(conn, dt_inicio, dt_fim, localidades):
+    """Retorna dict com faturamento, pedidos, itens e ticket_medio."""
+    linha = _ler(conn, SQL_KPIS, dt_inicio, dt_fim, localidades).iloc[0]
+    faturamento, pedidos = float(linha["faturamento"]), int(linha["pedidos"])
+    return {
+        "faturamento": faturamento,
+        "pedidos": pedidos,
+        "itens": int(linha["itens"]),
+        "ticket_medio": faturamento / pedidos if pedidos > 0 else 0,
+    }
+
+
+def serie_diaria(conn, dt_inicio, dt_fim, localidades):
+    df = _ler(conn, SQL_SERIE_DIARIA, dt_inicio, dt_fim, localidades, resumo=True)
+    df["data"] = pd.to_datetime(df["data"])
+    return df
+
+
+def participacao_uf(conn, dt_inicio, dt_fim, localidades):
+    return _ler(conn, SQL_PARTICIPACAO_UF, dt_inicio, dt_fim, localidades, resumo=True)
+
+
+def vendas_por_localidade(conn, dt_inicio, dt_fim, localidades):
+    return _ler(conn, SQL_VENDAS_POR_LOCALIDADE, dt_inicio, dt_fim, localidades)
+
+
+def top_produtos_por_uf(conn, dt_inicio, dt_fim, localidades, qtd_ufs=3, qtd_produtos=3):
+    return _ler(conn, SQL_TOP_PRODUTOS_POR_UF, dt_inicio, dt_fim, localidades, resumo=True,
+                qtd_ufs=qtd_ufs, qtd_produtos=qtd_produtos)
+
+
+def top_clientes(conn, dt_inicio, dt_fim, localidades, limite=10):
+    # Ranking já somado no checkout: lê só os primeiros do índice
+    guardado = ranking.cobertura(conn, dt_inicio, dt_fim, localidades)
+    if guardado is not None:
+        periodo, uf = guardado
+        return ler_sql(conn, ranking.SQL_TOPO_CLIENTES, params={"periodo": periodo, "uf": uf, "limite": limite})
+    return _ler(conn, SQL_TOP_CLIENTES, dt_inicio, dt_fim, localidades, limite=limite)
+
+
+def curva_abc(conn, dt_inicio, dt_fim, localidades, cortes=CORTES):
+    # Classificação vetorizada do período inteiro, com os nomes e rótulos do gráfico
+    df = com_nomes(conn, classificar(conn, dt_inicio, dt_fim, localidades, cortes=cortes))
+    df["Categoria"] = df["classe"].cat.rename_categories(CLASSES_ABC)
+    return df[["produto", "total_item", "perc_total", "perc_acumulado", "Categoria"]]
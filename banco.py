@@ -0,0 +1,132 @@
+"""
+Camada de Acesso ao Banco de Dados (SQLite):
+Módulo compartilhado por todos os apps Streamlit e scripts para obter conexões
+com o 'vendas.db' já configuradas para uso concorrente.
+
+COMO FUNCIONA:
+- Cada thread recebe uma conexão própria e de longa duração (reutilizada em
+  todos os reruns do Streamlit executados por aquela thread).
+- Quando a thread termina, a conexão volta para um pool e é reaproveitada pela
+  próxima thread, evitando o custo de abrir o arquivo e reconfigurar o SQLite.
+- Todas as conexões usam WAL (leitores não bloqueiam o escritor), 'synchronous'
+  NORMAL, cache de páginas maior, mmap e 'busy_timeout' para esperar locks.
+- O cache de statements preparados do módulo sqlite3 é ampliado, evitando
+  re-parse das consultas repetidas dos painéis.
+- Na primeira conexão de cada processo as migrações pendentes (migracoes.py)
+  são aplicadas, garantindo tabelas e índices atualizados.
+- conectar_leitura(): conexão somente leitura da thread, usada pelas cargas
+  paralelas dos painéis (carga_paralela.py). Não grava no arquivo, mas
+  aceita tabelas/visões temporárias (filtros e partições).
+
+USO:
+    from banco import conectar
+    conn = conectar()   # não feche: a conexão pertence ao pool
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+from urllib.parse import quote
+
+from migracoes import aplicar_migracoes
+import particoes
+
+CAMINHO_DB = os.environ.get("VENDAS_DB", "vendas.db")
+
+# Ajustes aplicados a toda conexão nova
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,        # ~64 MB de cache de páginas (valor negativo = KiB)
+    "mmap_size": 268435456,      # 256 MB mapeados em memória
+    "busy_timeout": 5000,        # espera até 5 s por um lock antes de falhar
+    "temp_store": "MEMORY",
+}
+
+# Quantidade de statements preparados mantidos por conexão
+TAMANHO_CACHE_STATEMENTS = 256
+
+_local = threading.local()
+_livres = {}           # caminho -> lista de conexões ociosas
+_migrados = set()      # caminhos já migrados neste processo
+_trava = threading.Lock()
+
+
+def _nova_conexao(caminho):
+    conn = sqlite3.connect(
+        caminho,
+        check_same_thread=False,   # a conexão muda de thread ao voltar ao pool
+        cached_statements=TAMANHO_CACHE_STATEMENTS,
+    )
+    for nome, valor in PRAGMAS.items():
+        conn.execute(f"PRAGMA {nome} = {valor}")
+    if caminho not in _migrados:
+        aplicar_migracoes(conn)
+        _migrados.add(caminho)
+    return conn
+
+
+def _devolver(caminho, conn):
+    # Chamado quando a thread dona da conexão deixa de existir
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        # Partições anexadas por um painel não seguem para o próximo dono
+        particoes.liberar(conn)
+    except sqlite3.Error:
+        return
+    with _trava:
+        _livres.setdefault(caminho, []).append(conn)
+
+
+def conectar(caminho=None):
+    """Retorna a conexão da thread atual para o banco em 'caminho'."""
+    caminho = caminho or CAMINHO_DB
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+
+    conn = conexoes.get(caminho)
+    if conn is not None:
+        return conn
+
+    with _trava:
+        livres = _livres.get(caminho)
+        conn = livres.pop() if livres else None
+    if conn is None:
+        conn = _nova_conexao(caminho)
+
+    conexoes[caminho] = conn
+    weakref.finalize(threading.current_thread(), _devolver, caminho, conn)
+    return conn
+
+
+def conectar_leitura(caminho=None):
+    """Conexão somente leitura da thread atual (uma por thread, mantida enquanto ela existir)."""
+    caminho = caminho or CAMINHO_DB
+    leituras = getattr(_local, "leituras", None)
+    if leituras is None:
+        leituras = _local.leituras = {}
+
+    conn = leituras.get(caminho)
+    if conn is None:
+        if caminho not in _migrados:
+            # Somente leitura não migra: a primeira conexão normal cuida disso
+            _nova_conexao(caminho).close()
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(caminho))}?mode=ro", uri=True,
+                               check_same_thread=False, cached_statements=TAMANHO_CACHE_STATEMENTS)
+        for nome, valor in PRAGMAS.items():
+            if nome != "journal_mode":   # o modo WAL é do arquivo e já foi definido
+                conn.execute(f"PRAGMA {nome} = {valor}")
+        leituras[caminho] = conn
+    return conn
+
+
+def fechar_todas():
+    """Fecha as conexões ociosas do pool (útil em scripts e no reset)."""
+    with _trava:
+        for conexoes in _livres.values():
+            for conn in conexoes:
+                conn.close()
+        _livres.clear()
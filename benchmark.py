@@ -0,0 +1,240 @@
+"""
+Benchmark dos Caminhos Críticos (sem Streamlit):
+Mede, em bases de vários tamanhos, o tempo e o pico de memória das etapas
+que mais pesam nos painéis e no PDV:
+
+- consulta_detalhe: carga do detalhe de itens do 'painel_master.py' (detalhe.py),
+  com o cache de resultados vazio.
+- pipeline_pandas: agrupamentos em pandas sobre esse detalhe (série diária,
+  mapa, melhores clientes e produtos).
+- pandas_curva_abc / pandas_previsao: Curva ABC por localidade (curva_abc.py)
+  e regressão da previsão por produto (previsao.py) sobre o mesmo detalhe.
+- agregados_*: cada consulta agregada do 'painel_master3.py' (agregados.py),
+  sempre com o cache de resultados vazio.
+- checkout: gravação de pedidos de 3 itens pela mesma rotina da fila de escrita.
+
+As bases são geradas com 'gerar_dados.py' (semente fixa) e guardadas em
+'bench_dados/' para reaproveitamento. Os resultados vão para um arquivo JSON
+que pode ser comparado com o de outro commit.
+
+USO:
+    python benchmark.py --tamanhos 10000,1000000 --saida resultados.json
+    python benchmark.py --comparar base.json --limite 0.20   # código 1 se regredir >20%
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+import agregados
+import cache_consultas
+import curva_abc
+import detalhe
+import gerar_dados
+import pedidos
+import previsao
+from banco import conectar
+from ranking import reconstruir_rankings
+
+PASTA_DADOS = "bench_dados"
+ITENS_POR_PEDIDO = 2.8        # média aproximada do gerador com --itens-max 5
+DATA_CHECKOUT = "2099-01-01"  # pedidos de teste, removidos ao final
+PEDIDOS_CHECKOUT = 200
+
+
+# ==========================================
+# ETAPAS MEDIDAS
+# ==========================================
+# Cada etapa recebe (conn, contexto) e retorna a quantidade de linhas produzidas
+def consulta_detalhe(conn, ctx):
+    cache_consultas.limpar()
+    ctx["detalhe"] = detalhe.carregar_detalhe(conn, ctx["dt_inicio"], ctx["dt_fim"], ctx["localidades"], [
+        'data', 'pedido_id', 'cliente', 'localidade', 'lat', 'lon', 'produto', 'quantidade', 'total_item'])
+    return len(ctx["detalhe"])
+
+
+def pipeline_pandas(conn, ctx):
+    df = ctx["detalhe"]
+    df.groupby('data')['total_item'].sum()
+    df.groupby(['localidade', 'lat', 'lon'], observed=True).size()
+    df.groupby('cliente', observed=True)['total_item'].sum().sort_values(ascending=False).head(10)
+    return len(df.groupby('produto', observed=True)['quantidade'].sum())
+
+
+def pandas_curva_abc(conn, ctx):
+    # Faturamento por localidade x produto e a classificação vetorizada dos painéis
+    df = ctx["detalhe"]
+    agregado = df.groupby(['localidade', 'produto'], observed=True)['total_item'].sum().reset_index()
+    agregado['produto_id'] = agregado['produto'].cat.codes
+    return len(curva_abc.classificar_agregado(agregado, ['localidade']))
+
+
+def pandas_previsao(conn, ctx):
+    # Uma série diária de unidades por produto, todas num único ajuste (como o nível 'produto')
+    df = ctx["detalhe"]
+    tabela = df.pivot_table(index='data', columns='produto', values='quantidade', aggfunc='sum',
+                            fill_value=0, observed=True)
+    datas = pd.date_range(tabela.index.min(), tabela.index.max(), freq="D")
+    Y = tabela.reindex(datas, fill_value=0).to_numpy(dtype=float)
+    return previsao.ajustar(previsao.matriz_modelo(datas, datas[0]), Y).shape[1]
+
+
+def _etapa_agregada(funcao):
+    def etapa(conn, ctx):
+        cache_consultas.limpar()
+        resultado = funcao(conn, ctx["dt_inicio"], ctx["dt_fim"], ctx["localidades"])
+        return len(resultado) if isinstance(resultado, pd.DataFrame) else 1
+    return etapa
+
+
+def checkout(conn, ctx):
+    produtos = ctx["produtos_checkout"]
+    lote = [(1, DATA_CHECKOUT, [(produtos[(i + j) % len(produtos)], 1 + j) for j in range(3)])
+            for i in range(PEDIDOS_CHECKOUT)]
+    for pedido in lote:
+        pedidos.registrar_pedido(conn, *pedido)
+    return PEDIDOS_CHECKOUT
+
+
+def limpar_checkout(conn):
+    with conn:
+        conn.execute("DELETE FROM itens_pedido WHERE pedido_id IN (SELECT id FROM pedidos WHERE data = ?)",
+                     (DATA_CHECKOUT,))
+        conn.execute("DELETE FROM pedidos WHERE data = ?", (DATA_CHECKOUT,))
+        conn.execute("DELETE FROM fato_vendas WHERE data = ?", (DATA_CHECKOUT,))
+        conn.execute("DELETE FROM resumo_vendas_diario WHERE data = ?", (DATA_CHECKOUT,))
+    # Os totais de cada cliente/produto incluem os pedidos de teste: recalcula sem eles
+    reconstruir_rankings(conn)
+
+
+ETAPAS = {
+    "consulta_detalhe": consulta_detalhe,
+    "pipeline_pandas": pipeline_pandas,
+    "pandas_curva_abc": pandas_curva_abc,
+    "pandas_previsao": pandas_previsao,
+    "agregados_kpis": _etapa_agregada(agregados.kpis),
+    "agregados_serie_diaria": _etapa_agregada(agregados.serie_diaria),
+    "agregados_participacao_uf": _etapa_agregada(agregados.participacao_uf),
+    "agregados_vendas_por_localidade": _etapa_agregada(agregados.vendas_por_localidade),
+    "agregados_top_produtos_por_uf": _etapa_agregada(agregados.top_produtos_por_uf),
+    "agregados_top_clientes": _etapa_agregada(agregados.top_clientes),
+    "agregados_curva_abc": _etapa_agregada(agregados.curva_abc),
+    "checkout": checkout,
+}
+
+
+# ==========================================
+# EXECUÇÃO
+# ==========================================
+def preparar_base(itens, semente):
+    os.makedirs(PASTA_DADOS, exist_ok=True)
+    caminho = os.path.join(PASTA_DADOS, f"itens_{itens}_seed{semente}.db")
+    if not os.path.exists(caminho):
+        qtd_pedidos = max(int(itens / ITENS_POR_PEDIDO), 1)
+        print(f"Gerando base com ~{itens:,} itens ({qtd_pedidos:,} pedidos)...")
+        gerar_dados.gerar(caminho, semente, max(qtd_pedidos // 20, 10),
+                          max(qtd_pedidos // 200, 50), qtd_pedidos)
+    return caminho
+
+
+def contexto(conn):
+    dt_inicio, dt_fim = conn.execute(
+        "SELECT (SELECT MIN(data) FROM pedidos), (SELECT MAX(data) FROM pedidos)").fetchone()
+    localidades = [linha[0] for linha in conn.execute(
+        "SELECT DISTINCT localidade_id FROM clientes WHERE localidade_id IS NOT NULL")]
+    produtos = [linha[0] for linha in conn.execute("SELECT id FROM produtos LIMIT 50")]
+    return {"dt_inicio": dt_inicio, "dt_fim": dt_fim, "localidades": localidades,
+            "produtos_checkout": produtos}
+
+
+def medir(etapa, conn, ctx, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        linhas = etapa(conn, ctx)
+        tempos.append(time.perf_counter() - t0)
+    # Rodada extra só para o pico de memória (tracemalloc deixa o código mais lento)
+    tracemalloc.start()
+    etapa(conn, ctx)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"tempo_s": statistics.median(tempos), "tempo_min_s": min(tempos),
+            "pico_mb": pico / 1024 / 1024, "linhas": linhas}
+
+
+def executar(tamanhos, semente, repeticoes, etapas):
+    resultados = []
+    for itens in tamanhos:
+        conn = conectar(preparar_base(itens, semente))
+        ctx = contexto(conn)
+        try:
+            for nome in etapas:
+                medida = medir(ETAPAS[nome], conn, ctx, repeticoes)
+                resultados.append({"etapa": nome, "tamanho": itens, **medida})
+                print(f"  [{itens:>10,}] {nome:<34} {medida['tempo_s'] * 1000:>10.1f} ms "
+                      f"{medida['pico_mb']:>9.1f} MB {medida['linhas']:>10,} linhas")
+        finally:
+            limpar_checkout(conn)
+    return resultados
+
+
+def _commit_atual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressoes(atual, base, limite):
+    """Etapas cujo tempo mediano piorou mais que 'limite' (fração) em relação à base."""
+    anteriores = {(r["etapa"], r["tamanho"]): r["tempo_s"] for r in base["resultados"]}
+    piores = []
+    for r in atual["resultados"]:
+        anterior = anteriores.get((r["etapa"], r["tamanho"]))
+        if anterior and r["tempo_s"] > anterior * (1 + limite):
+            piores.append((r["etapa"], r["tamanho"], anterior, r["tempo_s"]))
+    return piores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos painéis e do PDV")
+    parser.add_argument("--tamanhos", default="10000,1000000",
+                        help="quantidades de itens de pedido, separadas por vírgula")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--etapas", default=",".join(ETAPAS), help="subconjunto de etapas")
+    parser.add_argument("--saida", default="benchmark_resultados.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--limite", type=float, default=0.20,
+                        help="piora máxima aceita em relação à base (0.20 = 20%%)")
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.tamanhos.split(",")]
+    etapas = args.etapas.split(",")
+    resultado = {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "resultados": executar(tamanhos, args.seed, args.repeticoes, etapas),
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em '{args.saida}'.")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            piores = regressoes(resultado, json.load(arquivo), args.limite)
+        for etapa, tamanho, antes, depois in piores:
+            print(f"❌ Regressão em {etapa} [{tamanho:,}]: {antes * 1000:.1f} ms -> {depois * 1000:.1f} ms")
+        if piores:
+            sys.exit(1)
+        print(f"✅ Nenhuma etapa piorou mais de {args.limite:.0%}.")
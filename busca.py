@@ -0,0 +1,62 @@
+"""
+Busca Textual do PDV (SQLite FTS5):
+Procura produtos pelo nome e clientes pelo nome ou e-mail nos índices
+'busca_produtos' e 'busca_clientes' (migração 8, mantidos por gatilhos), e
+devolve só uma página dos melhores resultados. O PDV não precisa mais enviar a
+tabela inteira para o navegador num único menu.
+
+COMO A CONSULTA É MONTADA:
+- O texto digitado é quebrado em palavras e cada uma vira um prefixo
+  ("mou lo" encontra "Mouse Logitech"); todas precisam aparecer.
+- Acentos são ignorados ("sao" encontra "São") e a ordem é a relevância (bm25).
+- Paginação por LIMIT/OFFSET, lendo uma linha a mais para saber se há próxima.
+
+USO:
+    linhas, tem_mais = buscar_produtos(conn, "mouse", pagina=0)   # [(id, nome, preco)]
+"""
+
+import re
+
+POR_PAGINA = 20
+
+SQL_PRODUTOS = """
+SELECT pr.id, pr.nome, pr.preco
+FROM busca_produtos b
+JOIN produtos pr ON pr.id = b.rowid
+WHERE busca_produtos MATCH ?
+ORDER BY b.rank
+LIMIT ? OFFSET ?
+"""
+
+SQL_CLIENTES = """
+SELECT c.id, c.nome, c.email
+FROM busca_clientes b
+JOIN clientes c ON c.id = b.rowid
+WHERE busca_clientes MATCH ?
+ORDER BY b.rank
+LIMIT ? OFFSET ?
+"""
+
+
+def expressao_fts(texto):
+    """Texto livre -> expressão FTS5 com cada palavra como prefixo; '' se vazio."""
+    # Palavras entre aspas: operadores e pontuação digitados não viram sintaxe FTS5
+    return " ".join(f'"{palavra}"*' for palavra in re.findall(r"\w+", texto or ""))
+
+
+def _buscar(conn, sql, texto, pagina, por_pagina):
+    expressao = expressao_fts(texto)
+    if not expressao:
+        return [], False
+    linhas = conn.execute(sql, (expressao, por_pagina + 1, pagina * por_pagina)).fetchall()
+    return linhas[:por_pagina], len(linhas) > por_pagina
+
+
+def buscar_produtos(conn, texto, pagina=0, por_pagina=POR_PAGINA):
+    """([(id, nome, preco)], tem_mais) da página pedida."""
+    return _buscar(conn, SQL_PRODUTOS, texto, pagina, por_pagina)
+
+
+def buscar_clientes(conn, texto, pagina=0, por_pagina=POR_PAGINA):
+    """([(id, nome, email)], tem_mais) da página pedida."""
+    return _buscar(conn, SQL_CLIENTES, texto, pagina, por_pagina)
@@ -0,0 +1,152 @@
+"""
+Cache de Resultados de Consultas (compartilhado entre sessões):
+Guarda DataFrames lidos do banco, indexados pela consulta normalizada e seus
+parâmetros, para que vários usuários abrindo o mesmo painel disparem uma única
+consulta ao SQLite.
+
+COMO FUNCIONA:
+- O cache vive no processo do Streamlit, então é comum a todas as sessões.
+- Validade por versão dos dados: uma conexão dedicada (que nunca grava) lê
+  'PRAGMA data_version', cujo valor muda sempre que qualquer outra conexão ou
+  processo confirma uma escrita no arquivo. Mudou a versão, os resultados
+  daquele banco são descartados; sem escritas, o resultado vale indefinidamente.
+- Limite de memória com descarte LRU (menos usado recentemente primeiro).
+- Sessões que pedem a mesma consulta ao mesmo tempo esperam a primeira
+  terminar em vez de repetir a leitura.
+- Toda leitura, do banco ou do cache, é cronometrada (desempenho.py); as
+  lentas vão para o log de consultas lentas com o plano de execução.
+
+USO:
+    from cache_consultas import ler_sql
+    df = ler_sql(conn, "SELECT ... WHERE data BETWEEN ? AND ?", params=[ini, fim])
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+import desempenho
+
+LIMITE_MEMORIA = int(os.environ.get("CACHE_CONSULTAS_MB", "256")) * 1024 * 1024
+
+_entradas = OrderedDict()   # chave -> (versao, df, tamanho_em_bytes)
+_versoes = {}               # caminho do banco -> última versão observada
+_em_andamento = {}          # chave -> threading.Event da leitura em curso
+_monitores = {}             # caminho do banco -> conexão que só lê data_version
+_uso = 0
+_trava = threading.Lock()
+_trava_monitor = threading.Lock()
+estatisticas = {"acertos": 0, "faltas": 0, "descartes": 0}
+
+
+def caminho_banco(conn):
+    """Arquivo do banco 'main' da conexão (parte da chave do cache)."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def versao_dados(caminho):
+    """Versão atual dos dados do arquivo (muda a cada commit de outra conexão)."""
+    with _trava_monitor:
+        monitor = _monitores.get(caminho)
+        if monitor is None:
+            monitor = _monitores[caminho] = sqlite3.connect(caminho, check_same_thread=False)
+        return monitor.execute("PRAGMA data_version").fetchone()[0]
+
+
+def normalizar(sql):
+    return " ".join(sql.split())
+
+
+def _congelar(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def _remover(chave):
+    global _uso
+    _, _, tamanho = _entradas.pop(chave)
+    _uso -= tamanho
+
+
+def _expurgar_se_mudou(caminho, versao):
+    # Chamada com _trava adquirida
+    if _versoes.get(caminho) == versao:
+        return
+    _versoes[caminho] = versao
+    for chave in [c for c in _entradas if c[0] == caminho]:
+        _remover(chave)
+
+
+def _guardar(chave, versao, df):
+    global _uso
+    tamanho = int(df.memory_usage(index=True, deep=True).sum())
+    if tamanho > LIMITE_MEMORIA:
+        return
+    with _trava:
+        if _versoes.get(chave[0]) != versao:
+            return   # os dados mudaram durante a leitura
+        if chave in _entradas:
+            _remover(chave)
+        _entradas[chave] = (versao, df, tamanho)
+        _uso += tamanho
+        while _uso > LIMITE_MEMORIA:
+            _remover(next(iter(_entradas)))
+            estatisticas["descartes"] += 1
+
+
+def _ler_pandas(conn, sql, params):
+    return pd.read_sql(sql, conn, params=params)
+
+
+def ler_sql(conn, sql, params=None, leitor=None):
+    """
+    Equivalente a pd.read_sql(sql, conn, params=params), com cache. 'leitor'
+    substitui o pd.read_sql por outra função (conn, sql, params) -> DataFrame,
+    e o resultado guardado é o que ela retornar.
+    """
+    caminho = caminho_banco(conn)
+    chave = (caminho, normalizar(sql), _congelar(params), leitor)
+    inicio = time.perf_counter()
+    while True:
+        versao = versao_dados(caminho)
+        with _trava:
+            _expurgar_se_mudou(caminho, versao)
+            entrada = _entradas.get(chave)
+            if entrada is not None:
+                _entradas.move_to_end(chave)
+                estatisticas["acertos"] += 1
+                df = entrada[1].copy()
+                desempenho.consulta(conn, sql, params, time.perf_counter() - inicio, len(df), cache=True)
+                return df
+            evento = _em_andamento.get(chave)
+            if evento is None:
+                evento = _em_andamento[chave] = threading.Event()
+                estatisticas["faltas"] += 1
+                break
+        # Outra sessão já está lendo a mesma consulta: espera e tenta de novo
+        evento.wait()
+
+    try:
+        df = (leitor or _ler_pandas)(conn, sql, params)
+        _guardar(chave, versao, df)
+    finally:
+        with _trava:
+            _em_andamento.pop(chave).set()
+    desempenho.consulta(conn, sql, params, time.perf_counter() - inicio, len(df))
+    return df.copy()
+
+
+def limpar():
+    """Descarta todos os resultados guardados."""
+    global _uso
+    with _trava:
+        _entradas.clear()
+        _versoes.clear()
+        _uso = 0
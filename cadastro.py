@@ -18,15 +18,19 @@ Execute no terminal: streamlit run cadastro.py
 """
 
 import streamlit as st
-import sqlite3
 import pandas as pd
 from datetime import datetime
+from banco import conectar
+from fila_escrita import registrar_pedido
+from localidades import obter_ou_criar
+import catalogo
 
 # Configuração da Página
 st.set_page_config(page_title="Sistema de Gestão - Cadastro", page_icon="📝", layout="wide")
 
 def conectar_db():
-    return sqlite3.connect("vendas.db")
+    # Conexão compartilhada da thread (pool em banco.py); não deve ser fechada
+    return conectar()
 
 st.title("📝 Central de Cadastros e Vendas")
 st.markdown("Gerencie clientes, produtos e registre novas vendas diretamente no banco de dados.")
@@ -47,11 +51,11 @@ with aba_cliente:
         if st.form_submit_button("Salvar Cliente"):
             if nome and email and cidade:
                 conn = conectar_db()
-                cursor = conn.cursor()
-                cursor.execute("INSERT INTO clientes (nome, email, localidade) VALUES (?, ?, ?)", 
-                               (nome, email, f"{cidade}/{uf}"))
-                conn.commit()
-                conn.close()
+                with conn:
+                    # Cidade/UF vira chave da dimensão 'localidades' (criada se for nova)
+                    localidade_id = obter_ou_criar(conn, cidade, uf)
+                    conn.execute("INSERT INTO clientes (nome, email, localidade_id) VALUES (?, ?, ?)", 
+                                 (nome, email, localidade_id))
                 st.success(f"Cliente {nome} cadastrado!")
             else:
                 st.warning("Preencha todos os campos.")
@@ -66,10 +70,8 @@ with aba_produto:
         if st.form_submit_button("Salvar Produto"):
             if nome_prod and preco > 0:
                 conn = conectar_db()
-                cursor = conn.cursor()
-                cursor.execute("INSERT INTO produtos (nome, preco) VALUES (?, ?)", (nome_prod, preco))
-                conn.commit()
-                conn.close()
+                with conn:
+                    conn.execute("INSERT INTO produtos (nome, preco) VALUES (?, ?)", (nome_prod, preco))
                 st.success(f"Produto '{nome_prod}' cadastrado!")
 
 # --- ABA DE VENDAS (NOVA FUNCIONALIDADE) ---
@@ -77,27 +79,26 @@ with aba_venda:
     st.header("Registrar Novo Pedido")
     
     conn = conectar_db()
-    # Carregar dados para os menus suspensos
-    df_clientes = pd.read_sql_query("SELECT id, nome FROM clientes ORDER BY nome", conn)
-    df_produtos = pd.read_sql_query("SELECT id, nome, preco FROM produtos ORDER BY nome", conn)
-    conn.close()
+    # Menus suspensos a partir do catálogo em memória ({id: ...}, ver catalogo.py)
+    clientes = catalogo.clientes(conn)
+    produtos = catalogo.produtos(conn)
 
-    if df_clientes.empty or df_produtos.empty:
+    if not clientes or not produtos:
         st.error("É necessário ter clientes e produtos cadastrados para realizar uma venda.")
     else:
         with st.form("form_venda", clear_on_submit=True):
             # Seleção de Cliente
             cliente_selecionado = st.selectbox(
                 "Selecione o Cliente", 
-                options=df_clientes['id'].tolist(),
-                format_func=lambda x: df_clientes[df_clientes['id'] == x]['nome'].iloc[0]
+                options=list(clientes),
+                format_func=clientes.get
             )
             
             # Seleção de Produto
             produto_id = st.selectbox(
                 "Selecione o Produto", 
-                options=df_produtos['id'].tolist(),
-                format_func=lambda x: f"{df_produtos[df_produtos['id'] == x]['nome'].iloc[0]} - R$ {df_produtos[df_produtos['id'] == x]['preco'].iloc[0]:.2f}"
+                options=list(produtos),
+                format_func=lambda x: f"{produtos[x][0]} - R$ {produtos[x][1]:.2f}"
             )
             
             quantidade = st.number_input("Quantidade", min_value=1, step=1)
@@ -105,20 +106,9 @@ with aba_venda:
             
             if st.form_submit_button("Finalizar Venda"):
                 try:
-                    conn = conectar_db()
-                    cursor = conn.cursor()
-                    
-                    # 1. Inserir na tabela pedidos
-                    cursor.execute("INSERT INTO pedidos (cliente_id, data) VALUES (?, ?)", 
-                                   (cliente_selecionado, data_venda.strftime('%Y-%m-%d')))
-                    pedido_id = cursor.lastrowid
-                    
-                    # 2. Inserir na tabela itens_pedido
-                    cursor.execute("INSERT INTO itens_pedido (pedido_id, produto_id, quantidade) VALUES (?, ?, ?)", 
-                                   (pedido_id, produto_id, quantidade))
-                    
-                    conn.commit()
-                    conn.close()
+                    # Pedido, item e resumo diário gravados pela fila de escrita (mesma transação)
+                    pedido_id = registrar_pedido(cliente_selecionado, data_venda.strftime('%Y-%m-%d'),
+                                                 [(produto_id, quantidade, produtos[produto_id][1])])
                     st.success(f"✅ Pedido #{pedido_id} registrado com sucesso!")
                 except Exception as e:
                     st.error(f"Erro ao processar venda: {e}")
@@ -135,7 +125,6 @@ if st.checkbox("🔍 Visualizar Dados Cadastrados"):
         st.write("**Últimos Pedidos**")
         st.dataframe(pd.read_sql_query("""
             SELECT p.id, c.nome as cliente, p.data 
-            FROM pedidos p 
+            FROM (SELECT id, cliente_id, data FROM pedidos ORDER BY id DESC LIMIT 5) p 
             JOIN clientes c ON p.cliente_id = c.id 
-            ORDER BY p.id DESC LIMIT 5""", conn))
-    conn.close()
\ No newline at end of file
+            ORDER BY p.id DESC""", conn))
\ No newline at end of file
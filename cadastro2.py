@@ -1,7 +1,7 @@
 """
 DESCRIÇÃO:
 Script 'cadastro2.py' - Gestão de Vendas com Carrinho e PDF.
-Organizado em 5 etapas: Configuração, Suporte PDF, Cadastro Cliente, 
+Organizado em 5 etapas: Configuração, Recibos PDF, Cadastro Cliente, 
 Cadastro Produto e Ponto de Venda (PDV).
 
 LÓGICA DE BANCO:
@@ -11,10 +11,13 @@ Garante que um pedido só seja finalizado se houver itens no carrinho.
 
 import streamlit as st
 import sqlite3
-import pandas as pd
 from datetime import datetime
-from fpdf import FPDF
-import base64
+import desempenho
+from banco import CAMINHO_DB, conectar
+from fila_escrita import registrar_pedido
+from recibos import enviar_recibo, obter_recibo
+import busca
+import carrinho
 
 # ==========================================
 # 1. CONFIGURAÇÕES E CONEXÃO
@@ -22,55 +25,64 @@ import base64
 st.set_page_config(page_title="Sistema de Gestão v2", page_icon="🛍️", layout="wide")
 
 def conectar_db():
-    return sqlite3.connect("vendas.db")
+    # Conexão compartilhada da thread (pool em banco.py); não deve ser fechada
+    return conectar()
 
-# Inicializa o carrinho se não existir
+# Inicializa o carrinho se não existir (uma linha por produto, ver carrinho.py)
 if 'carrinho' not in st.session_state:
-    st.session_state.carrinho = []
+    st.session_state.carrinho = carrinho.novo()
+
+# Ligado, buscas, gravação do pedido e geração do PDF são cronometradas (desempenho.py)
+medindo = st.sidebar.toggle("⏱️ Medir desempenho", key="medir_desempenho")
+coletor = desempenho.iniciar(medindo)
 
 # ==========================================
-# 2. FUNÇÕES DE SUPORTE (PDF E RECIBO)
+# 2. RECIBOS (gerados fora da thread do caixa, ver recibos.py)
 # ==========================================
-def gerar_recibo_pdf(id_pedido, nome_cliente, itens, total):
-    pdf = FPDF()
-    pdf.add_page()
-    
-    # Cabeçalho
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(200, 10, "RECIBO DE VENDA", ln=True, align="C")
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(200, 10, f"Pedido ID: {id_pedido} | Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=True, align="C")
-    pdf.ln(10)
-    
-    # Dados do Cliente
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, f"Cliente: {nome_cliente}", ln=True)
-    pdf.ln(5)
-    
-    # Tabela de Itens
-    pdf.set_fill_color(200, 200, 200)
-    pdf.cell(80, 10, "Produto", 1, 0, "C", True)
-    pdf.cell(30, 10, "Qtd", 1, 0, "C", True)
-    pdf.cell(40, 10, "Unitário", 1, 0, "C", True)
-    pdf.cell(40, 10, "Subtotal", 1, 1, "C", True)
-    
-    pdf.set_font("Arial", "", 12)
-    for item in itens:
-        pdf.cell(80, 10, item['nome'], 1)
-        pdf.cell(30, 10, str(item['qtd']), 1, 0, "C")
-        pdf.cell(40, 10, f"R$ {item['preco']:.2f}", 1, 0, "C")
-        pdf.cell(40, 10, f"R$ {item['subtotal']:.2f}", 1, 1, "C")
-    
-    # Total
-    pdf.ln(5)
-    pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, f"TOTAL: R$ {total:.2f}", ln=True, align="R")
-    
-    return pdf.output(dest="S").encode("latin-1")
-
-def link_download_pdf(bin_file, filename):
-    b64 = base64.b64encode(bin_file).decode()
-    return f'<a href="data:application/octet-stream;base64,{b64}" download="{filename}">📥 Baixar Recibo PDF</a>'
+if 'recibos' not in st.session_state:
+    st.session_state.recibos = []   # [(id_pedido, Future com os bytes do PDF)]
+
+RECIBOS_NA_TELA = 5
+
+def mostrar_recibos(sondando):
+    # 'sondando': fragmento criado com run_every; o intervalo só muda numa execução completa
+    if sondando and all(futuro.done() for _, futuro in st.session_state.recibos):
+        st.rerun()      # último recibo pronto: recria o fragmento sem a reexecução periódica
+    for id_pedido, futuro in reversed(st.session_state.recibos):
+        if not futuro.done():
+            st.info(f"⏳ Gerando recibo do pedido {id_pedido}...")
+        elif futuro.exception() is not None:
+            st.error(f"Falha ao gerar o recibo do pedido {id_pedido}: {futuro.exception()}")
+        else:
+            st.download_button(f"📥 Baixar Recibo PDF (pedido {id_pedido})", futuro.result(),
+                               f"recibo_pedido_{id_pedido}.pdf", "application/pdf", key=f"recibo_{id_pedido}")
+
+def seletor_busca(rotulo, chave, buscar, formatar):
+    """Campo de busca (FTS5, ver busca.py) + menu só com a página atual; retorna a linha escolhida."""
+    texto = st.text_input(f"🔎 Buscar {rotulo}", key=f"busca_{chave}", placeholder="Digite parte do nome...")
+    if st.session_state.get(f"termo_{chave}") != texto:
+        st.session_state[f"termo_{chave}"] = texto
+        st.session_state[f"pagina_{chave}"] = 0
+    pagina = st.session_state[f"pagina_{chave}"]
+
+    with desempenho.medir(f"busca: {rotulo.lower()}", "consulta") as medida:
+        linhas, tem_mais = buscar(conectar_db(), texto, pagina)
+        medida["linhas"] = len(linhas)
+    if not linhas:
+        if texto:
+            st.caption(f"Nenhum {rotulo.lower()} encontrado.")
+        return None
+    opcoes = {linha[0]: linha for linha in linhas}
+    escolhido = st.selectbox(rotulo, options=list(opcoes), format_func=lambda x: formatar(opcoes[x]),
+                             key=f"sel_{chave}")
+
+    col_ant, col_pag, col_prox = st.columns([1, 2, 1])
+    if col_ant.button("◀", key=f"ant_{chave}", disabled=pagina == 0):
+        st.session_state[f"pagina_{chave}"] -= 1; st.rerun()
+    col_pag.caption(f"Página {pagina + 1}")
+    if col_prox.button("▶", key=f"prox_{chave}", disabled=not tem_mais):
+        st.session_state[f"pagina_{chave}"] += 1; st.rerun()
+    return opcoes[escolhido]
 
 # ==========================================
 # 3. INTERFACE - CADASTRO DE CLIENTES
@@ -88,12 +100,11 @@ with aba1:
             if nome and email:
                 try:
                     conn = conectar_db()
-                    conn.execute("INSERT INTO clientes (nome, email) VALUES (?, ?)", (nome, email))
-                    conn.commit()
+                    with conn:
+                        conn.execute("INSERT INTO clientes (nome, email) VALUES (?, ?)", (nome, email))
                     st.success(f"Cliente {nome} cadastrado!")
                 except sqlite3.IntegrityError:
                     st.error("Erro: Este e-mail já está cadastrado.")
-                finally: conn.close()
 
 # ==========================================
 # 4. INTERFACE - CADASTRO DE PRODUTOS
@@ -106,9 +117,8 @@ with aba2:
         if st.form_submit_button("Cadastrar Produto"):
             if nome_p and preco_p > 0:
                 conn = conectar_db()
-                conn.execute("INSERT INTO produtos (nome, preco) VALUES (?, ?)", (nome_p, preco_p))
-                conn.commit()
-                conn.close()
+                with conn:
+                    conn.execute("INSERT INTO produtos (nome, preco) VALUES (?, ?)", (nome_p, preco_p))
                 st.success(f"Produto {nome_p} cadastrado!")
 
 # ==========================================
@@ -118,66 +128,90 @@ with aba3:
     st.header("Ponto de Venda (Multi-Itens)")
     
     conn = conectar_db()
-    clientes = pd.read_sql("SELECT * FROM clientes", conn)
-    produtos = pd.read_sql("SELECT * FROM produtos", conn)
-    conn.close()
+    tem_clientes, tem_produtos = conn.execute(
+        "SELECT EXISTS (SELECT 1 FROM clientes), EXISTS (SELECT 1 FROM produtos)").fetchone()
 
-    if clientes.empty or produtos.empty:
+    if not tem_clientes or not tem_produtos:
         st.warning("Cadastre clientes e produtos antes de vender.")
     else:
         col_input, col_carrinho = st.columns([1, 1.5])
 
         with col_input:
-            sel_cliente = st.selectbox("Cliente", options=clientes['id'].tolist(), 
-                                       format_func=lambda x: clientes[clientes['id']==x]['nome'].values[0])
+            # Busca no banco em vez de enviar a tabela inteira para o navegador
+            cliente = seletor_busca("Cliente", "cliente", busca.buscar_clientes,
+                                    lambda linha: f"{linha[1]} ({linha[2]})")
             
-            sel_produto = st.selectbox("Produto", options=produtos['id'].tolist(),
-                                       format_func=lambda x: f"{produtos[produtos['id']==x]['nome'].values[0]} - R$ {produtos[produtos['id']==x]['preco'].values[0]:.2f}")
+            produto = seletor_busca("Produto", "produto", busca.buscar_produtos,
+                                    lambda linha: f"{linha[1]} - R$ {linha[2]:.2f}")
             
             qtd = st.number_input("Quantidade", min_value=1, step=1)
             
-            if st.button("➕ Adicionar Item"):
-                p_info = produtos[produtos['id'] == sel_produto].iloc[0]
-                st.session_state.carrinho.append({
-                    "id": sel_produto, "nome": p_info['nome'], 
-                    "preco": p_info['preco'], "qtd": qtd, "subtotal": p_info['preco'] * qtd
-                })
+            if st.button("➕ Adicionar Item", disabled=produto is None):
+                sel_produto, nome_produto, preco_produto = produto
+                carrinho.adicionar(st.session_state.carrinho, sel_produto, nome_produto, preco_produto, qtd)
                 st.rerun()
 
         with col_carrinho:
-            if st.session_state.carrinho:
-                df_c = pd.DataFrame(st.session_state.carrinho)
-                st.table(df_c[['nome', 'qtd', 'subtotal']])
-                total = df_c['subtotal'].sum()
-                st.subheader(f"Total: R$ {total:.2f}")
+            atual = st.session_state.carrinho
+            if atual["itens"]:
+                # Tabela rolável (só as linhas visíveis vão ao navegador) e total já acumulado
+                st.dataframe(carrinho.tabela(atual)[['nome', 'qtd', 'subtotal']], hide_index=True,
+                             use_container_width=True)
+                total = atual["total"]
+                st.subheader(f"Total: R$ {total:.2f} ({atual['unidades']} unidades)")
+
+                col_remover, col_botao = st.columns([3, 1])
+                remover_id = col_remover.selectbox("Remover item", options=list(atual["itens"]),
+                                                   format_func=lambda x: atual["itens"][x]["nome"])
+                if col_botao.button("➖ Remover"):
+                    carrinho.remover(atual, remover_id); st.rerun()
 
                 if st.button("🗑️ Limpar"):
-                    st.session_state.carrinho = []; st.rerun()
-
-                if st.button("🏁 Finalizar Venda e Gerar Recibo"):
-                    conn = conectar_db()
-                    cursor = conn.cursor()
-                    
-                    # Salva Pedido
-                    cursor.execute("INSERT INTO pedidos (cliente_id, data) VALUES (?, ?)", 
-                                   (sel_cliente, datetime.now().strftime('%Y-%m-%d')))
-                    id_pedido = cursor.lastrowid
+                    st.session_state.carrinho = carrinho.novo(); st.rerun()
+
+                if st.button("🏁 Finalizar Venda e Gerar Recibo", disabled=cliente is None):
+                    # Pedido, Itens e Resumo Diário entram na fila de escrita (commit em grupo
+                    # com os demais caixas); a chamada retorna após a confirmação
+                    sel_cliente, nome_cliente, _ = cliente
+                    with desempenho.medir("checkout: gravação do pedido", "checkout") as medida:
+                        id_pedido = registrar_pedido(sel_cliente, datetime.now().strftime('%Y-%m-%d'),
+                                                     carrinho.itens_pedido(atual))
+                        medida["linhas"] = len(atual["itens"])
                     
-                    # Salva Itens
-                    for item in st.session_state.carrinho:
-                        cursor.execute("INSERT INTO itens_pedido (pedido_id, produto_id, quantidade) VALUES (?, ?, ?)",
-                                       (id_pedido, item['id'], item['qtd']))
-                    
-                    conn.commit()
-                    
-                    # Geração do PDF
-                    nome_cliente = clientes[clientes['id'] == sel_cliente]['nome'].values[0]
-                    pdf_bytes = gerar_recibo_pdf(id_pedido, nome_cliente, st.session_state.carrinho, total)
+                    # PDF montado no pool de processos; o caixa já está livre
+                    futuro = enviar_recibo(id_pedido, nome_cliente, carrinho.itens_recibo(atual), total,
+                                           datetime.now().strftime('%d/%m/%Y %H:%M'))
+                    # O tempo do PDF entra nas medições deste checkout quando o recibo ficar pronto
+                    desempenho.acompanhar(futuro, f"recibo PDF: pedido {id_pedido}")
+                    if medindo:
+                        st.session_state.medicoes_checkout = coletor
+                    st.session_state.recibos = (st.session_state.recibos + [(id_pedido, futuro)])[-RECIBOS_NA_TELA:]
                     
                     st.success("Venda salva com sucesso!")
-                    st.markdown(link_download_pdf(pdf_bytes, f"recibo_pedido_{id_pedido}.pdf"), unsafe_allow_html=True)
                     
-                    st.session_state.carrinho = []
-                    conn.close()
+                    st.session_state.carrinho = carrinho.novo()
+            else:
+                st.info("Carrinho vazio.")
+
+        if st.session_state.recibos:
+            # Enquanto houver recibo em geração, só este trecho é reexecutado (a cada 1 s)
+            pendente = any(not futuro.done() for _, futuro in st.session_state.recibos)
+            st.fragment(mostrar_recibos, run_every=1 if pendente else None)(pendente)
+
+    # Segunda via: lida do acervo em disco (ou remontada do banco, uma única vez)
+    with st.expander("🧾 Reimprimir Recibo"):
+        id_reimpressao = st.number_input("ID do Pedido", min_value=1, step=1)
+        if st.button("Buscar Recibo"):
+            with desempenho.medir("recibo: segunda via", "recibo"):
+                pdf_bytes = obter_recibo(conn, int(id_reimpressao))
+            if pdf_bytes is None:
+                st.warning(f"Pedido {id_reimpressao} não encontrado.")
             else:
-                st.info("Carrinho vazio.")
\ No newline at end of file
+                st.download_button(f"📥 Baixar Recibo PDF (pedido {id_reimpressao})", pdf_bytes,
+                                   f"recibo_pedido_{id_reimpressao}.pdf", "application/pdf")
+
+if medindo:
+    desempenho.exibir(st.sidebar.container(), coletor, CAMINHO_DB)
+    if st.session_state.get('medicoes_checkout') not in (None, coletor):
+        st.sidebar.caption("Último checkout (inclui o PDF, se já pronto)")
+        st.sidebar.dataframe(st.session_state.medicoes_checkout, hide_index=True, use_container_width=True)
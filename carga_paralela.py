@@ -0,0 +1,73 @@
+"""
+Carga Paralela das Consultas dos Painéis:
+As seções de um painel não dependem umas das outras; em vez de rodar uma
+consulta depois da outra na conexão do script, cada uma vai para um pool de
+threads com conexões somente leitura (banco.conectar_leitura). O SQLite em
+WAL atende vários leitores ao mesmo tempo e o módulo sqlite3 solta o GIL
+durante a consulta, então a página espera pela consulta mais lenta, e não
+pela soma de todas.
+
+COMO USAR:
+- Cada tarefa é (funcao, *args) e roda como funcao(conn, *args), com a
+  conexão da thread do pool: as funções de agregados.py, previsao.py e o
+  próprio ler_sql já têm essa forma.
+- O filtro (filtros.py) é montado dentro da tarefa, na conexão que executa a
+  consulta: a tabela temporária da seleção e as partições anexadas
+  (particoes.py) existem só naquela conexão.
+- enviar_todas() devolve os Futures logo: a página desenha cada seção assim
+  que a sua consulta termina, enquanto as outras continuam.
+- Os resultados passam pelo cache compartilhado (cache_consultas.py) como na
+  leitura sequencial.
+- Cada tarefa é cronometrada (desempenho.py) e aparece no painel de
+  desempenho da sessão que a enviou.
+
+USO:
+    futuros = enviar_todas({"kpis": (agregados.kpis, ini, fim, ids),
+                            "abc": (agregados.curva_abc, ini, fim, ids)})
+    kpis = futuros["kpis"].result()
+"""
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import desempenho
+from banco import CAMINHO_DB, conectar_leitura
+
+TRABALHADORES = int(os.environ.get("PAINEL_TRABALHADORES", "4"))
+
+_executor = None
+_trava = threading.Lock()
+
+
+def _obter_executor():
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix="painel")
+        return _executor
+
+
+def _executar(caminho, funcao, args):
+    with desempenho.medir(f"tarefa: {funcao.__name__}", "tarefa") as medida:
+        resultado = funcao(conectar_leitura(caminho), *args)
+        medida["linhas"] = getattr(resultado, "shape", (None,))[0]
+    return resultado
+
+
+def enviar(funcao, *args, caminho=None):
+    """Agenda funcao(conn, *args) numa conexão de leitura do pool; retorna um Future."""
+    # A tarefa roda no contexto de quem a enviou: as medições vão para o painel da sessão
+    contexto = contextvars.copy_context()
+    return _obter_executor().submit(contexto.run, _executar, caminho or CAMINHO_DB, funcao, args)
+
+
+def enviar_todas(tarefas, caminho=None):
+    """{nome: (funcao, *args)} -> {nome: Future}, todas agendadas de uma vez."""
+    return {nome: enviar(funcao, *args, caminho=caminho) for nome, (funcao, *args) in tarefas.items()}
+
+
+def carregar(tarefas, caminho=None):
+    """{nome: (funcao, *args)} -> {nome: resultado}; espera todas terminarem."""
+    return {nome: futuro.result() for nome, futuro in enviar_todas(tarefas, caminho).items()}
@@ -0,0 +1,71 @@
+"""
+Carrinho do PDV (uma linha por produto):
+Estrutura guardada em 'st.session_state' pelo 'cadastro2.py'. Os itens ficam
+num dict indexado pelo produto_id: adicionar um produto que já está no
+carrinho soma a quantidade na mesma linha, em vez de criar outra.
+
+TOTAIS:
+- O total e o número de unidades são atualizados a cada alteração, sem
+  percorrer os itens.
+- A tabela exibida (DataFrame) só é montada de novo quando o carrinho muda;
+  nos demais reruns a mesma tabela é reaproveitada.
+
+O checkout envia 'itens_pedido(carrinho)' à fila de escrita, que grava todas
+as linhas com um único 'executemany' na transação do pedido (pedidos.py).
+
+USO:
+    carrinho = novo()
+    adicionar(carrinho, 7, "Mouse", 49.9, 2)
+    registrar_pedido(cliente_id, data, itens_pedido(carrinho))
+"""
+
+import pandas as pd
+
+COLUNAS_TABELA = ["nome", "qtd", "preco", "subtotal"]
+
+
+def novo():
+    """Carrinho vazio."""
+    return {"itens": {}, "total": 0.0, "unidades": 0, "tabela": None}
+
+
+def adicionar(carrinho, produto_id, nome, preco, qtd):
+    """Soma 'qtd' unidades do produto (cria a linha se ainda não existir)."""
+    produto_id, preco, qtd = int(produto_id), float(preco), int(qtd)
+    item = carrinho["itens"].get(produto_id)
+    if item is None:
+        item = carrinho["itens"][produto_id] = {"nome": nome, "qtd": 0, "preco": preco, "subtotal": 0.0}
+    item["qtd"] += qtd
+    item["subtotal"] = item["preco"] * item["qtd"]
+    carrinho["total"] += item["preco"] * qtd
+    carrinho["unidades"] += qtd
+    carrinho["tabela"] = None
+
+
+def remover(carrinho, produto_id):
+    """Tira a linha do produto do carrinho."""
+    item = carrinho["itens"].pop(int(produto_id), None)
+    if item is not None:
+        carrinho["total"] -= item["subtotal"]
+        carrinho["unidades"] -= item["qtd"]
+        carrinho["tabela"] = None
+        if not carrinho["itens"]:
+            carrinho["total"] = 0.0     # sem resíduo de arredondamento no carrinho vazio
+
+
+def tabela(carrinho):
+    """DataFrame (nome, qtd, preco, subtotal) indexado pelo produto_id."""
+    if carrinho["tabela"] is None:
+        carrinho["tabela"] = pd.DataFrame.from_dict(carrinho["itens"], orient="index",
+                                                    columns=COLUNAS_TABELA)
+    return carrinho["tabela"]
+
+
+def itens_pedido(carrinho):
+    """[(produto_id, quantidade, preco)] para a gravação do pedido, com o preço do recibo."""
+    return [(produto_id, item["qtd"], item["preco"]) for produto_id, item in carrinho["itens"].items()]
+
+
+def itens_recibo(carrinho):
+    """Itens no formato do recibo (dicts com nome, qtd, preco e subtotal)."""
+    return list(carrinho["itens"].values())
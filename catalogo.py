@@ -0,0 +1,66 @@
+"""
+Catálogo em Memória do PDV (clientes e produtos):
+Dicionários indexados pelo id para os menus de seleção de 'cadastro.py' e
+'cadastro2.py': o rótulo de cada opção sai por consulta direta ao dict, em vez
+de filtrar um DataFrame inteiro a cada opção desenhada.
+
+ATUALIZAÇÃO:
+- Gatilhos em clientes/produtos incrementam 'versoes_catalogo' (migração 7)
+  a cada inserção, alteração ou exclusão.
+- A cada rerun só a versão (uma linha) é lida; a tabela é recarregada apenas
+  quando ela muda. As vendas não mexem no catálogo, então o PDV em uso
+  contínuo não recarrega nada.
+- O cache é do processo (compartilhado entre sessões); os dicts retornados
+  não devem ser alterados.
+
+USO:
+    produtos = catalogo.produtos(conn)     # {id: (nome, preco)}, em ordem de nome
+    nome, preco = produtos[produto_id]
+"""
+
+import threading
+
+from cache_consultas import caminho_banco
+
+CONSULTAS = {
+    "clientes": "SELECT id, nome FROM clientes ORDER BY nome, id",
+    "produtos": "SELECT id, nome, preco FROM produtos ORDER BY nome, id",
+}
+
+_catalogos = {}     # (caminho do banco, tabela) -> (versão, dict)
+_trava = threading.Lock()
+
+
+def versao(conn, tabela):
+    return conn.execute("SELECT versao FROM versoes_catalogo WHERE tabela = ?", (tabela,)).fetchone()[0]
+
+
+def _carregar(conn, tabela, montar):
+    chave = (caminho_banco(conn), tabela)
+    # Versão lida antes dos dados: uma escrita entre as duas leituras só
+    # provoca uma recarga a mais no próximo rerun, nunca um catálogo velho
+    atual = versao(conn, tabela)
+    with _trava:
+        entrada = _catalogos.get(chave)
+        if entrada is not None and entrada[0] == atual:
+            return entrada[1]
+    dados = montar(conn.execute(CONSULTAS[tabela]))
+    with _trava:
+        _catalogos[chave] = (atual, dados)
+    return dados
+
+
+def clientes(conn):
+    """{id: nome} de todos os clientes, em ordem alfabética."""
+    return _carregar(conn, "clientes", lambda linhas: {id_: nome for id_, nome in linhas})
+
+
+def produtos(conn):
+    """{id: (nome, preco)} de todos os produtos, em ordem alfabética."""
+    return _carregar(conn, "produtos", lambda linhas: {id_: (nome, preco) for id_, nome, preco in linhas})
+
+
+def limpar():
+    """Descarta os catálogos guardados."""
+    with _trava:
+        _catalogos.clear()
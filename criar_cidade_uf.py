@@ -1,49 +1,43 @@
 """
 Script de Enriquecimento de Dados Geográficos:
-Este script atualiza a tabela 'clientes' no banco de dados 'vendas.db', 
-adicionando uma nova coluna chamada 'localidade' e preenchendo-a com 
-combinações aleatórias de cidades e estados brasileiros.
+Popula a dimensão 'localidades' (cidade, UF e coordenadas) no banco de dados
+'vendas.db' e associa cada cliente a uma dessas cidades, sorteada
+aleatoriamente, pela chave 'clientes.localidade_id'. As tabelas em si são
+criadas pelas migrações (migracoes.py).
 """
 
-import sqlite3
 import random
-
-# Lista de cidades e estados para sorteio
-locais = [
-    ("São Paulo", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"),
-    ("Curitiba", "PR"), ("Porto Alegre", "RS"), ("Salvador", "BA"),
-    ("Fortaleza", "CE"), ("Brasília", "DF"), ("Manaus", "AM"),
-    ("Recife", "PE"), ("Goiânia", "GO"), ("Belém", "PA"),
-    ("Florianópolis", "SC"), ("Vitória", "ES"), ("Natal", "RN")
-]
+from banco import conectar
+from localidades import LOCAIS, popular_localidades, mapa_ids
+from fato_vendas import corrigir_localidades
+from ranking import reconstruir_rankings
+from resumo_diario import reconstruir_resumo
 
 def atualizar_clientes():
-    conn = sqlite3.connect("vendas.db")
+    # 1. A conexão aplica as migrações pendentes (inclui a tabela 'localidades')
+    conn = conectar()
     cur = conn.cursor()
 
-    try:
-        # 1. Adicionar a coluna 'localidade' (Cidade/UF)
-        # Usamos try/except pois se a coluna já existir, o SQLite daria erro
-        print("Adicionando coluna 'localidade'...")
-        cur.execute("ALTER TABLE clientes ADD COLUMN localidade TEXT")
-    except sqlite3.OperationalError:
-        print("A coluna 'localidade' já existe. Atualizando dados...")
+    # 2. Garantir que todas as cidades (com coordenadas) estejam cadastradas
+    popular_localidades(conn)
+    ids = mapa_ids(conn)
+    ids_sorteio = [ids[(cidade, uf)] for cidade, uf, _, _ in LOCAIS]
 
-    # 2. Buscar todos os IDs de clientes cadastrados
+    # 3. Buscar todos os IDs de clientes cadastrados
     cur.execute("SELECT id FROM clientes")
     clientes = cur.fetchall()
 
-    # 3. Atualizar cada cliente com um local aleatório
-    for cliente in clientes:
-        id_cliente = cliente[0]
-        cidade, uf = random.choice(locais)
-        local_string = f"{cidade} - {uf}"
-        
-        cur.execute("UPDATE clientes SET localidade = ? WHERE id = ?", (local_string, id_cliente))
+    # 4. Atualizar cada cliente com um local aleatório
+    cur.executemany("UPDATE clientes SET localidade_id = ? WHERE id = ?",
+                    [(random.choice(ids_sorteio), cliente[0]) for cliente in clientes])
 
     conn.commit()
     print(f"Sucesso! {len(clientes)} clientes atualizados com novas localidades.")
-    conn.close()
+
+    # 5. Fatos, resumo diário e rankings são agregados por localidade: recalcula com os novos valores
+    corrigir_localidades(conn)
+    reconstruir_resumo(conn)
+    reconstruir_rankings(conn)
 
 if __name__ == "__main__":
-    atualizar_clientes()
\ No newline at end of file
+    atualizar_clientes()
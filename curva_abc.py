@@ -0,0 +1,140 @@
+"""
+Curva ABC em Lote (vários grupos de uma vez):
+Classifica os produtos pelo faturamento acumulado dentro de cada grupo (UF,
+mês, cliente ou combinações deles) numa única passada. Uma consulta agrupada
+traz o faturamento de cada grupo × produto e o resto é feito em vetores do
+pandas/NumPy: uma ordenação, a soma acumulada por grupo e os cortes com
+'searchsorted', sem função Python linha a linha.
+
+CORTES:
+CORTES = (80, 95): até 80% do faturamento acumulado do grupo é classe A, até
+95% é B e o restante C. Todas as funções aceitam outros cortes, ex.: (70, 90).
+
+RESULTADO (compacto):
+Uma linha por grupo × produto com as colunas dos grupos, produto_id,
+total_item, perc_total, perc_acumulado e classe, ordenado por grupo e
+faturamento. UF, mês e classe são 'category', ids em inteiros reduzidos e
+percentuais em float32. Serve ao gráfico do painel (agregados.curva_abc) e à
+exportação (exportar.exportar_curva_abc); com_nomes() acrescenta os nomes.
+
+FONTE: 'resumo_vendas_diario' para UF e mês; 'fato_vendas' quando o grupo
+inclui o cliente, que o resumo não guarda. Mesmo filtro de período e
+localidades dos painéis (filtros.py).
+
+USO:
+    df = classificar(conn, "2025-01-01", "2025-12-31", ids, por=("uf", "mes"))
+"""
+
+import numpy as np
+import pandas as pd
+
+import desempenho
+from cache_consultas import ler_sql
+from filtros import montar_filtro
+
+CORTES = (80, 95)
+CLASSES = ["A", "B", "C"]
+
+# grupo -> (coluna no resultado, expressão SQL com '{a}' = apelido da fonte: 'r' resumo ou 'f' fatos)
+GRUPOS = {
+    "uf": ("uf", "l.uf"),
+    "mes": ("mes", "substr({a}.data, 1, 7)"),
+    "cliente": ("cliente_id", "{a}.cliente_id"),
+}
+CATEGORICAS = {"uf", "mes"}
+
+SQL_POR_GRUPO = """
+SELECT {selecao}{a}.produto_id, SUM({a}.{valor}) AS total_item
+FROM {tabela} {a}{juncao}
+WHERE {filtro}
+GROUP BY {agrupamento}{a}.produto_id
+"""
+
+
+def montar_consulta(conn, por, dt_inicio, dt_fim, localidades):
+    """SQL e parâmetros do faturamento por grupo × produto, já filtrado."""
+    desconhecidos = set(por) - GRUPOS.keys()
+    if desconhecidos:
+        raise ValueError(f"Grupo desconhecido para a Curva ABC: {', '.join(sorted(desconhecidos))}")
+    if "cliente" in por:
+        a, tabela, valor = "f", "fato_vendas", "total_item"
+    else:
+        a, tabela, valor = "r", "resumo_vendas_diario", "faturamento"
+    colunas = [GRUPOS[nome][0] for nome in por]
+    expressoes = [GRUPOS[nome][1].format(a=a) for nome in por]
+    filtro, params = montar_filtro(conn, dt_inicio, dt_fim, localidades, f"{a}.data", f"{a}.localidade_id")
+    sql = SQL_POR_GRUPO.format(
+        selecao="".join(f"{expressao} AS {coluna}, " for expressao, coluna in zip(expressoes, colunas)),
+        agrupamento="".join(f"{expressao}, " for expressao in expressoes),
+        juncao=f"\nJOIN localidades l ON {a}.localidade_id = l.id" if "uf" in por else "",
+        a=a, tabela=tabela, valor=valor, filtro=filtro)
+    return sql, params
+
+
+def _ler_compacto(conn, sql, params):
+    # Leitor para ler_sql: o agregado já fica guardado nos tipos compactos
+    df = pd.read_sql(sql, conn, params=params)
+    for nome in df.columns:
+        if nome in CATEGORICAS:
+            df[nome] = df[nome].astype("category")
+        elif nome != "total_item":
+            df[nome] = pd.to_numeric(df[nome], downcast="integer")
+    return df
+
+
+def classificar_agregado(df, por=(), cortes=CORTES):
+    """
+    Classe ABC de cada linha de um DataFrame (colunas dos grupos, produto_id,
+    total_item); 'por' são os nomes dessas colunas de grupo.
+    """
+    por = list(por)
+    if len(cortes) != len(CLASSES) - 1 or list(cortes) != sorted(cortes):
+        raise ValueError(f"Cortes da Curva ABC devem ser {len(CLASSES) - 1} valores crescentes: {cortes}")
+    # dropna=False: chave nula (ex.: vendas sem cliente) é um grupo próprio; sem isso o
+    # ngroup devolve -1 (ou NaN) para essas linhas e a soma por grupo sai errada
+    grupo = (df.groupby(por, observed=True, dropna=False).ngroup().to_numpy(dtype=np.int64) if por
+             else np.zeros(len(df), dtype=np.int64))
+    valores = df["total_item"].to_numpy(dtype=float)
+    # Uma só ordenação (lexsort) para todos os grupos: grupo, maior faturamento
+    # primeiro e, no empate, o menor id
+    ordem = np.lexsort((df["produto_id"].to_numpy(), -valores, grupo))
+    df = df.take(ordem).reset_index(drop=True)
+    grupo, valores = grupo[ordem], valores[ordem]
+
+    soma = np.bincount(grupo, weights=valores)[grupo] if len(grupo) else valores
+    # Soma acumulada corrida, descontado o que veio dos grupos anteriores
+    acumulado = np.cumsum(valores)
+    inicio = np.r_[True, grupo[1:] != grupo[:-1]][:len(grupo)]
+    posicao_inicio = np.maximum.accumulate(np.where(inicio, np.arange(len(grupo)), 0))
+    acumulado -= (acumulado - valores)[posicao_inicio]
+
+    # Grupo sem faturamento (soma 0): nenhum item tem participação e o grupo já
+    # está todo acumulado, como os itens zerados dos demais grupos (classe C)
+    com_venda = soma > 0
+    perc_acumulado = np.divide(100 * acumulado, soma, out=np.full(len(soma), 100.0), where=com_venda)
+    df["perc_total"] = np.divide(100 * valores, soma, out=np.zeros(len(soma)), where=com_venda).astype("float32")
+    df["perc_acumulado"] = perc_acumulado.astype("float32")
+    # Até o corte (inclusive) fica na classe do corte: 80% exatos ainda é A
+    codigos = np.searchsorted(np.asarray(cortes, dtype=float), perc_acumulado, side="left")
+    df["classe"] = pd.Categorical.from_codes(codigos, categories=CLASSES)
+    return df
+
+
+def classificar(conn, dt_inicio, dt_fim, localidades, por=(), cortes=CORTES):
+    """Curva ABC dos produtos em cada grupo de 'por' (vazio = período inteiro)."""
+    sql, params = montar_consulta(conn, tuple(por), dt_inicio, dt_fim, localidades)
+    df = ler_sql(conn, sql, params=params, leitor=_ler_compacto)
+    with desempenho.medir("curva ABC: classificação", "cálculo") as medida:
+        medida["linhas"] = len(df)
+        return classificar_agregado(df, [GRUPOS[nome][0] for nome in por], cortes)
+
+
+def com_nomes(conn, df):
+    """Acrescenta 'produto' (e 'cliente', se agrupado por cliente) como categorias."""
+    df = df.copy()
+    for id_, nome, tabela in (("produto_id", "produto", "produtos"), ("cliente_id", "cliente", "clientes")):
+        if id_ in df.columns:
+            nomes = ler_sql(conn, f"SELECT id, nome FROM {tabela}")
+            df.insert(df.columns.get_loc(id_) + 1, nome,
+                      df[id_].map(pd.Series(nomes["nome"].to_numpy(), index=nomes["id"])).astype("category"))
+    return df
@@ -0,0 +1,227 @@
+"""
+Medição de Desempenho dos Apps (consultas, cálculos e seções):
+Cronometra onde vai o tempo de cada execução de um app do Streamlit, em
+camadas:
+- consulta: toda leitura que passa por cache_consultas.ler_sql (tempo, linhas
+  e se veio do cache);
+- tarefa: cada função enviada ao pool de carga_paralela.py;
+- cálculo: ajuste da previsão (previsao.py) e classificação da Curva ABC
+  (curva_abc.py);
+- seção / gráfico / checkout: blocos marcados nos próprios apps com medir()
+  ou @medido.
+Cada medição guarda a etapa em que estava ('secao'), então a consulta aparece
+ligada à seção ou tarefa que a disparou.
+
+COLETA:
+- iniciar(ativo) no começo do script cria a lista de medições desta
+  execução (ContextVar: cada sessão do Streamlit tem a sua). Desligado, as
+  medições não são guardadas e o custo é só o de ler o relógio.
+- As tarefas do pool de carga_paralela.py herdam o contexto de quem as
+  enviou, e as medições delas entram na mesma lista.
+- Um fragmento do Streamlit reexecutado sozinho não passa pelo começo do
+  script: @medido(..., origem=) retoma a lista guardada na sessão, e o painel
+  mostra essas medições na próxima execução completa.
+
+CONSULTAS LENTAS:
+Leituras (fora do cache) que passam de LIMITE_LENTA segundos são gravadas,
+com ou sem o painel ligado, na tabela 'consultas_lentas' de ARQUIVO_LOG
+(variável DESEMPENHO_DB, ao lado do banco): momento, banco, etapa, comando,
+parâmetros, tempo, linhas e o 'EXPLAIN QUERY PLAN' tirado na mesma conexão
+(com as partições e a seleção temporária do filtro). O log fica num arquivo à
+parte porque uma escrita no banco de vendas mudaria a versão dos dados e
+descartaria todo o cache de resultados.
+
+USO:
+    coletor = iniciar(ativo=True)
+    with medir("KPIs"):
+        ...
+    exibir(st.sidebar.container(), coletor, CAMINHO_DB)
+"""
+
+import contextvars
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+LIMITE_LENTA = float(os.environ.get("CONSULTA_LENTA_MS", "500")) / 1000
+ARQUIVO_LOG = os.environ.get("DESEMPENHO_DB", "desempenho.db")
+TAMANHO_ROTULO = 60     # caracteres do comando SQL exibidos no painel
+
+SQL_CRIAR_LOG = """
+CREATE TABLE IF NOT EXISTS consultas_lentas (
+    id INTEGER PRIMARY KEY,
+    momento TEXT NOT NULL,
+    banco TEXT NOT NULL,
+    etapa TEXT,
+    sql TEXT NOT NULL,
+    parametros TEXT,
+    segundos REAL NOT NULL,
+    linhas INTEGER,
+    plano TEXT
+)
+"""
+
+SQL_GRAVAR_LENTA = """
+INSERT INTO consultas_lentas (momento, banco, etapa, sql, parametros, segundos, linhas, plano)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_coletor = contextvars.ContextVar("coletor_desempenho", default=None)
+_etapa = contextvars.ContextVar("etapa_desempenho", default=None)
+_trava_log = threading.Lock()
+
+
+# ==========================================
+# COLETA
+# ==========================================
+def iniciar(ativo=True):
+    """Começa uma nova lista de medições para a execução atual; None se desligado."""
+    coletor = [] if ativo else None
+    _coletor.set(coletor)
+    return coletor
+
+
+def continuar(coletor):
+    """Volta a registrar numa lista já existente (ex.: a guardada na sessão)."""
+    _coletor.set(coletor)
+
+
+def registrar(etapa, segundos, tipo, linhas=None, secao=None):
+    """Acrescenta uma medição à lista da execução atual (se houver)."""
+    coletor = _coletor.get()
+    if coletor is not None:
+        coletor.append({"secao": secao if secao is not None else _etapa.get(), "etapa": etapa,
+                        "tipo": tipo, "ms": round(segundos * 1000, 1), "linhas": linhas})
+
+
+@contextmanager
+def medir(etapa, tipo="seção"):
+    """
+    Cronometra o bloco; o que for medido dentro dele fica ligado a 'etapa'.
+    O dict devolvido aceita 'linhas' para informar o tamanho do resultado.
+    """
+    medida = {"linhas": None}
+    secao = _etapa.get()
+    token = _etapa.set(etapa)
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        _etapa.reset(token)
+        registrar(etapa, time.perf_counter() - inicio, tipo, medida["linhas"], secao)
+
+
+def medido(etapa, tipo="seção", origem=None):
+    """
+    Decorador: cronometra cada chamada da função como medir(etapa). 'origem'
+    é uma função que devolve a lista onde registrar (fragmentos).
+    """
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if origem is not None:
+                continuar(origem())
+            with medir(etapa, tipo):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorar
+
+
+def acompanhar(futuro, etapa, tipo="segundo plano"):
+    """Registra, quando o Future terminar, o tempo desde agora até a conclusão."""
+    coletor, secao, inicio = _coletor.get(), _etapa.get(), time.perf_counter()
+
+    def concluido(_):
+        if coletor is not None:
+            coletor.append({"secao": secao, "etapa": etapa, "tipo": tipo,
+                            "ms": round((time.perf_counter() - inicio) * 1000, 1), "linhas": None})
+    futuro.add_done_callback(concluido)
+    return futuro
+
+
+def resumo(coletor):
+    """{tipo: ms somados} das medições; seções incluem o tempo do que mediram dentro."""
+    totais = {}
+    for medida in coletor or []:
+        totais[medida["tipo"]] = round(totais.get(medida["tipo"], 0) + medida["ms"], 1)
+    return totais
+
+
+def exibir(container, coletor, caminho_banco=None):
+    """Desenha as medições (e as últimas consultas lentas) num container do Streamlit."""
+    container.subheader("⏱️ Desempenho")
+    if not coletor:
+        container.caption("Nenhuma medição nesta execução.")
+    else:
+        container.caption(" · ".join(f"{tipo}: {ms:,.0f} ms" for tipo, ms in resumo(coletor).items()))
+        container.dataframe(list(coletor), hide_index=True, use_container_width=True)
+    if caminho_banco is not None:
+        lentas = consultas_lentas(os.path.abspath(caminho_banco), limite=10)
+        expansor = container.expander(f"Consultas lentas (≥ {LIMITE_LENTA * 1000:,.0f} ms)")
+        if lentas:
+            expansor.dataframe([dict(zip(("momento", "etapa", "segundos", "linhas", "sql"), linha))
+                                for linha in lentas], hide_index=True)
+        else:
+            expansor.caption("Nenhuma registrada.")
+
+
+# ==========================================
+# CONSULTAS
+# ==========================================
+def _plano(conn, sql, params):
+    try:
+        linhas = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+    except sqlite3.Error as erro:
+        return f"(plano indisponível: {erro})"
+    return "\n".join(detalhe for *_, detalhe in linhas)
+
+
+def _gravar_lenta(conn, sql, params, segundos, linhas):
+    banco = conn.execute("PRAGMA database_list").fetchone()[2]
+    registro = (datetime.now().isoformat(timespec="seconds"), banco, _etapa.get(), " ".join(sql.split()),
+                json.dumps(params, default=str, ensure_ascii=False), segundos, linhas, _plano(conn, sql, params))
+    caminho = os.path.join(os.path.dirname(banco), ARQUIVO_LOG)
+    try:
+        with _trava_log:
+            log = sqlite3.connect(caminho, timeout=5)
+            try:
+                with log:
+                    log.execute(SQL_CRIAR_LOG)
+                    log.execute(SQL_GRAVAR_LENTA, registro)
+            finally:
+                log.close()
+    except sqlite3.Error:
+        pass    # o log é auxiliar: uma falha ao gravá-lo não pode derrubar o painel
+
+
+def consulta(conn, sql, params, segundos, linhas, cache=False):
+    """Medição de uma leitura; grava no log as que passam de LIMITE_LENTA."""
+    rotulo = " ".join(sql.split())[:TAMANHO_ROTULO]
+    registrar(rotulo, segundos, "consulta (cache)" if cache else "consulta", linhas)
+    if not cache and segundos >= LIMITE_LENTA:
+        _gravar_lenta(conn, sql, params, segundos, linhas)
+
+
+def consultas_lentas(caminho_banco, limite=50):
+    """[(momento, etapa, segundos, linhas, sql)] mais recentes do log do banco."""
+    caminho = os.path.join(os.path.dirname(caminho_banco), ARQUIVO_LOG)
+    if not os.path.exists(caminho):
+        return []
+    log = sqlite3.connect(caminho)
+    try:
+        return log.execute("SELECT momento, etapa, segundos, linhas, sql FROM consultas_lentas "
+                           "ORDER BY id DESC LIMIT ?", (limite,)).fetchall()
+    finally:
+        log.close()
+
+
+if __name__ == "__main__":
+    from banco import CAMINHO_DB
+
+    for momento, etapa, segundos, linhas, sql in consultas_lentas(os.path.abspath(CAMINHO_DB)):
+        print(f"{momento}  {segundos:7.3f} s  {linhas or 0:>9,} linhas  [{etapa or '-'}]  {sql[:100]}")
@@ -0,0 +1,110 @@
+"""
+Carga Compacta do Detalhe de Vendas (uma linha por item de pedido):
+Monta a consulta de itens dos painéis 'painel_master.py' e 'painel_master2.py'
+sobre 'fato_vendas' (fato_vendas.py), juntando só as dimensões das colunas
+de nome pedidas, e devolve um DataFrame enxuto:
+
+- Textos repetidos (cliente, produto, localidade, uf) como 'category': cada
+  valor distinto é guardado uma vez e as linhas guardam só um código inteiro.
+- Inteiros reduzidos ao menor tipo que comporta os valores (int8/16/32).
+- 'data' convertida pelo SQLite em segundos desde 1970 e transformada em
+  datetime64 sem reinterpretar texto linha a linha.
+- Latitude/longitude em float32. Valores monetários continuam em float64,
+  pois somas em float32 perdem centavos.
+
+A leitura é feita em blocos de LINHAS_POR_BLOCO, compactando cada bloco antes
+de ler o próximo, para que o pico de memória não seja o do DataFrame de
+strings completo. O resultado passa pelo cache compartilhado já compactado.
+
+USO:
+    from detalhe import carregar_detalhe
+    df = carregar_detalhe(conn, "2025-01-01", "2025-12-31", [1, 2], ["data", "total_item"])
+"""
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cache_consultas import ler_sql
+from filtros import montar_filtro
+from localidades import SQL_ROTULO
+
+LINHAS_POR_BLOCO = 200000
+
+# coluna -> (expressão SQL, junção extra necessária); valores e preço vêm do fato
+COLUNAS = {
+    "data": ("CAST(strftime('%s', f.data) AS INTEGER)", None),
+    "pedido_id": ("f.pedido_id", None),
+    "cliente": ("c.nome", "c"),
+    "localidade": (SQL_ROTULO, "l"),
+    "uf": ("l.uf", "l"),
+    "lat": ("l.lat", "l"),
+    "lon": ("l.lon", "l"),
+    "produto": ("pr.nome", "pr"),
+    "preco": ("f.preco_unitario", None),
+    "quantidade": ("f.quantidade", None),
+    "total_item": ("f.total_item", None),
+}
+JUNCOES = {
+    "c": "LEFT JOIN clientes c ON f.cliente_id = c.id",
+    "l": "JOIN localidades l ON f.localidade_id = l.id",
+    "pr": "JOIN produtos pr ON f.produto_id = pr.id",
+}
+CATEGORICAS = {"cliente", "localidade", "uf", "produto"}
+INTEIRAS = {"pedido_id", "quantidade"}
+REAIS_CURTOS = {"lat", "lon"}
+
+
+def montar_consulta(conn, colunas, dt_inicio, dt_fim, localidades, expressoes=None):
+    """
+    SQL e parâmetros do detalhe com apenas as colunas pedidas. 'expressoes'
+    troca o SQL de alguma coluna (ex.: 'data' em texto na exportação).
+    """
+    expressoes = {**{nome: sql for nome, (sql, _) in COLUNAS.items()}, **(expressoes or {})}
+    selecao = ",\n           ".join(f"{expressoes[nome]} AS {nome}" for nome in colunas)
+    extras = {COLUNAS[nome][1] for nome in colunas} - {None}
+    juncoes = "".join(f"\n    {JUNCOES[alias]}" for alias in JUNCOES if alias in extras)
+    filtro, params = montar_filtro(conn, dt_inicio, dt_fim, localidades, "f.data", "f.localidade_id")
+    sql = f"""
+    SELECT {selecao}
+    FROM fato_vendas f{juncoes}
+    WHERE {filtro}
+    """
+    return sql, params
+
+
+def compactar(df):
+    """Converte as colunas conhecidas do detalhe para os tipos compactos."""
+    for nome in df.columns:
+        if nome == "data":
+            df[nome] = pd.to_datetime(df[nome], unit="s")
+        elif nome in CATEGORICAS:
+            df[nome] = df[nome].astype("category")
+        elif nome in INTEIRAS:
+            df[nome] = pd.to_numeric(df[nome], downcast="integer")
+        elif nome in REAIS_CURTOS:
+            df[nome] = df[nome].astype("float32")
+    return df
+
+
+def _juntar(blocos):
+    # Categorias diferentes entre blocos virariam 'object' no concat
+    for nome in CATEGORICAS.intersection(blocos[0].columns):
+        categorias = union_categoricals([bloco[nome] for bloco in blocos]).categories
+        for bloco in blocos:
+            bloco[nome] = bloco[nome].cat.set_categories(categorias)
+    return pd.concat(blocos, ignore_index=True)
+
+
+def ler_compacto(conn, sql, params):
+    """Leitor para ler_sql: lê em blocos e compacta cada um antes do próximo."""
+    blocos = [compactar(bloco) for bloco in
+              pd.read_sql(sql, conn, params=params, chunksize=LINHAS_POR_BLOCO)]
+    if not blocos:
+        return compactar(pd.read_sql(sql, conn, params=params))
+    return blocos[0] if len(blocos) == 1 else _juntar(blocos)
+
+
+def carregar_detalhe(conn, dt_inicio, dt_fim, localidades, colunas):
+    """DataFrame compacto com os itens do período/localidades, só com 'colunas'."""
+    sql, params = montar_consulta(conn, colunas, dt_inicio, dt_fim, localidades)
+    return ler_sql(conn, sql, params=params, leitor=ler_compacto)
@@ -0,0 +1,158 @@
+"""
+Exportação em Fluxo do Detalhe de Vendas:
+Grava os itens filtrados do painel direto do cursor do SQLite para o arquivo,
+em blocos de LINHAS_POR_BLOCO ('fetchmany'), sem montar o DataFrame inteiro
+nem o CSV inteiro em memória. Só roda quando o usuário pede a exportação.
+
+FORMATOS:
+- "csv.gz": CSV (UTF-8, com cabeçalho) comprimido com gzip.
+- "parquet": colunar com compressão; requer 'pyarrow' (opcional). Sem ele, o
+  formato não aparece em FORMATOS.
+
+A consulta é a mesma do detalhe dos painéis (detalhe.py), com as mesmas
+colunas e filtros; 'data' sai como data (AAAA-MM-DD) nos dois formatos, lida
+em texto direto do banco.
+
+A Curva ABC por grupos (curva_abc.py) já chega agregada e compacta, então é
+gravada a partir do DataFrame, com os nomes de produto/cliente e a classe.
+
+ARQUIVOS DOS PAINÉIS:
+arquivo_exportacao(sessao) dá a cada sessão do Streamlit um único arquivo em
+PASTA_EXPORTACOES (a nova exportação substitui a anterior) e apaga os
+arquivos parados há mais de VALIDADE_EXPORTACAO, inclusive os de sessões que
+já terminaram.
+
+USO:
+    with open("vendas.csv.gz", "wb") as destino:
+        linhas = exportar_detalhe(conn, ini, fim, ids, colunas, destino, "csv.gz")
+        linhas = exportar_curva_abc(conn, ini, fim, ids, ("uf", "mes"), destino, "csv.gz")
+"""
+
+import csv
+import gzip
+import io
+import os
+import tempfile
+import time
+
+import curva_abc
+import detalhe
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+LINHAS_POR_BLOCO = 50000
+NIVEL_GZIP = 6           # 9 (padrão) comprime pouco mais e custa bem mais tempo
+PASTA_EXPORTACOES = os.environ.get("EXPORTACOES_DIR", os.path.join(tempfile.gettempdir(), "vendas_exportacoes"))
+VALIDADE_EXPORTACAO = 3600   # segundos sem uso até o arquivo de uma sessão ser apagado
+
+FORMATOS = {"csv.gz": "application/gzip"}
+if pa is not None:
+    FORMATOS["parquet"] = "application/vnd.apache.parquet"
+
+
+def _blocos(conn, sql, params):
+    cursor = conn.execute(sql, params)
+    try:
+        colunas = [descricao[0] for descricao in cursor.description]
+        yield colunas
+        while True:
+            linhas = cursor.fetchmany(LINHAS_POR_BLOCO)
+            if not linhas:
+                break
+            yield linhas
+    finally:
+        cursor.close()
+
+
+def _gravar_csv_gzip(blocos, destino):
+    total = 0
+    with gzip.GzipFile(fileobj=destino, mode="wb", compresslevel=NIVEL_GZIP) as compactado:
+        # Cada bloco vira texto de uma vez e entra no gzip numa única escrita
+        for indice, linhas in enumerate(blocos):
+            texto = io.StringIO()
+            escritor = csv.writer(texto)
+            if indice == 0:
+                escritor.writerow(linhas)   # nomes das colunas
+            else:
+                escritor.writerows(linhas)
+                total += len(linhas)
+            compactado.write(texto.getvalue().encode("utf-8"))
+    return total
+
+
+def _tipo_parquet(nome):
+    if nome == "data":
+        return pa.date32()
+    if nome in detalhe.INTEIRAS:
+        return pa.int64()
+    if nome in detalhe.CATEGORICAS:
+        return pa.string()
+    return pa.float64()
+
+
+def _gravar_parquet(blocos, destino):
+    colunas = next(blocos)
+    # Esquema fixo pelas colunas do detalhe: um bloco só com nulos não muda o tipo
+    esquema = pa.schema([(nome, _tipo_parquet(nome)) for nome in colunas])
+    total = 0
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as escritor:
+        for linhas in blocos:
+            arrays = []
+            for campo, valores in zip(esquema, zip(*linhas)):
+                if campo.name == "data":
+                    arrays.append(pa.array(valores, pa.string()).cast(pa.date32()))
+                else:
+                    arrays.append(pa.array(valores, campo.type))
+            escritor.write_batch(pa.RecordBatch.from_arrays(arrays, schema=esquema))
+            total += len(linhas)
+    return total
+
+
+def limpar_exportacoes(pasta=PASTA_EXPORTACOES, validade=VALIDADE_EXPORTACAO):
+    """Apaga os arquivos de exportação sem uso há mais de 'validade' segundos; retorna quantos."""
+    limite = time.time() - validade
+    apagados = 0
+    for entrada in os.scandir(pasta) if os.path.isdir(pasta) else []:
+        try:
+            if entrada.stat().st_mtime < limite:
+                os.remove(entrada.path)
+                apagados += 1
+        except FileNotFoundError:
+            pass    # outra sessão varreu primeiro
+    return apagados
+
+
+def arquivo_exportacao(sessao, pasta=PASTA_EXPORTACOES):
+    """Caminho do arquivo de exportação da sessão; antes, varre os arquivos abandonados."""
+    limpar_exportacoes(pasta)
+    os.makedirs(pasta, exist_ok=True)
+    return os.path.join(pasta, f"{sessao}.exportacao")
+
+
+def exportar_detalhe(conn, dt_inicio, dt_fim, localidades, colunas, destino, formato="csv.gz"):
+    """Grava o detalhe filtrado em 'destino' (arquivo binário) e retorna o nº de linhas."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação indisponível: {formato}")
+    sql, params = detalhe.montar_consulta(conn, colunas, dt_inicio, dt_fim, localidades,
+                                          expressoes={"data": "f.data"})
+    blocos = _blocos(conn, sql, params)
+    if formato == "parquet":
+        return _gravar_parquet(blocos, destino)
+    return _gravar_csv_gzip(blocos, destino)
+
+
+def exportar_curva_abc(conn, dt_inicio, dt_fim, localidades, por, destino, formato="csv.gz",
+                       cortes=curva_abc.CORTES):
+    """Grava a Curva ABC de cada grupo de 'por' em 'destino' e retorna o nº de linhas."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação indisponível: {formato}")
+    df = curva_abc.com_nomes(conn, curva_abc.classificar(conn, dt_inicio, dt_fim, localidades, por, cortes))
+    if formato == "parquet":
+        df.to_parquet(destino, compression="zstd", index=False)
+    else:
+        df.to_csv(destino, index=False, compression={"method": "gzip", "compresslevel": NIVEL_GZIP})
+    return len(df)
@@ -0,0 +1,94 @@
+"""
+Fato de Vendas (tabela 'fato_vendas', uma linha por item vendido):
+Tabela larga e só de inserção, gravada no checkout junto com o pedido. Cada
+linha já traz tudo o que as análises usam: data, pedido, cliente, localidade,
+produto, preço unitário NO MOMENTO DA VENDA, quantidade e total do item.
+
+POR QUE:
+- 'itens_pedido' guarda só a quantidade; o valor vinha da junção com
+  'produtos', que devolve o preço ATUAL. Um reajuste de preço reescrevia o
+  faturamento do passado. Aqui o preço é congelado na venda.
+- As consultas dos painéis percorrem uma única tabela, ordenada pela data
+  (chave primária), sem juntar pedidos/itens/produtos/clientes. Nomes de
+  cliente, produto e cidade vêm só das dimensões, quando pedidos.
+
+MANUTENÇÃO:
+- registrar_fatos(conn, itens): grava os fatos dos itens recém-gravados, com
+  o preço unitário do carrinho (o mesmo do recibo); sem preço, vale o do
+  cadastro no commit. Deve ser chamada na MESMA transação que insere os itens
+  (ver pedidos.py).
+- preencher_fatos(conn): backfill dos pedidos que ainda não têm fatos (cargas
+  diretas como p2.py/p3.py/gerar_dados.py), com o preço atual do produto, que
+  é o único conhecido para essas vendas.
+- As linhas não são alteradas depois de gravadas; a exceção é
+  corrigir_localidades(conn), usada após o enriquecimento em massa das
+  cidades dos clientes (criar_cidade_uf.py), que corrige também os fatos das
+  partições de histórico (particoes.py).
+
+USO:
+    python fato_vendas.py   # backfill dos pedidos sem fatos
+"""
+
+COLUNAS = "data, pedido_id, item_id, cliente_id, localidade_id, produto_id, preco_unitario, quantidade, total_item"
+
+# 'item_id' é o rowid do item em 'itens_pedido' (distingue linhas repetidas do mesmo produto).
+# Sempre no arquivo principal, mesmo numa conexão com partições anexadas (particoes.py)
+SQL_INSERIR = f"""
+INSERT INTO main.fato_vendas ({COLUNAS})
+SELECT p.data, p.id, ip.rowid, p.cliente_id, COALESCE(c.localidade_id, 0), ip.produto_id,
+       {{preco}}, ip.quantidade, ip.quantidade * {{preco}}
+FROM main.pedidos p
+JOIN main.itens_pedido ip ON p.id = ip.pedido_id
+JOIN produtos pr ON ip.produto_id = pr.id
+LEFT JOIN clientes c ON p.cliente_id = c.id
+WHERE {{filtro}}
+"""
+
+# Checkout: um produto de um pedido por execução, com o preço cobrado no carrinho
+SQL_REGISTRAR = SQL_INSERIR.format(preco="COALESCE(:preco, pr.preco)",
+                                   filtro="p.id = :pedido_id AND ip.produto_id = :produto_id")
+SQL_PREENCHER = SQL_INSERIR.format(preco="pr.preco",
+                                   filtro="p.id NOT IN (SELECT pedido_id FROM main.fato_vendas)")
+
+SQL_CORRIGIR_LOCALIDADES = """
+UPDATE {esquema}.fato_vendas SET localidade_id = COALESCE(
+    (SELECT c.localidade_id FROM main.clientes c WHERE c.id = fato_vendas.cliente_id), 0)
+"""
+
+
+def registrar_fatos(conn, itens):
+    """
+    Grava os fatos dos itens informados (sem commit). 'itens' é uma lista de
+    (pedido_id, produto_id, preco), com preco None para o preço do cadastro.
+    """
+    # Linhas repetidas do mesmo produto no pedido entram juntas, pelo primeiro preço
+    precos = {}
+    for pedido_id, produto_id, preco in itens:
+        precos.setdefault((pedido_id, produto_id), preco)
+    conn.executemany(SQL_REGISTRAR, [{"pedido_id": pedido_id, "produto_id": produto_id, "preco": preco}
+                                     for (pedido_id, produto_id), preco in precos.items()])
+
+
+def preencher_fatos(conn):
+    """Grava os fatos de todos os pedidos que ainda não os têm; retorna quantos itens entraram."""
+    with conn:
+        return conn.execute(SQL_PREENCHER).rowcount
+
+
+def corrigir_localidades(conn):
+    """Alinha a localidade de todos os fatos, inclusive os arquivados, ao cadastro atual dos clientes."""
+    # Importado aqui: particoes.py já importa este módulo
+    from particoes import esquemas_um_a_um
+
+    # Uma transação por arquivo: cada partição é anexada só durante a sua correção
+    for esquema in esquemas_um_a_um(conn):
+        with conn:
+            conn.execute(SQL_CORRIGIR_LOCALIDADES.format(esquema=esquema))
+
+
+if __name__ == "__main__":
+    from banco import conectar
+
+    linhas = preencher_fatos(conectar())
+    print(f"Sucesso! {linhas} itens acrescentados a 'fato_vendas'.")
+    print("Rode 'python resumo_diario.py' se os pedidos foram gravados fora do checkout.")
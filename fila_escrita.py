@@ -0,0 +1,130 @@
+"""
+Fila de Escrita com Commit em Grupo (Checkout do PDV):
+Um único escritor por banco recebe os pedidos de todas as sessões (caixas) e
+os grava em lotes: cada lote é uma transação 'BEGIN IMMEDIATE' com
+'executemany', e cada caixa recebe de volta o id do seu pedido.
+
+POR QUE:
+Com um commit por venda, vários caixas disputam o lock de escrita do SQLite e
+surgem erros 'database is locked'. Com um só escritor não há disputa dentro
+do processo, e o custo do commit (fsync) é dividido por todo o lote.
+
+OUTRAS ESCRITAS:
+enviar_escrita(funcao, *args) põe na mesma fila uma escrita avulsa (ex.: o
+índice de recibos, recibos.py), executada pelo escritor como funcao(conn,
+*args) logo depois dos pedidos do lote: nada fora da fila disputa o lock de
+escrita com o checkout.
+
+PARÂMETROS:
+- LOTE_MAXIMO: quantos pedidos entram no mesmo commit.
+- JANELA_LOTE: quanto tempo o escritor espera por mais pedidos depois do
+  primeiro (limita a latência adicional de cada checkout).
+
+USO:
+    from fila_escrita import registrar_pedido
+    pedido_id = registrar_pedido(cliente_id, "2026-02-14", [(produto_id, qtd), ...])
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from banco import CAMINHO_DB, conectar
+import pedidos
+
+LOTE_MAXIMO = 200
+JANELA_LOTE = 0.005     # segundos
+TEMPO_LIMITE = 30       # segundos que o caixa espera pela confirmação
+
+_escritores = {}        # caminho do banco -> fila atendida pelo escritor
+_trava = threading.Lock()
+
+
+def _gravar_lote(conn, lote):
+    try:
+        ids = pedidos.registrar_pedidos(conn, [pedido for pedido, _ in lote])
+    except Exception:
+        if len(lote) == 1:
+            raise
+        # Um pedido inválido não pode derrubar os demais: grava um a um
+        for pedido, futuro in lote:
+            try:
+                futuro.set_result(pedidos.registrar_pedido(conn, *pedido))
+            except Exception as erro:
+                futuro.set_exception(erro)
+        return
+    for (_, futuro), pedido_id in zip(lote, ids):
+        futuro.set_result(pedido_id)
+
+
+def _executar_tarefas(conn, tarefas):
+    for (funcao, args), futuro in tarefas:
+        try:
+            futuro.set_result(funcao(conn, *args))
+        except Exception as erro:
+            futuro.set_exception(erro)
+
+
+def _escritor(caminho, fila):
+    try:
+        conn = conectar(caminho)
+    except Exception as erro:
+        # Sem conexão não há escritor: esta fila sai do registro (o próximo checkout
+        # tenta de novo) e quem já está nela recebe o erro
+        with _trava:
+            _escritores.pop(caminho, None)
+        while True:
+            try:
+                _, _, futuro = fila.get_nowait()
+            except queue.Empty:
+                return
+            futuro.set_exception(erro)
+    while True:
+        lote = [fila.get()]
+        prazo = time.monotonic() + JANELA_LOTE
+        while len(lote) < LOTE_MAXIMO:
+            restante = prazo - time.monotonic()
+            try:
+                lote.append(fila.get(timeout=restante) if restante > 0 else fila.get_nowait())
+            except queue.Empty:
+                break
+        pedidos_lote = [(dados, futuro) for tipo, dados, futuro in lote if tipo == "pedido"]
+        if pedidos_lote:
+            try:
+                _gravar_lote(conn, pedidos_lote)
+            except Exception as erro:
+                for _, futuro in pedidos_lote:
+                    if not futuro.done():
+                        futuro.set_exception(erro)
+        _executar_tarefas(conn, [(dados, futuro) for tipo, dados, futuro in lote if tipo == "tarefa"])
+
+
+def _enfileirar(caminho, item):
+    # Sob a trava: nada entra numa fila depois de ela sair do registro
+    with _trava:
+        fila = _escritores.get(caminho)
+        if fila is None:
+            fila = _escritores[caminho] = queue.Queue()
+            threading.Thread(target=_escritor, args=(caminho, fila),
+                             name=f"escritor-{caminho}", daemon=True).start()
+        fila.put(item)
+
+
+def enviar_pedido(cliente_id, data, itens, caminho=None):
+    """Enfileira um pedido e retorna um Future com o id que será atribuído."""
+    futuro = Future()
+    _enfileirar(caminho or CAMINHO_DB, ("pedido", (cliente_id, data, list(itens)), futuro))
+    return futuro
+
+
+def enviar_escrita(funcao, *args, caminho=None):
+    """Enfileira funcao(conn, *args) para o escritor do banco; retorna um Future com o resultado."""
+    futuro = Future()
+    _enfileirar(caminho or CAMINHO_DB, ("tarefa", (funcao, args), futuro))
+    return futuro
+
+
+def registrar_pedido(cliente_id, data, itens, caminho=None):
+    """Enfileira um pedido e espera o commit; retorna o id do pedido."""
+    return enviar_pedido(cliente_id, data, itens, caminho).result(timeout=TEMPO_LIMITE)
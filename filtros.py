@@ -0,0 +1,59 @@
+"""
+Filtros de Período e Localidade (consultas parametrizadas):
+Monta a condição WHERE dos painéis sem interpolar valores no SQL. O texto do
+comando depende apenas do tamanho da seleção (em faixas), então o cache de
+comandos do sqlite3 reaproveita a consulta já compilada e o SQLite não
+precisa replanejar a cada clique no filtro.
+
+REGRAS:
+- Período sempre por parâmetros nomeados (:dt_inicio, :dt_fim).
+- Até LIMITE_LISTA localidades: lista IN com marcadores, completada até a
+  próxima potência de 2 repetindo o último id (1, 2, 4, ... marcadores).
+- Acima disso: os ids vão para a tabela temporária da conexão
+  (TABELA_SELECAO) e a condição vira 'IN (SELECT id FROM ...)', com o mesmo
+  texto para qualquer seleção grande.
+
+Os ids são ordenados e sem repetição, para que a mesma seleção em outra ordem
+gere a mesma chave no cache de resultados (cache_consultas.py).
+
+Antes de montar a condição, a conexão é preparada para o período: as
+partições de histórico que o cruzam são anexadas (particoes.py).
+
+USO:
+    filtro, params = montar_filtro(conn, ini, fim, ids, "p.data", "c.localidade_id")
+    df = ler_sql(conn, f"SELECT ... WHERE {filtro}", params=params)
+"""
+
+import particoes
+
+LIMITE_LISTA = 32
+TABELA_SELECAO = "temp.filtro_localidades"
+
+
+def _preencher_selecao(conn, ids):
+    # Tabela temporária: existe só nesta conexão e não toca o arquivo do banco
+    with conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {TABELA_SELECAO} (id INTEGER PRIMARY KEY)")
+        conn.execute(f"DELETE FROM {TABELA_SELECAO}")
+        conn.executemany(f"INSERT INTO {TABELA_SELECAO} (id) VALUES (?)", [(i,) for i in ids])
+
+
+def montar_filtro(conn, dt_inicio, dt_fim, localidades, col_data, col_localidade):
+    """Condição WHERE e parâmetros nomeados para período e localidades."""
+    particoes.preparar(conn, dt_inicio, dt_fim)
+    ids = sorted({int(i) for i in localidades})
+    params = {"dt_inicio": dt_inicio, "dt_fim": dt_fim}
+    if len(ids) > LIMITE_LISTA:
+        _preencher_selecao(conn, ids)
+        # Não aparece no SQL: só distingue seleções diferentes no cache de resultados
+        params["selecao"] = tuple(ids)
+        condicao = f"IN (SELECT id FROM {TABELA_SELECAO})"
+    else:
+        faixa = 1 << (len(ids) - 1).bit_length() if ids else 0
+        ids += ids[-1:] * (faixa - len(ids))
+        nomes = []
+        for i, localidade in enumerate(ids):
+            params[f"loc{i}"] = localidade
+            nomes.append(f":loc{i}")
+        condicao = f"IN ({', '.join(nomes)})"
+    return f"{col_data} BETWEEN :dt_inicio AND :dt_fim AND {col_localidade} {condicao}", params
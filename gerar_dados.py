@@ -0,0 +1,211 @@
+"""
+Gerador de Dados Sintéticos para Carga e Benchmark:
+Popula o banco com milhões de clientes, produtos, pedidos e itens em escala
+realista e de forma determinística (mesma semente = mesmos dados).
+
+DISTRIBUIÇÕES:
+- Popularidade de produtos e frequência de compra dos clientes seguem lei de
+  potência (poucos produtos/clientes concentram a maior parte das vendas).
+- Datas com sazonalidade: fins de semana mais fortes, pico em novembro
+  (Black Friday) e dezembro (Natal), vale em fevereiro.
+- Localidades da dimensão 'localidades' (localidades.py), com peso maior para
+  as capitais grandes.
+- Preços log-normais e quantidades concentradas em 1-2 unidades.
+
+DESEMPENHO:
+- Inserções com 'executemany' em transações grandes (LOTE pedidos por commit).
+- 'synchronous = OFF' e cache ampliado durante a carga; índices secundários
+  e gatilhos são removidos antes e recriados ao final (mais rápido que
+  mantê-los), com a busca textual reconstruída de uma vez.
+- Os ids continuam a partir dos já existentes, então rodar de novo acrescenta
+  dados sem colidir com os anteriores.
+
+USO:
+    python gerar_dados.py --orders 5000000 --seed 42
+    python gerar_dados.py --banco carga.db --clientes 200000 --produtos 50000 --orders 1000000
+"""
+
+import argparse
+import itertools
+import math
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+from banco import CAMINHO_DB
+from localidades import LOCAIS, mapa_ids, popular_localidades
+from migracoes import aplicar_migracoes
+from particoes import ultimo_pedido
+from ranking import reconstruir_rankings
+from resumo_diario import reconstruir_resumo
+
+LOTE = 100000
+
+# Peso relativo de cada localidade (mesma ordem de localidades.LOCAIS)
+PESOS_LOCAIS = [30, 14, 9, 6, 6, 6, 5, 7, 4, 5, 4, 3, 3, 2, 2]
+
+# Sazonalidade: fator por mês (1-12) e por dia da semana (segunda = 0)
+FATOR_MES = [0.9, 0.8, 0.95, 0.95, 1.0, 1.0, 1.0, 1.0, 1.0, 1.05, 1.4, 1.6]
+FATOR_SEMANA = [0.9, 0.9, 0.95, 1.0, 1.15, 1.3, 0.8]
+
+NOMES = ["Ana", "Lucas", "Marcos", "Julia", "Fernanda", "Roberto", "Patrícia", "Gabriel",
+         "Aline", "Ricardo", "Beatriz", "Thiago", "Carla", "André", "Vanessa", "Felipe",
+         "Renata", "Diego", "Monica", "Bruno", "Camila", "Rafael", "Larissa", "Pedro"]
+SOBRENOMES = ["Silva", "Costa", "Santos", "Oliveira", "Souza", "Pereira", "Martins", "Mendes",
+              "Rocha", "Barbosa", "Cardoso", "Teixeira", "Borges", "Nunes", "Lima", "Alves"]
+CATEGORIAS = ["Notebook", "Monitor", "Teclado", "Mouse", "Cadeira", "Headset", "Webcam",
+              "Smartphone", "Placa de Vídeo", "Processador", "Memória RAM", "SSD 1TB",
+              "Fonte 600W", "Gabinete ATX", "Cooler RGB", "Placa-Mãe"]
+
+
+def pesos_potencia(n, expoente):
+    """Pesos acumulados de uma lei de potência (Zipf) para n itens."""
+    return list(itertools.accumulate(1 / (posicao ** expoente) for posicao in range(1, n + 1)))
+
+
+def _maior_id(conn, tabela):
+    return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+
+
+def _remover_indices(conn, tabelas):
+    # Gatilhos (busca textual, versões do catálogo) também saem durante a carga
+    marcadores = ", ".join("?" * len(tabelas))
+    objetos = conn.execute(f"""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({marcadores})
+    """, tabelas).fetchall()
+    for tipo, nome, _ in objetos:
+        conn.execute(f"DROP {tipo.upper()} {nome}")
+    return [sql for _, _, sql in objetos]
+
+
+def gerar_clientes(conn, rnd, quantidade):
+    primeiro = _maior_id(conn, "clientes") + 1
+    popular_localidades(conn)
+    ids = mapa_ids(conn)
+    ids_locais = [ids[(cidade, uf)] for cidade, uf, _, _ in LOCAIS]
+    acumulado_locais = list(itertools.accumulate(PESOS_LOCAIS))
+    for inicio in range(primeiro, primeiro + quantidade, LOTE):
+        fim = min(inicio + LOTE, primeiro + quantidade)
+        sorteados = rnd.choices(ids_locais, cum_weights=acumulado_locais, k=fim - inicio)
+        linhas = []
+        for cliente_id, localidade_id in zip(range(inicio, fim), sorteados):
+            nome = f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)}"
+            email = f"{nome.lower().replace(' ', '.')}.{cliente_id}@email.com"
+            linhas.append((cliente_id, nome, email, localidade_id))
+        conn.executemany("INSERT INTO clientes (id, nome, email, localidade_id) VALUES (?, ?, ?, ?)", linhas)
+        conn.commit()
+    return list(range(primeiro, primeiro + quantidade))
+
+
+def gerar_produtos(conn, rnd, quantidade):
+    primeiro = _maior_id(conn, "produtos") + 1
+    linhas = []
+    for produto_id in range(primeiro, primeiro + quantidade):
+        nome = f"{rnd.choice(CATEGORIAS)} Mod-{produto_id}"
+        preco = round(min(max(rnd.lognormvariate(math.log(400), 0.9), 9.9), 25000), 2)
+        linhas.append((produto_id, nome, preco))
+    conn.executemany("INSERT INTO produtos (id, nome, preco) VALUES (?, ?, ?)", linhas)
+    conn.commit()
+    return list(range(primeiro, primeiro + quantidade))
+
+
+def gerar_pedidos(conn, rnd, quantidade, clientes, produtos, inicio, dias, itens_max):
+    datas = [inicio + timedelta(days=d) for d in range(dias)]
+    acumulado_datas = list(itertools.accumulate(
+        FATOR_MES[d.month - 1] * FATOR_SEMANA[d.weekday()] for d in datas))
+    datas = [d.isoformat() for d in datas]
+
+    # Clientes e produtos embaralhados para a popularidade não seguir o id
+    clientes, produtos = clientes[:], produtos[:]
+    rnd.shuffle(clientes)
+    rnd.shuffle(produtos)
+    acumulado_clientes = pesos_potencia(len(clientes), 0.8)
+    acumulado_produtos = pesos_potencia(len(produtos), 1.1)
+    qtds, acumulado_qtds = [1, 2, 3, 4, 5], [55, 80, 91, 97, 100]
+
+    primeiro = ultimo_pedido(conn) + 1
+    for inicio_lote in range(primeiro, primeiro + quantidade, LOTE):
+        fim = min(inicio_lote + LOTE, primeiro + quantidade)
+        n = fim - inicio_lote
+        datas_lote = rnd.choices(datas, cum_weights=acumulado_datas, k=n)
+        clientes_lote = rnd.choices(clientes, cum_weights=acumulado_clientes, k=n)
+        conn.executemany("INSERT INTO pedidos (id, cliente_id, data) VALUES (?, ?, ?)",
+                         zip(range(inicio_lote, fim), clientes_lote, datas_lote))
+
+        itens = []
+        for pedido_id in range(inicio_lote, fim):
+            # Produtos distintos dentro do pedido (itens repetidos são somados no carrinho)
+            escolhidos = set(rnd.choices(produtos, cum_weights=acumulado_produtos,
+                                         k=rnd.randint(1, itens_max)))
+            for produto_id in escolhidos:
+                itens.append((pedido_id, produto_id,
+                              rnd.choices(qtds, cum_weights=acumulado_qtds)[0]))
+        conn.executemany("INSERT INTO itens_pedido (pedido_id, produto_id, quantidade) VALUES (?, ?, ?)", itens)
+        conn.commit()
+        print(f"  {fim - primeiro:,} / {quantidade:,} pedidos")
+
+
+def gerar(caminho, semente, qtd_clientes, qtd_produtos, qtd_pedidos,
+          inicio=date(2025, 1, 1), dias=365, itens_max=5):
+    rnd = random.Random(semente)
+    conn = sqlite3.connect(caminho)
+    aplicar_migracoes(conn)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -512000")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+    indices = _remover_indices(conn, ["clientes", "produtos", "pedidos", "itens_pedido"])
+    conn.commit()
+    try:
+        print(f"Gerando {qtd_clientes:,} clientes e {qtd_produtos:,} produtos...")
+        clientes = gerar_clientes(conn, rnd, qtd_clientes)
+        produtos = gerar_produtos(conn, rnd, qtd_produtos)
+        # Pedidos também podem ir para clientes/produtos que já existiam
+        if not clientes:
+            clientes = [linha[0] for linha in conn.execute("SELECT id FROM clientes")]
+        if not produtos:
+            produtos = [linha[0] for linha in conn.execute("SELECT id FROM produtos")]
+
+        print(f"Gerando {qtd_pedidos:,} pedidos...")
+        gerar_pedidos(conn, rnd, qtd_pedidos, clientes, produtos, inicio, dias, itens_max)
+    finally:
+        print("Recriando índices e tabelas derivadas...")
+        for sql in indices:
+            conn.execute(sql)
+        # O que os gatilhos fariam linha a linha, de uma vez só
+        for indice in ("busca_clientes", "busca_produtos"):
+            conn.execute(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+        conn.execute("UPDATE versoes_catalogo SET versao = versao + 1")
+        conn.commit()
+
+    reconstruir_resumo(conn)
+    reconstruir_rankings(conn)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o vendas.db")
+    parser.add_argument("--banco", default=CAMINHO_DB, help="arquivo SQLite de destino")
+    parser.add_argument("--seed", type=int, default=42, help="semente (mesma semente = mesmos dados)")
+    parser.add_argument("--orders", "--pedidos", dest="pedidos", type=int, default=100000)
+    parser.add_argument("--customers", "--clientes", dest="clientes", type=int, default=None,
+                        help="padrão: 1 cliente para cada 20 pedidos")
+    parser.add_argument("--products", "--produtos", dest="produtos", type=int, default=None,
+                        help="padrão: 1 produto para cada 200 pedidos (mínimo 50)")
+    parser.add_argument("--inicio", type=date.fromisoformat, default=date(2025, 1, 1))
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--itens-max", type=int, default=5, help="itens distintos por pedido (máximo)")
+    args = parser.parse_args()
+
+    qtd_clientes = args.clientes if args.clientes is not None else max(args.pedidos // 20, 10)
+    qtd_produtos = args.produtos if args.produtos is not None else max(args.pedidos // 200, 50)
+
+    t0 = time.perf_counter()
+    gerar(args.banco, args.seed, qtd_clientes, qtd_produtos, args.pedidos,
+          args.inicio, args.dias, args.itens_max)
+    print(f"Sucesso! Carga concluída em {time.perf_counter() - t0:.1f} s.")
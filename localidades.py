@@ -0,0 +1,65 @@
+"""
+Dimensão Geográfica (tabela 'localidades'):
+Cadastro único de cidades com UF e coordenadas, referenciado pelos clientes
+através de 'clientes.localidade_id'. Os painéis obtêm UF, rótulo e
+latitude/longitude por junção com esta tabela, sem dicionários fixos de
+coordenadas nem separação de texto "Cidade - UF" linha a linha.
+
+CONTEÚDO:
+- LOCAIS: cidades conhecidas com suas coordenadas (usadas no mapa).
+- popular_localidades(conn): garante que todas as cidades de LOCAIS existam.
+- obter_ou_criar(conn, cidade, uf): id da cidade, criando-a se necessário.
+- separar_localidade(texto): converte "Cidade - UF" ou "Cidade/UF" em (cidade, uf).
+"""
+
+LOCAIS = [
+    ("São Paulo", "SP", -23.55, -46.63), ("Rio de Janeiro", "RJ", -22.90, -43.17),
+    ("Belo Horizonte", "MG", -19.91, -43.93), ("Curitiba", "PR", -25.42, -49.27),
+    ("Porto Alegre", "RS", -30.03, -51.21), ("Salvador", "BA", -12.97, -38.50),
+    ("Fortaleza", "CE", -3.71, -38.54), ("Brasília", "DF", -15.78, -47.92),
+    ("Manaus", "AM", -3.11, -60.02), ("Recife", "PE", -8.05, -34.88),
+    ("Goiânia", "GO", -16.68, -49.25), ("Belém", "PA", -1.45, -48.50),
+    ("Florianópolis", "SC", -27.59, -48.54), ("Vitória", "ES", -20.31, -40.31),
+    ("Natal", "RN", -5.79, -35.20),
+]
+
+# Rótulo exibido nos filtros e gráficos, montado no SQL
+SQL_ROTULO = "l.cidade || ' - ' || l.uf"
+
+# Opções do filtro de localidades dos painéis (apenas cidades com clientes)
+SQL_OPCOES_FILTRO = f"""
+SELECT l.id, {SQL_ROTULO} AS localidade
+FROM localidades l
+WHERE l.id IN (SELECT localidade_id FROM clientes)
+ORDER BY l.uf, l.cidade
+"""
+
+
+def separar_localidade(texto):
+    """'Cidade - UF' ou 'Cidade/UF' -> (cidade, uf); None se não houver UF."""
+    for separador in (" - ", "/"):
+        if texto and separador in texto:
+            cidade, uf = texto.rsplit(separador, 1)
+            return cidade.strip(), uf.strip().upper()
+    return None
+
+
+def popular_localidades(conn):
+    """Insere (ou completa as coordenadas de) todas as cidades de LOCAIS."""
+    conn.executemany("""
+        INSERT INTO localidades (cidade, uf, lat, lon) VALUES (?, ?, ?, ?)
+        ON CONFLICT (cidade, uf) DO UPDATE SET lat = excluded.lat, lon = excluded.lon
+    """, LOCAIS)
+
+
+def obter_ou_criar(conn, cidade, uf):
+    """Id da localidade (cidade, uf); cidades novas entram sem coordenadas."""
+    cidade, uf = cidade.strip(), uf.strip().upper()
+    conn.execute("INSERT OR IGNORE INTO localidades (cidade, uf) VALUES (?, ?)", (cidade, uf))
+    return conn.execute("SELECT id FROM localidades WHERE cidade = ? AND uf = ?",
+                        (cidade, uf)).fetchone()[0]
+
+
+def mapa_ids(conn):
+    """{(cidade, uf): id} de todas as localidades cadastradas."""
+    return {(cidade, uf): id_ for id_, cidade, uf in conn.execute("SELECT id, cidade, uf FROM localidades")}
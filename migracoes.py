@@ -0,0 +1,396 @@
+"""
+Migrações Versionadas do Banco 'vendas.db':
+Mantém o esquema do banco em dia de forma incremental. A versão atual fica
+gravada em 'PRAGMA user_version' e cada migração é aplicada uma única vez,
+dentro de uma transação própria.
+
+CONTEÚDO:
+- MIGRACOES: lista ordenada de (versão, descrição, comandos SQL ou função).
+- aplicar_migracoes(conn): leva o banco até a última versão.
+- verificar_planos(conn): roda 'EXPLAIN QUERY PLAN' nas consultas dos painéis e
+  do PDV e aponta qualquer varredura completa de tabela (regressão de índice).
+
+USO:
+    python migracoes.py                     # aplica as migrações pendentes
+    python migracoes.py --verificar-planos  # falha (código 1) se houver SCAN sem índice
+
+Para alterar o esquema, acrescente uma nova entrada ao final de MIGRACOES;
+nunca edite uma migração que já foi publicada.
+"""
+
+import re
+import sqlite3
+import sys
+
+import busca
+import fato_vendas
+import localidades
+import particoes
+import ranking
+import resumo_diario
+
+
+def _colunas(conn, tabela):
+    return {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+# ==========================================
+# MIGRAÇÕES
+# ==========================================
+def _m002_localidade_clientes(conn):
+    # Antes feito com ALTER TABLE avulso em 'criar_cidade_uf.py'
+    if "localidade" not in _colunas(conn, "clientes"):
+        conn.execute("ALTER TABLE clientes ADD COLUMN localidade TEXT")
+
+
+def _m005_dimensao_localidades(conn):
+    conn.execute("""CREATE TABLE localidades (
+        id INTEGER PRIMARY KEY,
+        cidade TEXT NOT NULL,
+        uf TEXT NOT NULL,
+        lat REAL,
+        lon REAL,
+        UNIQUE (cidade, uf)
+    )""")
+    localidades.popular_localidades(conn)
+
+    # Converte o texto livre ("Cidade - UF" ou "Cidade/UF") em chave inteira
+    conn.execute("ALTER TABLE clientes ADD COLUMN localidade_id INTEGER REFERENCES localidades(id)")
+    textos = [linha[0] for linha in conn.execute(
+        "SELECT DISTINCT localidade FROM clientes WHERE localidade IS NOT NULL")]
+    for texto in textos:
+        partes = localidades.separar_localidade(texto)
+        if partes:
+            conn.execute("UPDATE clientes SET localidade_id = ? WHERE localidade = ?",
+                         (localidades.obter_ou_criar(conn, *partes), texto))
+    conn.execute("DROP INDEX IF EXISTS idx_clientes_localidade")
+    conn.execute("ALTER TABLE clientes DROP COLUMN localidade")
+    conn.execute("CREATE INDEX idx_clientes_localidade ON clientes (localidade_id)")
+
+    # Resumo diário passa a ser indexado pela localidade_id (0 = sem localidade)
+    conn.execute("DROP TABLE IF EXISTS resumo_vendas_diario")
+    conn.execute("""CREATE TABLE resumo_vendas_diario (
+        data DATE NOT NULL,
+        localidade_id INTEGER NOT NULL DEFAULT 0,
+        produto_id INTEGER NOT NULL,
+        faturamento REAL NOT NULL DEFAULT 0,
+        quantidade INTEGER NOT NULL DEFAULT 0,
+        pedidos INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (data, localidade_id, produto_id)
+    ) WITHOUT ROWID""")
+    conn.execute("""INSERT INTO resumo_vendas_diario (data, localidade_id, produto_id, faturamento, quantidade, pedidos)
+        SELECT p.data, COALESCE(c.localidade_id, 0), ip.produto_id,
+               SUM(ip.quantidade * pr.preco), SUM(ip.quantidade), COUNT(DISTINCT p.id)
+        FROM pedidos p
+        JOIN itens_pedido ip ON p.id = ip.pedido_id
+        JOIN produtos pr ON ip.produto_id = pr.id
+        LEFT JOIN clientes c ON p.cliente_id = c.id
+        GROUP BY p.data, COALESCE(c.localidade_id, 0), ip.produto_id""")
+    conn.execute("ANALYZE")
+
+
+def _m008_busca_textual(conn):
+    # Índices FTS5 de conteúdo externo: guardam só os termos, o texto continua
+    # nas tabelas originais; os gatilhos mantêm o índice em dia
+    for tabela, colunas in (("produtos", ["nome"]), ("clientes", ["nome", "email"])):
+        indice = f"busca_{tabela}"
+        lista = ", ".join(colunas)
+        novos = ", ".join(f"new.{coluna}" for coluna in colunas)
+        antigos = ", ".join(f"old.{coluna}" for coluna in colunas)
+        conn.execute(f"""CREATE VIRTUAL TABLE {indice} USING fts5(
+            {lista}, content='{tabela}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3')""")
+        conn.execute(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+        conn.execute(f"""CREATE TRIGGER trg_{tabela}_busca_insert AFTER INSERT ON {tabela} BEGIN
+            INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {novos}); END""")
+        conn.execute(f"""CREATE TRIGGER trg_{tabela}_busca_delete AFTER DELETE ON {tabela} BEGIN
+            INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); END""")
+        conn.execute(f"""CREATE TRIGGER trg_{tabela}_busca_update AFTER UPDATE OF {lista} ON {tabela} BEGIN
+            INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos});
+            INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {novos}); END""")
+
+
+def _m009_fato_vendas(conn):
+    # Chave pela data: o filtro de período dos painéis vira uma faixa da própria tabela
+    conn.execute("""CREATE TABLE fato_vendas (
+        data DATE NOT NULL,
+        pedido_id INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        cliente_id INTEGER,
+        localidade_id INTEGER NOT NULL DEFAULT 0,
+        produto_id INTEGER NOT NULL,
+        preco_unitario REAL NOT NULL,
+        quantidade INTEGER NOT NULL,
+        total_item REAL NOT NULL,
+        PRIMARY KEY (data, pedido_id, item_id)
+    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX idx_fato_vendas_pedido ON fato_vendas (pedido_id)")
+    # Vendas anteriores: o preço da época não foi guardado, vale o atual
+    conn.execute("""INSERT INTO fato_vendas (data, pedido_id, item_id, cliente_id, localidade_id,
+                                             produto_id, preco_unitario, quantidade, total_item)
+        SELECT p.data, p.id, ip.rowid, p.cliente_id, COALESCE(c.localidade_id, 0), ip.produto_id,
+               pr.preco, ip.quantidade, ip.quantidade * pr.preco
+        FROM pedidos p
+        JOIN itens_pedido ip ON p.id = ip.pedido_id
+        JOIN produtos pr ON ip.produto_id = pr.id
+        LEFT JOIN clientes c ON p.cliente_id = c.id""")
+    conn.execute("ANALYZE fato_vendas")
+
+
+def _m011_rankings(conn):
+    for comando in ranking.ESQUEMA:
+        conn.execute(comando)
+    ranking.preencher_rankings(conn)
+    conn.execute("ANALYZE ranking_vendas")
+
+
+MIGRACOES = [
+    (1, "Estrutura base (clientes, produtos, pedidos, itens_pedido)", [
+        """CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY,
+            nome TEXT,
+            email TEXT UNIQUE
+        )""",
+        """CREATE TABLE IF NOT EXISTS produtos (
+            id INTEGER PRIMARY KEY,
+            nome TEXT,
+            preco REAL
+        )""",
+        """CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY,
+            cliente_id INTEGER,
+            data DATE,
+            FOREIGN KEY(cliente_id) REFERENCES clientes(id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS itens_pedido (
+            pedido_id INTEGER,
+            produto_id INTEGER,
+            quantidade INTEGER,
+            FOREIGN KEY(pedido_id) REFERENCES pedidos(id),
+            FOREIGN KEY(produto_id) REFERENCES produtos(id)
+        )""",
+    ]),
+    (2, "Coluna 'localidade' (Cidade - UF) em clientes", _m002_localidade_clientes),
+    (3, "Índices de cobertura para os painéis e o PDV", [
+        # Join pedidos -> itens sem tocar a tabela (pedido_id, produto_id, quantidade)
+        "CREATE INDEX IF NOT EXISTS idx_itens_pedido_pedido ON itens_pedido (pedido_id, produto_id, quantidade)",
+        "CREATE INDEX IF NOT EXISTS idx_itens_pedido_produto ON itens_pedido (produto_id, pedido_id, quantidade)",
+        # Filtro por período já traz o cliente (o id do pedido é o rowid)
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_data ON pedidos (data, cliente_id)",
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos (cliente_id, data)",
+        "CREATE INDEX IF NOT EXISTS idx_clientes_localidade ON clientes (localidade, nome)",
+        "ANALYZE",
+    ]),
+    (4, "Resumo diário pré-agregado (dia × localidade × produto)", [
+        """CREATE TABLE IF NOT EXISTS resumo_vendas_diario (
+            data DATE NOT NULL,
+            localidade TEXT NOT NULL DEFAULT '',
+            produto_id INTEGER NOT NULL,
+            faturamento REAL NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            pedidos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (data, localidade, produto_id)
+        ) WITHOUT ROWID""",
+        """INSERT INTO resumo_vendas_diario (data, localidade, produto_id, faturamento, quantidade, pedidos)
+        SELECT p.data, COALESCE(c.localidade, ''), ip.produto_id,
+               SUM(ip.quantidade * pr.preco), SUM(ip.quantidade), COUNT(DISTINCT p.id)
+        FROM pedidos p
+        JOIN itens_pedido ip ON p.id = ip.pedido_id
+        JOIN produtos pr ON ip.produto_id = pr.id
+        LEFT JOIN clientes c ON p.cliente_id = c.id
+        GROUP BY p.data, COALESCE(c.localidade, ''), ip.produto_id""",
+    ]),
+    (5, "Dimensão 'localidades' com chave inteira em clientes", _m005_dimensao_localidades),
+    (6, "Índice dos recibos em PDF guardados em disco (recibos.py)", [
+        """CREATE TABLE IF NOT EXISTS recibos (
+            pedido_id INTEGER PRIMARY KEY REFERENCES pedidos(id),
+            arquivo TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            gerado_em TEXT NOT NULL
+        )""",
+    ]),
+    (7, "Versões de clientes/produtos mantidas por gatilhos (catalogo.py)", [
+        """CREATE TABLE IF NOT EXISTS versoes_catalogo (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""",
+        "INSERT OR IGNORE INTO versoes_catalogo (tabela) VALUES ('clientes'), ('produtos')",
+        *[f"""CREATE TRIGGER IF NOT EXISTS trg_{tabela}_versao_{evento.lower()} AFTER {evento} ON {tabela}
+            BEGIN UPDATE versoes_catalogo SET versao = versao + 1 WHERE tabela = '{tabela}'; END"""
+          for tabela in ("clientes", "produtos") for evento in ("INSERT", "UPDATE", "DELETE")],
+    ]),
+    (8, "Busca textual FTS5 em produtos e clientes (busca.py)", _m008_busca_textual),
+    (9, "Fato de vendas com preço da venda (fato_vendas.py)", _m009_fato_vendas),
+    (10, "Registro das partições de histórico por período (particoes.py)", [
+        """CREATE TABLE IF NOT EXISTS particoes (
+            chave TEXT PRIMARY KEY,
+            nivel TEXT NOT NULL,
+            arquivo TEXT NOT NULL,
+            dt_inicio TEXT NOT NULL,
+            dt_fim TEXT NOT NULL,
+            primeira_data TEXT,
+            ultima_data TEXT,
+            pedidos INTEGER NOT NULL DEFAULT 0,
+            ultimo_pedido INTEGER,
+            arquivado_em TEXT NOT NULL
+        )""",
+    ]),
+    (11, "Rankings de clientes e produtos por período e UF (ranking.py)", _m011_rankings),
+]
+
+
+def versao_atual(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    """Aplica as migrações pendentes e retorna a versão final do banco."""
+    for versao, descricao, passos in MIGRACOES:
+        if versao_atual(conn) >= versao:
+            continue
+        # BEGIN IMMEDIATE garante que só um processo migre por vez
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versao_atual(conn) < versao:
+                if callable(passos):
+                    passos(conn)
+                else:
+                    for comando in passos:
+                        conn.execute(comando)
+                conn.execute(f"PRAGMA user_version = {versao}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return versao_atual(conn)
+
+
+# ==========================================
+# VERIFICAÇÃO DE PLANOS DE CONSULTA
+# ==========================================
+# Consultas publicadas nos painéis e no PDV: (sql, parâmetros de exemplo[, tabelas
+# cuja varredura é aceitável, ex.: leitura pela chave primária limitada por LIMIT])
+CONSULTAS_MONITORADAS = {
+    "painéis: período disponível": (particoes.SQL_PERIODO_DISPONIVEL, (), {"particoes"}),  # uma linha por partição
+    "checkout: próximo id de pedido": (particoes.SQL_ULTIMO_PEDIDO, (), {"particoes"}),
+    "painéis: localidades": (localidades.SQL_OPCOES_FILTRO, (), {"l"}),  # uma linha por cidade
+    "painel: faturamento diário (resumo)": ("""
+        SELECT data, SUM(faturamento) AS faturamento
+        FROM resumo_vendas_diario
+        GROUP BY data
+        ORDER BY data
+    """, (), {"resumo_vendas_diario"}),  # o resumo cresce com o número de dias, não de itens
+    "painel_master3: faturamento diário (resumo)": ("""
+        SELECT data, SUM(faturamento) AS faturamento
+        FROM resumo_vendas_diario
+        WHERE data BETWEEN ? AND ? AND localidade_id IN (?, ?)
+        GROUP BY data
+        ORDER BY data
+    """, ("2026-01-01", "2026-01-31", 1, 10)),
+    "checkout: registro dos fatos": (fato_vendas.SQL_REGISTRAR, {"pedido_id": 1, "produto_id": 1, "preco": 9.9}),
+    "checkout: atualização do resumo": (resumo_diario.SQL_ATUALIZAR, (1,)),
+    **{f"checkout: atualização dos rankings ({i + 1})": (sql, (1,)) for i, sql in enumerate(ranking.SQL_ATUALIZAR)},
+    "painéis: melhores clientes (ranking)": (ranking.SQL_TOPO_CLIENTES, {"periodo": "2026-01", "uf": "SP", "limite": 10}),
+    "painel: melhores produtos (ranking)": (ranking.SQL_TOPO_PRODUTOS, {"periodo": "total", "uf": "", "limite": 5}),
+    "painéis: cobertura dos rankings": (ranking.SQL_LER_COBERTURA, ("2026-01", "SP")),
+    "cadastro: últimos pedidos": ("""
+        SELECT p.id, c.nome as cliente, p.data
+        FROM (SELECT id, cliente_id, data FROM pedidos ORDER BY id DESC LIMIT 5) p
+        JOIN clientes c ON p.cliente_id = c.id
+        ORDER BY p.id DESC
+    """, (), {"pedidos"}),  # percorre a chave primária de trás para frente e para em 5 linhas
+    "PDV: busca de produtos": (busca.SQL_PRODUTOS, ('"mou"*', 21, 0)),
+    "PDV: busca de clientes": (busca.SQL_CLIENTES, ('"ana"* "sil"*', 21, 0)),
+    "PDV: versões do catálogo": ("SELECT versao FROM versoes_catalogo WHERE tabela = ?", ("produtos",)),
+}
+
+
+def consultas_agregadas(conn):
+    """
+    Consultas do motor de agregação (agregados.py) e do detalhe (detalhe.py),
+    com uma seleção pequena (lista IN) e uma grande (tabela temporária).
+    """
+    import agregados
+    import curva_abc
+    import detalhe
+    import filtros
+
+    consultas = {}
+    selecoes = {"lista": [1, 10], "tabela temporária": range(1, filtros.LIMITE_LISTA + 2)}
+    for tipo, ids in selecoes.items():
+        exemplo = ("2026-01-01", "2026-01-31", ids)
+        filtro_fatos, params = filtros.montar_filtro(conn, *exemplo, "f.data", "f.localidade_id")
+        filtro_resumo, _ = filtros.montar_filtro(conn, *exemplo, "r.data", "r.localidade_id")
+        params = {**params, "qtd_ufs": 3, "qtd_produtos": 3, "limite": 10}
+        for nome in ("SQL_KPIS", "SQL_VENDAS_POR_LOCALIDADE", "SQL_TOP_CLIENTES"):
+            consultas[f"agregados: {nome} ({tipo})"] = (
+                getattr(agregados, nome).format(filtro=filtro_fatos), params)
+        for nome in ("SQL_SERIE_DIARIA", "SQL_PARTICIPACAO_UF", "SQL_TOP_PRODUTOS_POR_UF"):
+            consultas[f"agregados: {nome} ({tipo})"] = (
+                getattr(agregados, nome).format(filtro=filtro_resumo), params)
+        consultas[f"detalhe: itens ({tipo})"] = detalhe.montar_consulta(conn, list(detalhe.COLUNAS), *exemplo)
+        for por in ((), ("uf", "mes"), ("cliente",)):
+            consultas[f"curva_abc: por {', '.join(por) or 'período'} ({tipo})"] = (
+                curva_abc.montar_consulta(conn, por, *exemplo))
+    return consultas
+
+
+def _origens(sql):
+    # Mapeia apelidos para o nome usado no FROM/JOIN (ex.: "p" -> "pedidos")
+    origens = {}
+    for nome, apelido in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        origens[nome] = nome
+        if apelido:
+            origens[apelido] = nome
+    return origens
+
+
+def varreduras_completas(conn, sql, parametros=()):
+    """
+    Retorna as linhas do plano que leem uma tabela inteira sem índice.
+    Varreduras de CTEs e subconsultas (resultados intermediários já pequenos)
+    não contam, apenas as de tabelas reais do banco. O mesmo vale para as
+    visões das partições (particoes.py), cujas partes são planejadas à parte.
+    """
+    tabelas = {linha[0] for linha in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    origens = _origens(sql)
+    plano = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+    intermediarios = {detalhe.split()[1] for *_, detalhe in plano
+                      if detalhe.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    varreduras = []
+    for *_, detalhe in plano:
+        if not detalhe.startswith("SCAN ") or "INDEX" in detalhe:
+            continue
+        nome = detalhe.split()[1]
+        if origens.get(nome, nome) in tabelas and origens.get(nome, nome) not in intermediarios:
+            varreduras.append(detalhe)
+    return varreduras
+
+
+def verificar_planos(conn, consultas=None):
+    """Retorna {nome_da_consulta: [varreduras]} apenas para as consultas com problema."""
+    consultas = consultas or {**CONSULTAS_MONITORADAS, **consultas_agregadas(conn)}
+    problemas = {}
+    for nome, (sql, parametros, *permitidas) in consultas.items():
+        permitidas = permitidas[0] if permitidas else set()
+        varreduras = [v for v in varreduras_completas(conn, sql, parametros)
+                      if v.split()[1] not in permitidas]
+        if varreduras:
+            problemas[nome] = varreduras
+    return problemas
+
+
+if __name__ == "__main__":
+    from banco import CAMINHO_DB
+
+    conn = sqlite3.connect(CAMINHO_DB)
+    print(f"Banco '{CAMINHO_DB}' na versão {aplicar_migracoes(conn)}.")
+
+    if "--verificar-planos" in sys.argv:
+        problemas = verificar_planos(conn)
+        for nome, varreduras in problemas.items():
+            print(f"❌ {nome}: {'; '.join(varreduras)}")
+        if problemas:
+            sys.exit(1)
+        print("✅ Nenhuma consulta monitorada faz varredura completa de tabela.")
+    conn.close()
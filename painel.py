@@ -1,19 +1,21 @@
 """
 Dashboard Streamlit V1:
 Painel básico para visualização de faturamento total, gráfico de evolução 
-de vendas e ranking dos Top 10 Clientes em interface web.
+de vendas e ranking dos Top 10 Clientes e Top 5 Produtos em interface web.
 """
 
 ## Top 10 Clientes, o Top 5 Produtos e o gráfico de faturamento diário
 import streamlit as st
 import pandas as pd
-import sqlite3
+from banco import conectar
+from ranking import PERIODO_TOTAL, SQL_TOPO_CLIENTES, SQL_TOPO_PRODUTOS, TODAS_UFS
 
 # Configuração da página (Deve ser a primeira linha de comando do Streamlit)
 st.set_page_config(page_title="Gestão de Vendas", layout="wide")
 
 def get_connection():
-    return sqlite3.connect("vendas.db")
+    # Conexão compartilhada da thread (pool em banco.py); não deve ser fechada
+    return conectar()
 
 st.title("📊 Painel de Vendas")
 
@@ -21,29 +23,22 @@ try:
     conn = get_connection()
 
     # 1. Query de Faturamento Diário
-    # Note: Usando p.id conforme seu CREATE TABLE pedidos
+    # Lida do resumo pré-agregado (resumo_diario.py) em vez de juntar os itens
     query_vendas = """
-    SELECT p.data, SUM(ip.quantidade * pr.preco) AS faturamento
-    FROM pedidos p
-    JOIN itens_pedido ip ON p.id = ip.pedido_id
-    JOIN produtos pr ON ip.produto_id = pr.id
-    GROUP BY p.data
-    ORDER BY p.data
+    SELECT data, SUM(faturamento) AS faturamento
+    FROM resumo_vendas_diario
+    GROUP BY data
+    ORDER BY data
     """
     df_vendas = pd.read_sql(query_vendas, conn)
 
-    # 2. Query de Top Clientes
-    query_clientes = """
-    SELECT c.nome, SUM(ip.quantidade * pr.preco) AS total_gasto
-    FROM clientes c
-    JOIN pedidos p ON c.id = p.cliente_id
-    JOIN itens_pedido ip ON p.id = ip.pedido_id
-    JOIN produtos pr ON ip.produto_id = pr.id
-    GROUP BY c.nome
-    ORDER BY total_gasto DESC
-    LIMIT 10
-    """
-    df_top_clientes = pd.read_sql(query_clientes, conn)
+    # 2. Top Clientes e Top Produtos do histórico inteiro
+    # Rankings somados no checkout (ranking.py): só os primeiros são lidos
+    historico = {"periodo": PERIODO_TOTAL, "uf": TODAS_UFS}
+    df_top_clientes = pd.read_sql(SQL_TOPO_CLIENTES, conn, params={**historico, "limite": 10}).rename(
+        columns={"cliente": "nome", "total_item": "total_gasto"})
+    df_top_produtos = pd.read_sql(SQL_TOPO_PRODUTOS, conn, params={**historico, "limite": 5}).rename(
+        columns={"produto": "nome", "total_item": "faturamento"})
 
     # --- EXIBIÇÃO ---
 
@@ -61,7 +56,10 @@ try:
     st.subheader("🏆 Top 10 Clientes")
     st.dataframe(df_top_clientes, use_container_width=True)
 
-    conn.close()
+    # Tabela de Produtos
+    st.subheader("📦 Top 5 Produtos")
+    st.dataframe(df_top_produtos, use_container_width=True)
+
 
 except Exception as e:
     st.error(f"Ocorreu um erro no processamento: {e}")
\ No newline at end of file
@@ -1,39 +1,40 @@
 """
 BI & Analytics Pro:
 Dashboard avançado com filtros de período e localidade, métricas de ticket médio, 
-distribuição geográfica em mapa e exportação de dados para CSV.
+distribuição geográfica em mapa e exportação de dados (CSV gzip ou Parquet).
 """
 
+import os
+import uuid
 import streamlit as st
 import pandas as pd
-import sqlite3
+import desempenho
+from banco import CAMINHO_DB, conectar
+from agregados import top_clientes
+from cache_consultas import ler_sql
+from localidades import SQL_OPCOES_FILTRO
+from particoes import SQL_PERIODO_DISPONIVEL
+from detalhe import carregar_detalhe
+from exportar import FORMATOS, arquivo_exportacao, exportar_detalhe
 
 # 1. Configurações da página (Sempre no topo)
 st.set_page_config(page_title="Analytics Pro 2026", layout="wide", page_icon="📊")
 
 # 2. Definição da função de conexão
 def get_connection():
-    return sqlite3.connect("vendas.db")
-
-# 3. Coordenadas para o Mapa
-coords = {
-    "São Paulo - SP": [-23.55, -46.63], "Rio de Janeiro - RJ": [-22.90, -43.17],
-    "Belo Horizonte - MG": [-19.91, -43.93], "Curitiba - PR": [-25.42, -49.27],
-    "Porto Alegre - RS": [-30.03, -51.21], "Salvador - BA": [-12.97, -38.50],
-    "Fortaleza - CE": [-3.71, -38.54], "Brasília - DF": [-15.78, -47.92],
-    "Manaus - AM": [-3.11, -60.02], "Recife - PE": [-8.05, -34.88],
-    "Goiânia - GO": [-16.68, -49.25], "Belém - PA": [-1.45, -48.50],
-    "Florianópolis - SC": [-27.59, -48.54], "Vitória - ES": [-20.31, -40.31],
-    "Natal - RN": [-5.79, -35.20]
-}
+    # Conexão compartilhada da thread (pool em banco.py); não deve ser fechada
+    return conectar()
 
 # --- INÍCIO DA LÓGICA ---
 conn = get_connection()
 
 st.sidebar.title("Filtros Inteligentes")
+# Ligado, consultas, transformações e gráficos desta execução são cronometrados (desempenho.py)
+medindo = st.sidebar.toggle("⏱️ Medir desempenho", key="medir_desempenho")
+coletor = desempenho.iniciar(medindo)
 
-# 4. BUSCAR DATAS PARA O FILTRO
-df_dates = pd.read_sql("SELECT MIN(data) as min, MAX(data) as max FROM pedidos", conn)
+# 3. BUSCAR DATAS PARA O FILTRO
+df_dates = ler_sql(conn, SQL_PERIODO_DISPONIVEL)
 d_min = pd.to_datetime(df_dates['min'][0])
 d_max = pd.to_datetime(df_dates['max'][0])
 
@@ -44,46 +45,39 @@ sel_data = st.sidebar.date_input(
     max_value=d_max
 )
 
-# 5. BUSCAR CIDADES PARA O FILTRO
-cidades_db = pd.read_sql("SELECT DISTINCT localidade FROM clientes WHERE localidade IS NOT NULL", conn)
-opcoes_cidades = cidades_db['localidade'].tolist()
+# 4. BUSCAR CIDADES PARA O FILTRO (id da dimensão 'localidades' -> rótulo)
+cidades_db = ler_sql(conn, SQL_OPCOES_FILTRO)
+rotulos_cidades = dict(zip(cidades_db['id'].tolist(), cidades_db['localidade']))
 
 sel_cidade = st.sidebar.multiselect(
     "Cidades/Estados", 
-    options=opcoes_cidades, 
-    default=opcoes_cidades
+    options=list(rotulos_cidades), 
+    default=list(rotulos_cidades),
+    format_func=rotulos_cidades.get
 )
 
 # --- PROCESSAMENTO DOS DADOS ---
 if len(sel_data) == 2 and len(sel_cidade) > 0:
     dt_inicio, dt_fim = sel_data[0].strftime('%Y-%m-%d'), sel_data[1].strftime('%Y-%m-%d')
-    cidades_str = "('" + "','".join(sel_cidade) + "')"
-    
-    query_master = f"""
-    SELECT 
-        p.data, p.id as pedido_id, c.nome as cliente, c.localidade,
-        pr.nome as produto, pr.preco, ip.quantidade,
-        (ip.quantidade * pr.preco) as total_item
-    FROM pedidos p
-    JOIN clientes c ON p.cliente_id = c.id
-    JOIN itens_pedido ip ON p.id = ip.pedido_id
-    JOIN produtos pr ON ip.produto_id = pr.id
-    WHERE p.data BETWEEN '{dt_inicio}' AND '{dt_fim}'
-    AND c.localidade IN {cidades_str}
-    """
-    df_master = pd.read_sql(query_master, conn)
+    # Detalhe compacto (categorias, inteiros reduzidos, datas nativas) com só as
+    # colunas usadas abaixo; compartilhado entre sessões até a próxima escrita
+    with desempenho.medir("Detalhe") as medida:
+        df_master = carregar_detalhe(conn, dt_inicio, dt_fim, sel_cidade, [
+            'data', 'pedido_id', 'cliente', 'localidade', 'lat', 'lon', 'produto', 'quantidade', 'total_item'])
+        medida["linhas"] = len(df_master)
 
     # --- LAYOUT PRINCIPAL ---
     st.title("🚀 BI & Analytics de Vendas")
     st.markdown(f"Exibindo dados de **{dt_inicio}** até **{dt_fim}**")
 
     # KPI Cards
-    m1, m2, m3, m4 = st.columns(4)
-    faturamento_total = df_master['total_item'].sum()
-    m1.metric("Faturamento Total", f"R$ {faturamento_total:,.2f}")
-    m2.metric("Qtd Pedidos", df_master['pedido_id'].nunique())
-    m3.metric("Ticket Médio", f"R$ {(faturamento_total/df_master['pedido_id'].nunique() if faturamento_total > 0 else 0):,.2f}")
-    m4.metric("Qtd Itens Vendidos", df_master['quantidade'].sum())
+    with desempenho.medir("KPIs", "transformação"):
+        m1, m2, m3, m4 = st.columns(4)
+        faturamento_total = df_master['total_item'].sum()
+        m1.metric("Faturamento Total", f"R$ {faturamento_total:,.2f}")
+        m2.metric("Qtd Pedidos", df_master['pedido_id'].nunique())
+        m3.metric("Ticket Médio", f"R$ {(faturamento_total/df_master['pedido_id'].nunique() if faturamento_total > 0 else 0):,.2f}")
+        m4.metric("Qtd Itens Vendidos", df_master['quantidade'].sum())
 
     st.divider()
 
@@ -92,15 +86,20 @@ if len(sel_data) == 2 and len(sel_cidade) > 0:
 
     with col_esq:
         st.subheader("📈 Tendência de Faturamento")
-        df_vendas_dia = df_master.groupby('data')['total_item'].sum()
-        st.area_chart(df_vendas_dia)
+        with desempenho.medir("Tendência", "transformação") as medida:
+            df_vendas_dia = df_master.groupby('data')['total_item'].sum()
+            medida["linhas"] = len(df_vendas_dia)
+        with desempenho.medir("gráfico: tendência", "gráfico"):
+            st.area_chart(df_vendas_dia)
 
     with col_dir:
         st.subheader("📍 Distribuição Geográfica")
-        df_mapa = df_master.groupby('localidade').size().reset_index(name='vendas')
-        df_mapa['lat'] = df_mapa['localidade'].map(lambda x: coords.get(x, [0,0])[0])
-        df_mapa['lon'] = df_mapa['localidade'].map(lambda x: coords.get(x, [0,0])[1])
-        st.map(df_mapa)
+        # Coordenadas vêm da dimensão; cidades sem lat/lon ficam fora do mapa
+        with desempenho.medir("Mapa", "transformação") as medida:
+            df_mapa = df_master.groupby(['localidade', 'lat', 'lon'], observed=True).size().reset_index(name='vendas')
+            medida["linhas"] = len(df_mapa)
+        with desempenho.medir("gráfico: mapa", "gráfico"):
+            st.map(df_mapa)
 
     st.divider()
 
@@ -108,18 +107,53 @@ if len(sel_data) == 2 and len(sel_cidade) > 0:
     c1, c2 = st.columns(2)
     with c1:
         st.subheader("🏆 Melhores Clientes")
-        top_clientes = df_master.groupby('cliente')['total_item'].sum().sort_values(ascending=False).head(10)
-        st.bar_chart(top_clientes, horizontal=True)
+        # Ranking mantido no checkout quando o filtro coincide com um período/UF guardado
+        with desempenho.medir("Melhores Clientes"):
+            df_clientes = top_clientes(conn, dt_inicio, dt_fim, sel_cidade, 10)
+        with desempenho.medir("gráfico: clientes", "gráfico"):
+            st.bar_chart(df_clientes.set_index('cliente')['total_item'], horizontal=True)
 
     with c2:
         st.subheader("📦 Produtos em Destaque")
-        st.dataframe(df_master.groupby('produto')['quantidade'].sum().sort_values(ascending=False), use_container_width=True)
+        with desempenho.medir("Produtos em Destaque", "transformação") as medida:
+            df_produtos = df_master.groupby('produto', observed=True)['quantidade'].sum().sort_values(ascending=False)
+            medida["linhas"] = len(df_produtos)
+        st.dataframe(df_produtos, use_container_width=True)
 
-    # Exportar
-    csv = df_master.to_csv(index=False).encode('utf-8')
-    st.download_button("📥 Baixar Dados (CSV)", csv, f"vendas_{dt_inicio}.csv", "text/csv")
+    # Exportar: gerado só quando pedido, do cursor direto para o arquivo da sessão (exportar.py)
+    st.divider()
+    col_fmt, col_acao = st.columns([1, 2])
+    formato = col_fmt.selectbox("Formato de exportação", list(FORMATOS))
+    pedido_exportacao = (dt_inicio, dt_fim, tuple(sel_cidade), formato)
+    exportacao = st.session_state.get('exportacao')
+
+    if col_acao.button("📦 Preparar Exportação"):
+        # Um arquivo por sessão: a nova exportação sobrescreve a anterior
+        st.session_state.pop('exportacao', None)
+        caminho = arquivo_exportacao(st.session_state.setdefault('id_sessao', uuid.uuid4().hex))
+        with st.spinner("Exportando..."), open(caminho, 'wb') as destino, \
+                desempenho.medir("Exportação") as medida:
+            linhas = medida["linhas"] = exportar_detalhe(conn, dt_inicio, dt_fim, sel_cidade, [
+                'data', 'pedido_id', 'cliente', 'localidade', 'produto', 'preco', 'quantidade', 'total_item'],
+                destino, formato)
+        exportacao = st.session_state['exportacao'] = {
+            'pedido': pedido_exportacao, 'caminho': caminho, 'linhas': linhas}
+
+    # Arquivo pronto só vale para os filtros com que foi gerado
+    if exportacao and exportacao['pedido'] == pedido_exportacao:
+        try:
+            with open(exportacao['caminho'], 'rb') as arquivo:
+                col_acao.download_button(f"📥 Baixar Dados ({exportacao['linhas']:,} linhas)", arquivo,
+                                         f"vendas_{dt_inicio}_{dt_fim}.{formato}", FORMATOS[formato])
+            # Em uso: a varredura dos arquivos abandonados conta a partir daqui
+            os.utime(exportacao['caminho'])
+        except FileNotFoundError:
+            # Apagado pela varredura (ou pela limpeza do sistema): precisa ser preparado de novo
+            st.session_state.pop('exportacao', None)
+            col_acao.caption("A exportação expirou; prepare de novo.")
 
 else:
     st.warning("Selecione um período válido e ao menos uma cidade.")
 
-conn.close()
\ No newline at end of file
+if medindo:
+    desempenho.exibir(st.sidebar.container(), coletor, CAMINHO_DB)
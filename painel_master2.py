@@ -1,16 +1,19 @@
 """
 Analytics & AI (Machine Learning):
-Painel com integração de modelos preditivos (Scikit-Learn) para tendência de 
-faturamento e análise de participação por estado com gráficos Plotly.
+Painel com previsão de faturamento (previsao.py: tendência + sazonalidade
+semanal, total e por estado) e análise de participação por estado com gráficos
+Plotly.
 """
 
 import streamlit as st
 import pandas as pd
-import sqlite3
+import desempenho
+from banco import CAMINHO_DB, conectar
+from localidades import SQL_OPCOES_FILTRO
+from particoes import SQL_PERIODO_DISPONIVEL
+from detalhe import carregar_detalhe
 import plotly.express as px
-from sklearn.linear_model import LinearRegression
-import numpy as np
-from datetime import datetime  # <-- Adicione esta linha se não tiver
+import previsao
 
 st.set_page_config(page_title="Analytics & AI 2026", layout="wide")
 
@@ -19,32 +22,32 @@ def format_brl(valor):
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 def get_connection():
-    return sqlite3.connect("vendas.db")
+    # Conexão compartilhada da thread (pool em banco.py); não deve ser fechada
+    return conectar()
 
 conn = get_connection()
 
 # --- FILTROS LATERAIS ---
 st.sidebar.title("Configurações")
-df_dates = pd.read_sql("SELECT MIN(data) as min, MAX(data) as max FROM pedidos", conn)
+# Ligado, consultas, transformações e gráficos desta execução são cronometrados (desempenho.py)
+medindo = st.sidebar.toggle("⏱️ Medir desempenho", key="medir_desempenho")
+coletor = desempenho.iniciar(medindo)
+
+with desempenho.medir("Filtros"):
+    df_dates = pd.read_sql(SQL_PERIODO_DISPONIVEL, conn)
+    cidades_db = pd.read_sql(SQL_OPCOES_FILTRO, conn)
 sel_data = st.sidebar.date_input("Período", [pd.to_datetime(df_dates['min'][0]), pd.to_datetime(df_dates['max'][0])])
 
-cidades_db = pd.read_sql("SELECT DISTINCT localidade FROM clientes WHERE localidade IS NOT NULL", conn)
-sel_cidade = st.sidebar.multiselect("Localidades", options=cidades_db['localidade'].tolist(), default=cidades_db['localidade'].tolist())
+rotulos_cidades = dict(zip(cidades_db['id'].tolist(), cidades_db['localidade']))
+sel_cidade = st.sidebar.multiselect("Localidades", options=list(rotulos_cidades), default=list(rotulos_cidades),
+                                    format_func=rotulos_cidades.get)
 
 if len(sel_data) == 2 and sel_cidade:
     dt_inicio, dt_fim = sel_data[0].strftime('%Y-%m-%d'), sel_data[1].strftime('%Y-%m-%d')
-    cidades_str = "('" + "','".join(sel_cidade) + "')"
-    
-    query = f"""
-    SELECT p.data, c.localidade, pr.nome as produto, (ip.quantidade * pr.preco) as total_item
-    FROM pedidos p
-    JOIN clientes c ON p.cliente_id = c.id
-    JOIN itens_pedido ip ON p.id = ip.pedido_id
-    JOIN produtos pr ON ip.produto_id = pr.id
-    WHERE p.data BETWEEN '{dt_inicio}' AND '{dt_fim}' AND c.localidade IN {cidades_str}
-    """
-    df = pd.read_sql(query, conn)
-    df['data'] = pd.to_datetime(df['data'])
+    # Só as colunas dos gráficos, já compactas e com 'data' em datetime64
+    with desempenho.medir("Detalhe") as medida:
+        df = carregar_detalhe(conn, dt_inicio, dt_fim, sel_cidade, ['data', 'uf', 'produto', 'total_item'])
+        medida["linhas"] = len(df)
 
     # --- MÉTRICAS KPI ---
     st.title("🚀 Inteligência de Vendas & Predição")
@@ -55,25 +58,29 @@ if len(sel_data) == 2 and sel_cidade:
 
     with col1:
         st.subheader("📊 Faturamento")
-        df_fat_diario = df.groupby('data')['total_item'].sum().reset_index()
+        with desempenho.medir("Faturamento", "transformação") as medida:
+            df_fat_diario = df.groupby('data')['total_item'].sum().reset_index()
+            medida["linhas"] = len(df_fat_diario)
         # Gráfico de linha sem preenchimento usando Plotly
-        fig_linha = px.line(df_fat_diario, x='data', y='total_item', render_mode='svg')
-        st.plotly_chart(fig_linha, use_container_width=True)
+        with desempenho.medir("gráfico: faturamento", "gráfico"):
+            fig_linha = px.line(df_fat_diario, x='data', y='total_item', render_mode='svg')
+            st.plotly_chart(fig_linha, use_container_width=True)
 
     with col2:
         st.subheader("🍕 Participação por Estado")
-        # Extrair UF da string "Cidade - UF"
-        df['uf'] = df['localidade'].str.split(' - ').str[-1]
-        fig_pizza = px.pie(df, values='total_item', names='uf', hole=0.3)
-        st.plotly_chart(fig_pizza, use_container_width=True)
+        with desempenho.medir("gráfico: participação", "gráfico"):
+            fig_pizza = px.pie(df, values='total_item', names='uf', hole=0.3)
+            st.plotly_chart(fig_pizza, use_container_width=True)
 
     st.divider()
 
     # --- TOP 3 PRODUTOS POR ESTADO ---
     st.subheader("🏆 Top 3 Produtos em Valor por Estado")
-    df_uf_prod = df.groupby(['uf', 'produto'])['total_item'].sum().reset_index()
-    df_uf_prod = df_uf_prod.sort_values(['uf', 'total_item'], ascending=[True, False])
-    top_3_uf = df_uf_prod.groupby('uf').head(3)
+    with desempenho.medir("Top 3 Produtos por Estado", "transformação") as medida:
+        df_uf_prod = df.groupby(['uf', 'produto'], observed=True)['total_item'].sum().reset_index()
+        df_uf_prod = df_uf_prod.sort_values(['uf', 'total_item'], ascending=[True, False])
+        top_3_uf = df_uf_prod.groupby('uf', observed=True).head(3)
+        medida["linhas"] = len(top_3_uf)
     
     # Aplicando formatação brasileira na tabela
     top_3_uf['total_item'] = top_3_uf['total_item'].apply(format_brl)
@@ -81,24 +88,17 @@ if len(sel_data) == 2 and sel_cidade:
 
     st.divider()
 
-    # --- PREDICÇÃO COM SCIKIT-LEARN ---
+    # --- PREVISÃO (todas as séries num único ajuste, ver previsao.py) ---
     st.subheader("🤖 Previsão de Tendência (Machine Learning)")
     
-    # Preparando dados para Regressão Linear
-    df_ml = df.groupby('data')['total_item'].sum().reset_index()
-    df_ml['data_ordinal'] = df_ml['data'].map(datetime.toordinal)
-    
-    X = df_ml[['data_ordinal']].values
-    y = df_ml['total_item'].values
-    
-    modelo = LinearRegression()
-    modelo.fit(X, y)
-    
-    # Prever próximos 7 dias
-    futuro = np.array([df_ml['data_ordinal'].max() + i for i in range(1, 8)]).reshape(-1, 1)
-    previsao = modelo.predict(futuro)
-    
-    st.write(f"A tendência para a próxima semana é de um faturamento médio diário de: **{format_brl(previsao.mean())}**")
-    st.caption("Nota: Este é um modelo de regressão linear simples baseado no histórico filtrado.")
-
-conn.close()
\ No newline at end of file
+    with desempenho.medir("Previsão"):
+        df_prev = previsao.prever(conn, "total", dt_inicio, dt_fim, sel_cidade)
+    if not df_prev.empty:
+        st.write(f"A tendência para a próxima semana é de um faturamento médio diário de: **{format_brl(df_prev['previsao'].mean())}**")
+        with desempenho.medir("Previsão por Estado"):
+            prev_uf = previsao.previsao_por_serie(conn, "uf", dt_inicio, dt_fim, sel_cidade).apply(format_brl)
+        st.table(prev_uf.rename_axis('uf').reset_index(name='previsão 7 dias'))
+    st.caption("Nota: Regressão linear com tendência e sazonalidade por dia da semana, ajustada sobre o histórico filtrado.")
+
+if medindo:
+    desempenho.exibir(st.sidebar.container(), coletor, CAMINHO_DB)
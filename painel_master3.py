@@ -1,151 +1,248 @@
+import io
 import streamlit as st
 import pandas as pd
-import sqlite3
+from cache_consultas import ler_sql
+import agregados
+import carga_paralela
+import curva_abc
+import desempenho
+from banco import CAMINHO_DB
+from exportar import FORMATOS, exportar_curva_abc
+from localidades import SQL_OPCOES_FILTRO
+from particoes import SQL_PERIODO_DISPONIVEL
 import plotly.express as px
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from datetime import datetime
+import previsao
 
 # 1. Configurações da Página
 st.set_page_config(page_title="Analytics AI & Curva ABC", layout="wide", page_icon="📈")
 
+# Valores iniciais dos controles das seções
+QTD_UFS, QTD_PRODUTOS = 3, 3
+LIMITE_CLIENTES = 10
+ROTULOS_GRUPOS_ABC = {"uf": "Estado", "mes": "Mês", "cliente": "Cliente"}
+
 # Função para formatar moeda no padrão BR
 def format_brl(valor):
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-def get_connection():
-    return sqlite3.connect("vendas.db")
+def demanda_por_produto(conn, dt_inicio, dt_fim, localidades, horizonte):
+    # Top 15 da previsão por produto, já com os nomes (uma tarefa só: os nomes dependem do top)
+    demanda = previsao.previsao_por_serie(conn, "produto", dt_inicio, dt_fim, localidades, horizonte).head(15)
+    if demanda.empty:
+        return demanda
+    nomes = ler_sql(conn, f"SELECT id, nome FROM produtos WHERE id IN ({', '.join('?' * len(demanda))})",
+                    params=[int(i) for i in demanda.index])
+    return demanda.rename(dict(zip(nomes['id'], nomes['nome'])))
+
+def arquivo_curva_abc(conn, dt_inicio, dt_fim, localidades, por, cortes, formato):
+    # A curva por grupos já chega agregada: o arquivo é montado em memória
+    destino = io.BytesIO()
+    linhas = exportar_curva_abc(conn, dt_inicio, dt_fim, localidades, por, destino, formato, cortes)
+    return destino.getvalue(), linhas
+
+def obter(funcao, *args):
+    # Leitura numa conexão do pool (carga_paralela.py); resultado vindo do cache quando já lido
+    return carga_paralela.enviar(funcao, *args).result()
+
+def medicoes():
+    # Medições da última execução completa; um fragmento reexecutado continua registrando nelas
+    return st.session_state.get("medicoes")
+
+# ==========================================
+# SEÇÕES
+# ==========================================
+# Cada seção recebe o filtro (período e localidades) de forma explícita. As que têm
+# controles próprios são fragmentos: mexer num controle reexecuta só aquela seção.
+@desempenho.medido("KPIs")
+def secao_kpis(filtro):
+    m1, m2, m3, m4 = st.columns(4)
+    kpis = obter(agregados.kpis, *filtro)
+    m1.metric("Faturamento Total", format_brl(kpis['faturamento']))
+    m2.metric("Qtd Pedidos", kpis['pedidos'])
+    m3.metric("Ticket Médio", format_brl(kpis['ticket_medio']))
+    m4.metric("Itens Vendidos", kpis['itens'])
+
+@st.fragment
+@desempenho.medido("Faturamento", origem=medicoes)
+def secao_faturamento(filtro):
+    st.subheader("📈 Faturamento")
+    agrupamento = st.radio("Agrupar por", ["Dia", "Semana", "Mês"], horizontal=True, key="agrupamento_faturamento")
+    df_diario = obter(agregados.serie_diaria, *filtro)
+    if agrupamento != "Dia":
+        # Reagrupa a série já carregada, sem nova consulta
+        regra = "W-MON" if agrupamento == "Semana" else "MS"
+        with desempenho.medir("faturamento: reagrupamento", "transformação"):
+            df_diario = df_diario.resample(regra, on='data', label='left', closed='left')['total_item'].sum().reset_index()
+    with desempenho.medir("gráfico: faturamento", "gráfico"):
+        fig_line = px.line(df_diario, x='data', y='total_item', markers=True)
+        fig_line.update_traces(line_color='#00d1b2')
+        st.plotly_chart(fig_line, use_container_width=True)
 
-# Coordenadas para o Mapa
-coords = {
-    "São Paulo - SP": [-23.55, -46.63], "Rio de Janeiro - RJ": [-22.90, -43.17],
-    "Belo Horizonte - MG": [-19.91, -43.93], "Curitiba - PR": [-25.42, -49.27],
-    "Porto Alegre - RS": [-30.03, -51.21], "Salvador - BA": [-12.97, -38.50],
-    "Fortaleza - CE": [-3.71, -38.54], "Brasília - DF": [-15.78, -47.92],
-    "Manaus - AM": [-3.11, -60.02], "Recife - PE": [-8.05, -34.88],
-    "Goiânia - GO": [-16.68, -49.25], "Belém - PA": [-1.45, -48.50],
-    "Florianópolis - SC": [-27.59, -48.54], "Vitória - ES": [-20.31, -40.31],
-    "Natal - RN": [-5.79, -35.20]
-}
+@desempenho.medido("Participação por Estado")
+def secao_participacao_uf(filtro):
+    st.subheader("🍕 Participação por Estado")
+    df_uf = obter(agregados.participacao_uf, *filtro)
+    with desempenho.medir("gráfico: participação", "gráfico"):
+        fig_pizza = px.pie(df_uf, values='total_item', names='uf', hole=0.4)
+        st.plotly_chart(fig_pizza, use_container_width=True)
 
-conn = get_connection()
+@desempenho.medido("Mapa")
+def secao_mapa(filtro):
+    st.subheader("📍 Distribuição Geográfica")
+    # lat/lon vêm da dimensão 'localidades'; cidades sem coordenadas ficam fora do mapa
+    df_mapa = obter(agregados.vendas_por_localidade, *filtro).dropna(subset=['lat', 'lon'])
+    with desempenho.medir("gráfico: mapa", "gráfico"):
+        st.map(df_mapa)
+
+@st.fragment
+@desempenho.medido("Top Produtos por Estado", origem=medicoes)
+def secao_top_produtos_uf(filtro):
+    col_ufs, col_produtos = st.columns(2)
+    qtd_ufs = col_ufs.number_input("Estados", min_value=1, max_value=27, value=QTD_UFS, key="top_qtd_ufs")
+    qtd_produtos = col_produtos.number_input("Produtos por estado", min_value=1, max_value=20,
+                                             value=QTD_PRODUTOS, key="top_qtd_produtos")
+    st.subheader(f"🏆 Top {qtd_produtos} Produtos por Valor (Top {qtd_ufs} Estados)")
+    resumo_formatado = obter(agregados.top_produtos_por_uf, *filtro, qtd_ufs, qtd_produtos)
+    resumo_formatado['total_item'] = resumo_formatado['total_item'].apply(format_brl)
+    st.table(resumo_formatado)
+
+@st.fragment
+@desempenho.medido("Melhores Clientes", origem=medicoes)
+def secao_clientes(filtro):
+    st.subheader("👤 Melhores Clientes")
+    limite = st.slider("Quantidade de clientes", min_value=5, max_value=50, value=LIMITE_CLIENTES,
+                       key="limite_clientes")
+    df_clientes = obter(agregados.top_clientes, *filtro, limite)
+    with desempenho.medir("gráfico: clientes", "gráfico"):
+        fig_cli = px.bar(df_clientes, x='total_item', y='cliente', orientation='h', text_auto=True)
+        fig_cli.update_layout(yaxis={'categoryorder':'total ascending'})
+        st.plotly_chart(fig_cli, use_container_width=True)
+
+@st.fragment
+@desempenho.medido("Curva ABC", origem=medicoes)
+def secao_abc(filtro):
+    st.subheader("📊 Produtos em Destaque (Curva ABC)")
+    # Seção pesada: só consulta quando o analista liga o carregamento
+    if not st.toggle("Carregar Curva ABC", key="carregar_abc"):
+        st.caption("Ligue para calcular a curva com o filtro atual.")
+        return
+    cortes = st.slider("Cortes das classes A e B (% do faturamento acumulado)", min_value=50, max_value=99,
+                       value=curva_abc.CORTES, key="cortes_abc")
+    # Classificação vetorizada (curva_abc.py) com os cortes escolhidos
+    df_abc = obter(agregados.curva_abc, *filtro, cortes)
+    with desempenho.medir("gráfico: curva ABC", "gráfico"):
+        fig_abc = px.bar(df_abc, x='produto', y='total_item', color='Categoria',
+                         title="Distribuição ABC por Faturamento",
+                         color_discrete_map={'Classe A (Altamente Lucrativo)': '#1f77b4', 
+                                             'Classe B (Intermediário)': '#ff7f0e', 
+                                             'Classe C (Baixo Impacto)': '#2ca02c'})
+        st.plotly_chart(fig_abc, use_container_width=True)
+
+    # Exportar: a mesma classificação, por Estado, mês e/ou cliente numa passada só
+    col_por, col_fmt, col_acao = st.columns([2, 1, 1])
+    por = tuple(col_por.multiselect("Classificar por", list(curva_abc.GRUPOS),
+                                    format_func=ROTULOS_GRUPOS_ABC.get, key="grupos_abc"))
+    formato = col_fmt.selectbox("Formato", list(FORMATOS), key="formato_abc")
+    pedido_exportacao = (filtro, por, cortes, formato)
+    if col_acao.button("📦 Preparar Exportação", key="preparar_abc"):
+        with st.spinner("Classificando..."):
+            dados, linhas = obter(arquivo_curva_abc, *filtro, por, cortes, formato)
+        st.session_state['exportacao_abc'] = {'pedido': pedido_exportacao, 'dados': dados, 'linhas': linhas}
+
+    # Arquivo pronto só vale para os filtros e cortes com que foi gerado
+    exportacao = st.session_state.get('exportacao_abc')
+    if exportacao and exportacao['pedido'] == pedido_exportacao:
+        col_acao.download_button(f"📥 Baixar Curva ({exportacao['linhas']:,} linhas)", exportacao['dados'],
+                                 f"curva_abc_{filtro[0]}_{filtro[1]}.{formato}", FORMATOS[formato])
+
+@st.fragment
+@desempenho.medido("Previsão", origem=medicoes)
+def secao_previsao(filtro):
+    st.subheader("🤖 Tendência de Vendas")
+    if not st.toggle("Carregar previsão", key="carregar_previsao"):
+        st.caption("Ligue para ajustar a previsão com o filtro atual.")
+        return
+    horizonte = st.slider("Dias à frente", min_value=7, max_value=30, value=previsao.HORIZONTE, key="horizonte")
+    # Tendência + sazonalidade semanal; coeficientes reaproveitados até a próxima venda
+    futuros = carga_paralela.enviar_todas({"total": (previsao.prever, "total", *filtro, horizonte),
+                                           "demanda": (demanda_por_produto, *filtro, horizonte)})
+    df_prev = futuros["total"].result()
+    if not df_prev.empty:
+        st.write(f"🔮 Previsão média diária para os próximos {horizonte} dias: "
+                 f"**{format_brl(df_prev['previsao'].mean())}**")
+
+        # Demanda por produto: milhares de séries no mesmo ajuste em lote
+        st.subheader(f"📦 Demanda Prevista por Produto ({horizonte} dias)")
+        demanda = futuros["demanda"].result()
+        with desempenho.medir("gráfico: demanda", "gráfico"):
+            st.bar_chart(demanda.rename('unidades'), horizontal=True)
+
+# --- DESEMPENHO ---
+# Ligado, cada seção, consulta, cálculo e gráfico desta execução é cronometrado (desempenho.py)
+medindo = st.sidebar.toggle("⏱️ Medir desempenho", key="medir_desempenho")
+st.session_state["medicoes"] = coletor = desempenho.iniciar(medindo)
 
 # --- SIDEBAR FILTROS ---
 st.sidebar.header("⚙️ Configurações de Filtro")
-df_dates = pd.read_sql("SELECT MIN(data) as min, MAX(data) as max FROM pedidos", conn)
+# Consultas independentes rodam ao mesmo tempo em conexões de leitura (carga_paralela.py)
+with desempenho.medir("Filtros"):
+    opcoes = carga_paralela.carregar({"datas": (ler_sql, SQL_PERIODO_DISPONIVEL),
+                                      "cidades": (ler_sql, SQL_OPCOES_FILTRO)})
+df_dates = opcoes["datas"]
 sel_data = st.sidebar.date_input("Período", [pd.to_datetime(df_dates['min'][0]), pd.to_datetime(df_dates['max'][0])])
 
-cidades_db = pd.read_sql("SELECT DISTINCT localidade FROM clientes WHERE localidade IS NOT NULL", conn)
-sel_cidade = st.sidebar.multiselect("Localidades", options=cidades_db['localidade'].tolist(), default=cidades_db['localidade'].tolist())
+cidades_db = opcoes["cidades"]
+rotulos_cidades = dict(zip(cidades_db['id'].tolist(), cidades_db['localidade']))
+sel_cidade = st.sidebar.multiselect("Localidades", options=list(rotulos_cidades), default=list(rotulos_cidades),
+                                    format_func=rotulos_cidades.get)
 
 if len(sel_data) == 2 and sel_cidade:
     dt_inicio, dt_fim = sel_data[0].strftime('%Y-%m-%d'), sel_data[1].strftime('%Y-%m-%d')
-    cidades_str = "('" + "','".join(sel_cidade) + "')"
-    
-    # Query Principal
-    query = f"""
-    SELECT p.data, p.id as pedido_id, c.nome as cliente, c.localidade, 
-           pr.nome as produto, (ip.quantidade * pr.preco) as total_item, ip.quantidade
-    FROM pedidos p
-    JOIN clientes c ON p.cliente_id = c.id
-    JOIN itens_pedido ip ON p.id = ip.pedido_id
-    JOIN produtos pr ON ip.produto_id = pr.id
-    WHERE p.data BETWEEN '{dt_inicio}' AND '{dt_fim}' AND c.localidade IN {cidades_str}
-    """
-    df = pd.read_sql(query, conn)
-    df['data'] = pd.to_datetime(df['data'])
-    df['uf'] = df['localidade'].str.split(' - ').str[-1]
+    filtro = (dt_inicio, dt_fim, sel_cidade)
+    # Mudou o filtro: as seções leves são lidas já em paralelo (aquecem o cache) e cada
+    # uma é desenhada assim que o seu resultado chega. ABC e previsão ficam para quando ligadas
+    with desempenho.medir("Pré-carga"):
+        carga_paralela.enviar_todas({
+            "kpis": (agregados.kpis, *filtro),
+            "diario": (agregados.serie_diaria, *filtro),
+            "uf": (agregados.participacao_uf, *filtro),
+            "mapa": (agregados.vendas_por_localidade, *filtro),
+            "top_uf": (agregados.top_produtos_por_uf, *filtro,
+                       st.session_state.get("top_qtd_ufs", QTD_UFS), st.session_state.get("top_qtd_produtos", QTD_PRODUTOS)),
+            "clientes": (agregados.top_clientes, *filtro, st.session_state.get("limite_clientes", LIMITE_CLIENTES)),
+        })
 
     # --- CABEÇALHO ---
     st.title("🚀 Inteligência Analítica de Vendas")
     st.info(f"📍 Exibindo dados de **{dt_inicio}** até **{dt_fim}**")
 
     # KPIs
-    m1, m2, m3, m4 = st.columns(4)
-    total_faturamento = df['total_item'].sum()
-    qtd_pedidos = df['pedido_id'].nunique()
-    
-    m1.metric("Faturamento Total", format_brl(total_faturamento))
-    m2.metric("Qtd Pedidos", qtd_pedidos)
-    m3.metric("Ticket Médio", format_brl(total_faturamento / qtd_pedidos if qtd_pedidos > 0 else 0))
-    m4.metric("Itens Vendidos", int(df['quantidade'].sum()))
-
+    secao_kpis(filtro)
     st.divider()
 
     # --- GRÁFICOS DE LINHA E PIZZA ---
     c_line, c_pie = st.columns([2, 1])
     with c_line:
-        st.subheader("📈 Faturamento")
-        df_diario = df.groupby('data')['total_item'].sum().reset_index()
-        fig_line = px.line(df_diario, x='data', y='total_item', markers=True)
-        fig_line.update_traces(line_color='#00d1b2')
-        st.plotly_chart(fig_line, use_container_width=True)
-
+        secao_faturamento(filtro)
     with c_pie:
-        st.subheader("🍕 Participação por Estado")
-        fig_pizza = px.pie(df, values='total_item', names='uf', hole=0.4)
-        st.plotly_chart(fig_pizza, use_container_width=True)
+        secao_participacao_uf(filtro)
 
     # --- GEOLOCALIZAÇÃO ---
-    st.subheader("📍 Distribuição Geográfica")
-    df_mapa = df.groupby('localidade').size().reset_index(name='vendas')
-    df_mapa['lat'] = df_mapa['localidade'].map(lambda x: coords.get(x, [0,0])[0])
-    df_mapa['lon'] = df_mapa['localidade'].map(lambda x: coords.get(x, [0,0])[1])
-    st.map(df_mapa)
-
+    secao_mapa(filtro)
     st.divider()
 
-    # --- TOP 3 PRODUTOS NOS 3 MELHORES ESTADOS ---
-    st.subheader("🏆 Top 3 Produtos por Valor (Top 3 Estados)")
-    top_3_ufs = df.groupby('uf')['total_item'].sum().nlargest(3).index.tolist()
-    df_top_ufs = df[df['uf'].isin(top_3_ufs)]
-    
-    resumo_top_prod = df_top_ufs.groupby(['uf', 'produto'])['total_item'].sum().reset_index()
-    resumo_top_prod = resumo_top_prod.sort_values(['uf', 'total_item'], ascending=[True, False])
-    resumo_formatado = resumo_top_prod.groupby('uf').head(3)
-    resumo_formatado['total_item'] = resumo_formatado['total_item'].apply(format_brl)
-    st.table(resumo_formatado)
+    # --- TOP PRODUTOS NOS MELHORES ESTADOS ---
+    secao_top_produtos_uf(filtro)
 
     # --- MELHORES CLIENTES ---
-    st.subheader("👤 Melhores Clientes")
-    df_clientes = df.groupby('cliente')['total_item'].sum().sort_values(ascending=False).head(10).reset_index()
-    fig_cli = px.bar(df_clientes, x='total_item', y='cliente', orientation='h', text_auto=True)
-    fig_cli.update_layout(yaxis={'categoryorder':'total ascending'})
-    st.plotly_chart(fig_cli, use_container_width=True)
+    secao_clientes(filtro)
 
     # --- CURVA ABC ---
-    st.subheader("📊 Produtos em Destaque (Curva ABC)")
-    df_abc = df.groupby('produto')['total_item'].sum().sort_values(ascending=False).reset_index()
-    df_abc['perc_total'] = (df_abc['total_item'] / total_faturamento) * 100
-    df_abc['perc_acumulado'] = df_abc['perc_total'].cumsum()
-
-    def categorizar_abc(perc):
-        if perc <= 80: return 'Classe A (Altamente Lucrativo)'
-        elif perc <= 95: return 'Classe B (Intermediário)'
-        else: return 'Classe C (Baixo Impacto)'
-
-    df_abc['Categoria'] = df_abc['perc_acumulado'].apply(categorizar_abc)
-    
-    fig_abc = px.bar(df_abc, x='produto', y='total_item', color='Categoria',
-                     title="Distribuição ABC por Faturamento",
-                     color_discrete_map={'Classe A (Altamente Lucrativo)': '#1f77b4', 
-                                         'Classe B (Intermediário)': '#ff7f0e', 
-                                         'Classe C (Baixo Impacto)': '#2ca02c'})
-    st.plotly_chart(fig_abc, use_container_width=True)
+    secao_abc(filtro)
 
     # --- MACHINE LEARNING (PREDIÇÃO) ---
     st.divider()
-    st.subheader("🤖 Tendência para a Próxima Semana")
-    
-    df_ml = df_diario.copy()
-    df_ml['data_ordinal'] = df_ml['data'].map(datetime.toordinal)
-    X = df_ml[['data_ordinal']].values
-    y = df_ml['total_item'].values
-    
-    if len(X) > 1:
-        modelo = LinearRegression().fit(X, y)
-        futuro = np.array([df_ml['data_ordinal'].max() + i for i in range(1, 8)]).reshape(-1, 1)
-        previsao = modelo.predict(futuro)
-        st.write(f"🔮 Previsão média diária para os próximos 7 dias: **{format_brl(previsao.mean())}**")
-    
-conn.close()
\ No newline at end of file
+    secao_previsao(filtro)
+
+if medindo:
+    desempenho.exibir(st.sidebar.container(), coletor, CAMINHO_DB)
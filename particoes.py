@@ -0,0 +1,419 @@
+"""
+Partições do Histórico de Vendas (arquivos SQLite anexados):
+O arquivo principal ('vendas.db') fica só com as vendas do período em aberto.
+Os períodos fechados de 'pedidos', 'itens_pedido' e 'fato_vendas' são movidos
+para arquivos próprios em PASTA_PARTICOES (ao lado do banco) e registrados na
+tabela 'particoes' (migração 10). O checkout grava num arquivo pequeno e os
+painéis continuam enxergando o histórico inteiro.
+
+PERÍODOS:
+- PARTICAO (variável VENDAS_PARTICAO): menor período arquivado, 'mes'
+  (padrão), 'trimestre' ou 'ano'.
+- O SQLite anexa no máximo LIMITE_ANEXOS arquivos por conexão. Para que uma
+  consulta do histórico inteiro ainda caiba, os meses de um trimestre já
+  fechado são consolidados num arquivo do trimestre, os trimestres de um ano
+  fechado num arquivo do ano, e os anos anteriores aos ANOS_SEPARADOS mais
+  recentes num único arquivo de histórico (CHAVE_HISTORICO), que só recebe o
+  ano que sai da janela. No máximo: 2 meses + 3 trimestres + ANOS_SEPARADOS
+  anos + o histórico = LIMITE_ANEXOS.
+
+CONSULTAS:
+- preparar(conn, dt_inicio, dt_fim): anexa só as partições que cruzam o
+  período e cria visões temporárias com os nomes das tabelas, unindo o
+  arquivo principal e as partições. As consultas dos painéis não mudam: o
+  SQLite procura primeiro no esquema 'temp'. filtros.montar_filtro chama esta
+  função, então todos os painéis já passam por aqui.
+- Se ainda assim o período cruzar mais partições que LIMITE_ANEXOS (registro
+  de antes do arquivo de histórico), as mais antigas são copiadas para
+  tabelas temporárias da conexão em vez de anexadas: a consulta fica mais
+  lenta, mas não falha. Rodar o arquivamento de novo consolida os anos.
+- Conexão preparada é só para leitura de pedidos/itens/fatos; liberar(conn)
+  desfaz tudo (banco.py chama ao devolver a conexão ao pool).
+- 'resumo_vendas_diario' continua inteiro no arquivo principal.
+
+USO:
+    python particoes.py                             # arquiva os períodos fechados
+    python particoes.py --ate 2025-06-30 --vacuum   # só até junho e compacta o principal
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from fato_vendas import COLUNAS as COLUNAS_FATO, preencher_fatos
+
+PARTICAO = os.environ.get("VENDAS_PARTICAO", "mes")
+PASTA_PARTICOES = os.environ.get("VENDAS_PARTICOES_DIR", "particoes")
+NIVEIS = ("mes", "trimestre", "ano")
+LIMITE_ANEXOS = 10      # SQLITE_MAX_ATTACHED da compilação padrão
+# Anos fechados com arquivo próprio; os anteriores vão para o histórico. Sobram
+# vagas para 2 meses e 3 trimestres do ano corrente e para o próprio histórico
+ANOS_SEPARADOS = LIMITE_ANEXOS - 6
+CHAVE_HISTORICO = "historico"
+
+# tabela -> (colunas, coluna com o id do pedido)
+TABELAS = {
+    "pedidos": ("id, cliente_id, data", "id"),
+    "itens_pedido": ("pedido_id, produto_id, quantidade", "pedido_id"),
+    "fato_vendas": (COLUNAS_FATO, "pedido_id"),
+}
+
+# Estrutura de cada arquivo de partição ('{esquema}' = nome com que foi anexado)
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS {esquema}.pedidos (
+        id INTEGER PRIMARY KEY,
+        cliente_id INTEGER,
+        data DATE
+    )""",
+    """CREATE TABLE IF NOT EXISTS {esquema}.itens_pedido (
+        pedido_id INTEGER,
+        produto_id INTEGER,
+        quantidade INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS {esquema}.fato_vendas (
+        data DATE NOT NULL,
+        pedido_id INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        cliente_id INTEGER,
+        localidade_id INTEGER NOT NULL DEFAULT 0,
+        produto_id INTEGER NOT NULL,
+        preco_unitario REAL NOT NULL,
+        quantidade INTEGER NOT NULL,
+        total_item REAL NOT NULL,
+        PRIMARY KEY (data, pedido_id, item_id)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_pedidos_data ON pedidos (data, cliente_id)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_itens_pedido_pedido ON itens_pedido (pedido_id, produto_id, quantidade)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_fato_vendas_pedido ON fato_vendas (pedido_id)",
+]
+
+SQL_SOBREPOSTAS = """
+SELECT chave, arquivo FROM main.particoes
+WHERE dt_inicio <= :dt_fim AND dt_fim >= :dt_inicio
+ORDER BY dt_inicio
+"""
+
+# Período com vendas considerando o arquivo principal e as partições
+SQL_PERIODO_DISPONIVEL = """
+SELECT MIN(dia) AS min, MAX(dia) AS max FROM (
+    SELECT MIN(data) AS dia FROM main.pedidos
+    UNION ALL SELECT MAX(data) FROM main.pedidos
+    UNION ALL SELECT MIN(primeira_data) FROM main.particoes
+    UNION ALL SELECT MAX(ultima_data) FROM main.particoes
+)
+"""
+
+SQL_ULTIMO_PEDIDO = """
+SELECT MAX(COALESCE((SELECT MAX(id) FROM main.pedidos), 0),
+           COALESCE((SELECT MAX(ultimo_pedido) FROM main.particoes), 0))
+"""
+
+SQL_REGISTRAR = """
+INSERT INTO main.particoes (chave, nivel, arquivo, dt_inicio, dt_fim, primeira_data, ultima_data,
+                            pedidos, ultimo_pedido, arquivado_em)
+SELECT :chave, :nivel, :arquivo, :dt_inicio, :dt_fim, MIN(data), MAX(data), COUNT(*), MAX(id), datetime('now')
+FROM destino.pedidos
+WHERE true
+ON CONFLICT (chave) DO UPDATE SET
+    primeira_data = excluded.primeira_data, ultima_data = excluded.ultima_data,
+    dt_fim = excluded.dt_fim, pedidos = excluded.pedidos, ultimo_pedido = excluded.ultimo_pedido,
+    arquivado_em = excluded.arquivado_em
+"""
+
+# Pedidos do arquivo principal que vão para a partição
+CONDICAO_PRINCIPAL = "data BETWEEN :dt_inicio AND :dt_fim AND data < :corte"
+
+
+# ==========================================
+# PERÍODOS
+# ==========================================
+def periodo(dia, nivel):
+    """(chave, início, fim) do período do 'nivel' que contém 'dia'."""
+    if nivel == "mes":
+        inicio, meses, chave = dia.replace(day=1), 1, f"{dia.year}-{dia.month:02d}"
+    elif nivel == "trimestre":
+        trimestre = (dia.month - 1) // 3
+        inicio, meses, chave = date(dia.year, 3 * trimestre + 1, 1), 3, f"{dia.year}-T{trimestre + 1}"
+    elif nivel == "ano":
+        inicio, meses, chave = date(dia.year, 1, 1), 12, str(dia.year)
+    else:
+        raise ValueError(f"Período de partição desconhecido: {nivel}")
+    mes_seguinte = inicio.month - 1 + meses
+    fim = date(inicio.year + mes_seguinte // 12, mes_seguinte % 12 + 1, 1) - timedelta(days=1)
+    return chave, inicio, fim
+
+
+def _nivel_destino(dia, corte):
+    # O maior período encerrado antes do corte que contém o dia
+    for nivel in reversed(NIVEIS[NIVEIS.index(PARTICAO):]):
+        if periodo(dia, nivel)[2] < corte:
+            return nivel
+    return None
+
+
+def _periodo_destino(dia, corte):
+    # (nivel, chave, início, fim) da partição que guarda o dia; None se ainda em aberto
+    nivel = _nivel_destino(dia, corte)
+    if nivel is None:
+        return None
+    if nivel == "ano" and dia.year < corte.year - ANOS_SEPARADOS:
+        # Anos fora da janela: todos no arquivo de histórico, que cresce um ano por vez
+        return "historico", CHAVE_HISTORICO, date.min, date(corte.year - ANOS_SEPARADOS - 1, 12, 31)
+    return (nivel, *periodo(dia, nivel))
+
+
+def _esquema(chave):
+    return "part_" + chave.replace("-", "_")
+
+
+def _caminho_principal(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def _caminho(conn, arquivo):
+    return os.path.join(os.path.dirname(_caminho_principal(conn)), arquivo)
+
+
+def ultimo_pedido(conn):
+    """Maior id de pedido já usado, no arquivo principal ou nas partições."""
+    return conn.execute(SQL_ULTIMO_PEDIDO).fetchone()[0]
+
+
+def data_do_pedido(conn, pedido_id):
+    """Data do pedido, no arquivo principal ou numa partição; None se ele não existe."""
+    linha = conn.execute("SELECT data FROM main.pedidos WHERE id = ?", (pedido_id,)).fetchone()
+    if linha is not None:
+        return linha[0]
+    # Só as partições cujo maior id alcança o pedido; leitura sem ocupar vaga de anexo
+    candidatas = conn.execute("SELECT arquivo FROM main.particoes WHERE ultimo_pedido >= ? ORDER BY dt_inicio",
+                              (pedido_id,)).fetchall()
+    for arquivo, in candidatas:
+        origem = sqlite3.connect(f"file:{quote(_caminho(conn, arquivo))}?mode=ro", uri=True)
+        try:
+            linha = origem.execute("SELECT data FROM pedidos WHERE id = ?", (pedido_id,)).fetchone()
+        finally:
+            origem.close()
+        if linha is not None:
+            return linha[0]
+    return None
+
+
+# ==========================================
+# CONSULTAS SOBRE AS PARTIÇÕES
+# ==========================================
+def _anexadas(conn):
+    return {nome for _, nome, _ in conn.execute("PRAGMA database_list") if nome.startswith("part_")}
+
+
+def _copiadas(conn):
+    if conn.execute("SELECT 1 FROM sqlite_temp_master WHERE name = 'particoes_copiadas'").fetchone() is None:
+        return set()
+    return {esquema for esquema, in conn.execute("SELECT esquema FROM temp.particoes_copiadas")}
+
+
+def _montar_visoes(conn, esquemas, copiadas=False):
+    for tabela, (colunas, _) in TABELAS.items():
+        conn.execute(f"DROP VIEW IF EXISTS temp.{tabela}")
+        if esquemas or copiadas:
+            fontes = [f"{esquema}.{tabela}" for esquema in ["main", *esquemas]]
+            if copiadas:
+                fontes.append(f"temp.excedente_{tabela}")
+            partes = "\n    UNION ALL ".join(f"SELECT {colunas} FROM {fonte}" for fonte in fontes)
+            conn.execute(f"CREATE TEMP VIEW {tabela} AS\n    {partes}")
+
+
+def _soltar_copias(conn):
+    for tabela in TABELAS:
+        conn.execute(f"DROP TABLE IF EXISTS temp.excedente_{tabela}")
+    conn.execute("DROP TABLE IF EXISTS temp.particoes_copiadas")
+
+
+def _copiar_excedentes(conn, excedentes):
+    # Uma partição por vez, anexada como 'origem'; chamada sem nenhuma outra anexada
+    conn.execute("CREATE TEMP TABLE particoes_copiadas (esquema TEXT PRIMARY KEY)")
+    for tabela, (colunas, _) in TABELAS.items():
+        conn.execute(f"CREATE TEMP TABLE excedente_{tabela} AS SELECT {colunas} FROM main.{tabela} WHERE false")
+    for esquema, arquivo in excedentes.items():
+        conn.execute("ATTACH DATABASE ? AS origem", (_caminho(conn, arquivo),))
+        try:
+            with conn:
+                for tabela, (colunas, _) in TABELAS.items():
+                    conn.execute(f"INSERT INTO temp.excedente_{tabela} SELECT {colunas} FROM origem.{tabela}")
+                conn.execute("INSERT INTO temp.particoes_copiadas (esquema) VALUES (?)", (esquema,))
+        finally:
+            conn.execute("DETACH DATABASE origem")
+
+
+def preparar(conn, dt_inicio, dt_fim):
+    """
+    Anexa as partições que cruzam o período (e solta as demais) e ajusta as
+    visões temporárias. Retorna os esquemas das partições do período; sem
+    partições nele, a conexão lê só o arquivo principal.
+    """
+    linhas = conn.execute(SQL_SOBREPOSTAS, {"dt_inicio": str(dt_inicio), "dt_fim": str(dt_fim)}).fetchall()
+    desejadas = {_esquema(chave): arquivo for chave, arquivo in linhas}
+    # Além do limite de anexos, as mais antigas (primeiras por período) vão para tabelas temporárias
+    excedentes = dict(list(desejadas.items())[:max(0, len(desejadas) - LIMITE_ANEXOS)])
+    anexar = {esquema: arquivo for esquema, arquivo in desejadas.items() if esquema not in excedentes}
+    atuais, copiadas = _anexadas(conn), _copiadas(conn)
+    if anexar.keys() == atuais and excedentes.keys() == copiadas:
+        return sorted(desejadas)
+    # Visões caem antes do DETACH: não podem apontar para um esquema que saiu
+    _montar_visoes(conn, [])
+    for esquema in atuais - anexar.keys():
+        conn.execute(f"DETACH DATABASE {esquema}")
+    if excedentes.keys() != copiadas:
+        _soltar_copias(conn)
+        if excedentes:
+            # A cópia precisa de uma vaga de anexo livre
+            for esquema in _anexadas(conn):
+                conn.execute(f"DETACH DATABASE {esquema}")
+            _copiar_excedentes(conn, excedentes)
+    for esquema in anexar.keys() - _anexadas(conn):
+        conn.execute(f"ATTACH DATABASE ? AS {esquema}", (_caminho(conn, anexar[esquema]),))
+    _montar_visoes(conn, sorted(anexar), bool(excedentes))
+    return sorted(desejadas)
+
+
+def liberar(conn):
+    """Remove as visões temporárias e solta todas as partições da conexão."""
+    anexadas, copiadas = _anexadas(conn), _copiadas(conn)
+    if anexadas or copiadas:
+        _montar_visoes(conn, [])
+        for esquema in anexadas:
+            conn.execute(f"DETACH DATABASE {esquema}")
+        _soltar_copias(conn)
+
+
+def arquivos(conn):
+    """Caminhos dos arquivos de todas as partições registradas, em ordem de período."""
+    return [_caminho(conn, arquivo)
+            for arquivo, in conn.execute("SELECT arquivo FROM main.particoes ORDER BY dt_inicio").fetchall()]
+
+
+def esquemas_um_a_um(conn):
+    """Gera 'main' e depois cada partição, anexada uma de cada vez (sem limite de anexos)."""
+    yield "main"
+    for caminho in arquivos(conn):
+        conn.execute("ATTACH DATABASE ? AS origem", (caminho,))
+        try:
+            yield "origem"
+        finally:
+            conn.execute("DETACH DATABASE origem")
+
+
+# ==========================================
+# ARQUIVAMENTO
+# ==========================================
+def _copiar(conn, origem, condicao, params):
+    # Apaga antes de inserir: repetir uma cópia interrompida não duplica linhas
+    ids = f"SELECT id FROM {origem}.pedidos WHERE {condicao}"
+    for tabela, (colunas, chave) in TABELAS.items():
+        conn.execute(f"DELETE FROM destino.{tabela} WHERE {chave} IN ({ids})", params)
+        conn.execute(f"INSERT INTO destino.{tabela} ({colunas}) "
+                     f"SELECT {colunas} FROM {origem}.{tabela} WHERE {chave} IN ({ids})", params)
+
+
+def _remover_principal(conn, params):
+    ids = f"SELECT id FROM main.pedidos WHERE {CONDICAO_PRINCIPAL}"
+    # 'pedidos' por último: as outras tabelas são apagadas pelos ids dele
+    for tabela, (_, chave) in reversed(TABELAS.items()):
+        removidos = conn.execute(f"DELETE FROM main.{tabela} WHERE {chave} IN ({ids})", params).rowcount
+    return removidos
+
+
+def _destinos(conn, corte):
+    # chave da partição de destino -> dados do período e o que vai para ela
+    destinos = {}
+
+    def destino(dia):
+        alvo = _periodo_destino(dia, corte)
+        if alvo is None:
+            return None
+        nivel, chave, inicio, fim = alvo
+        return destinos.setdefault(chave, {"nivel": nivel, "dt_inicio": inicio.isoformat(),
+                                           "dt_fim": fim.isoformat(), "principal": False, "origens": []})
+
+    for mes, in conn.execute("SELECT DISTINCT substr(data, 1, 7) FROM main.pedidos WHERE data < ?",
+                             (corte.isoformat(),)).fetchall():
+        destino(date.fromisoformat(f"{mes}-01"))["principal"] = True
+    for chave, arquivo, inicio in conn.execute("SELECT chave, arquivo, dt_inicio FROM main.particoes").fetchall():
+        alvo = destino(date.fromisoformat(inicio))
+        if alvo is not None and _periodo_destino(date.fromisoformat(inicio), corte)[1] != chave:
+            alvo["origens"].append((chave, arquivo))
+    return {chave: alvo for chave, alvo in destinos.items() if alvo["principal"] or alvo["origens"]}
+
+
+def arquivar(conn, ate=None, hoje=None):
+    """
+    Move para as partições os pedidos dos períodos fechados (anteriores ao
+    período de 'hoje' e, se informado, terminados até 'ate') e consolida as
+    partições menores cujo trimestre/ano já fechou. Retorna {partição: pedidos
+    movidos do arquivo principal}.
+    """
+    corte = periodo(hoje or date.today(), PARTICAO)[1]
+    if ate is not None:
+        corte = min(corte, periodo(ate + timedelta(days=1), PARTICAO)[1])
+    liberar(conn)
+    # Pedidos gravados fora do checkout ganham os fatos antes de sair do arquivo principal
+    preencher_fatos(conn)
+
+    base = os.path.splitext(os.path.basename(_caminho_principal(conn)))[0]
+    os.makedirs(_caminho(conn, PASTA_PARTICOES), exist_ok=True)
+    movidos = {}
+    for chave, alvo in sorted(_destinos(conn, corte).items()):
+        arquivo = os.path.join(PASTA_PARTICOES, f"{base}_{chave}.db")
+        params = {"chave": chave, "nivel": alvo["nivel"], "arquivo": arquivo, "dt_inicio": alvo["dt_inicio"],
+                  "dt_fim": alvo["dt_fim"], "corte": corte.isoformat()}
+        conn.execute("ATTACH DATABASE ? AS destino", (_caminho(conn, arquivo),))
+        try:
+            with conn:
+                for comando in ESQUEMA:
+                    conn.execute(comando.format(esquema="destino"))
+            for _, arquivo_origem in alvo["origens"]:
+                conn.execute("ATTACH DATABASE ? AS origem", (_caminho(conn, arquivo_origem),))
+                try:
+                    with conn:
+                        _copiar(conn, "origem", "true", {})
+                finally:
+                    conn.execute("DETACH DATABASE origem")
+            if alvo["principal"]:
+                with conn:
+                    _copiar(conn, "main", CONDICAO_PRINCIPAL, params)
+            conn.execute("ANALYZE destino")
+
+            # Registro e remoção do principal na mesma transação: os painéis
+            # passam a ler a partição no mesmo instante em que as linhas saem
+            with conn:
+                conn.execute(SQL_REGISTRAR, params)
+                conn.executemany("DELETE FROM main.particoes WHERE chave = ?",
+                                 [(chave_origem,) for chave_origem, _ in alvo["origens"]])
+                movidos[chave] = _remover_principal(conn, params) if alvo["principal"] else 0
+        finally:
+            conn.execute("DETACH DATABASE destino")
+        for _, arquivo_origem in alvo["origens"]:
+            try:
+                os.remove(_caminho(conn, arquivo_origem))
+            except OSError:
+                pass    # ainda aberto por algum painel: já fora do registro, pode ser apagado depois
+    return movidos
+
+
+if __name__ == "__main__":
+    from banco import conectar
+
+    parser = argparse.ArgumentParser(description="Arquiva os períodos fechados em partições")
+    parser.add_argument("--ate", type=date.fromisoformat, default=None,
+                        help="arquiva só os períodos terminados até esta data (AAAA-MM-DD)")
+    parser.add_argument("--vacuum", action="store_true", help="compacta o arquivo principal ao final")
+    args = parser.parse_args()
+
+    conn = conectar()
+    movidos = arquivar(conn, args.ate)
+    for chave, pedidos in movidos.items():
+        print(f"  {chave}: {pedidos} pedidos movidos")
+    if args.vacuum:
+        conn.execute("VACUUM")
+    print(f"Sucesso! {sum(movidos.values())} pedidos arquivados em {len(movidos)} partições.")
@@ -0,0 +1,54 @@
+"""
+Gravação de Pedidos (Checkout):
+Ponto único de escrita de vendas usado pelo PDV ('cadastro2.py') e pelo
+cadastro simples ('cadastro.py'). Grava o cabeçalho em 'pedidos', os itens em
+'itens_pedido', os fatos com o preço da venda em 'fato_vendas' e atualiza o
+resumo diário e os rankings de clientes/produtos na mesma transação, de modo
+que os painéis nunca enxerguem um pedido pela metade.
+
+Os apps não chamam estas funções diretamente: os pedidos passam pela fila de
+escrita (fila_escrita.py), que agrupa vários checkouts num único commit.
+"""
+
+from fato_vendas import registrar_fatos
+from particoes import ultimo_pedido
+from ranking import atualizar_rankings
+from resumo_diario import atualizar_resumo
+
+
+def registrar_pedidos(conn, pedidos):
+    """
+    Grava vários pedidos numa única transação e retorna a lista de ids, na
+    mesma ordem. Cada pedido é (cliente_id, data, itens), com 'data' no formato
+    AAAA-MM-DD e 'itens' uma lista de (produto_id, quantidade) ou (produto_id,
+    quantidade, preço unitário cobrado); sem o preço, vale o do cadastro.
+    """
+    # BEGIN IMMEDIATE reserva a escrita já no início, então os ids calculados
+    # abaixo não podem ser tomados por outra conexão antes do commit
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Ids arquivados nas partições (particoes.py) também não podem voltar
+        proximo_id = ultimo_pedido(conn) + 1
+        ids = list(range(proximo_id, proximo_id + len(pedidos)))
+
+        conn.executemany("INSERT INTO pedidos (id, cliente_id, data) VALUES (?, ?, ?)",
+                         [(pedido_id, cliente_id, data)
+                          for pedido_id, (cliente_id, data, _) in zip(ids, pedidos)])
+        itens = [(pedido_id, item[0], item[1], item[2] if len(item) > 2 else None)
+                 for pedido_id, (_, _, itens_pedido) in zip(ids, pedidos)
+                 for item in itens_pedido]
+        conn.executemany("INSERT INTO itens_pedido (pedido_id, produto_id, quantidade) VALUES (?, ?, ?)",
+                         [(pedido_id, produto_id, qtd) for pedido_id, produto_id, qtd, _ in itens])
+        registrar_fatos(conn, [(pedido_id, produto_id, preco) for pedido_id, produto_id, _, preco in itens])
+        atualizar_resumo(conn, ids)
+        atualizar_rankings(conn, ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return ids
+
+
+def registrar_pedido(conn, cliente_id, data, itens):
+    """Grava um pedido completo e retorna o seu id."""
+    return registrar_pedidos(conn, [(cliente_id, data, itens)])[0]
@@ -0,0 +1,163 @@
+"""
+Previsão de Vendas em Lote (várias séries de uma vez):
+Ajusta, para todas as séries de um nível (total, por UF ou por produto), uma
+regressão linear com tendência e sazonalidade por dia da semana:
+
+    valor(dia) = a + b * dia + c[dia da semana]
+
+Todas as séries compartilham o mesmo calendário, então a matriz do modelo é
+uma só e os coeficientes de milhares de séries saem de um único mínimos
+quadrados do NumPy (uma coluna de resultado por série).
+
+CACHE:
+- Os coeficientes ficam em memória, por banco/nível/filtro, junto com a
+  versão dos dados (cache_consultas.versao_dados) em que foram calculados.
+- Sem escrita no banco, a previsão usa os coeficientes guardados sem ler nada.
+- Com escrita, as séries são relidas e só as que mudaram são reajustadas (se o
+  calendário ganhou dias, todas mudam).
+
+FONTE: 'resumo_vendas_diario' (faturamento para total/UF, quantidade para
+produto), com o mesmo filtro de período/localidade dos painéis (filtros.py).
+
+USO:
+    df = prever(conn, "produto", "2025-01-01", "2025-12-31", [1, 2], horizonte=7)
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import cache_consultas
+import desempenho
+from cache_consultas import ler_sql
+from filtros import montar_filtro
+
+HORIZONTE = 7
+LIMITE_AJUSTES = 64     # conjuntos de coeficientes guardados (banco x nível x filtro)
+
+# nível -> consulta que retorna (data, serie, valor) já filtrada
+NIVEIS = {
+    "total": """
+        SELECT r.data, 'Total' AS serie, SUM(r.faturamento) AS valor
+        FROM resumo_vendas_diario r
+        WHERE {filtro}
+        GROUP BY r.data
+    """,
+    "uf": """
+        SELECT r.data, l.uf AS serie, SUM(r.faturamento) AS valor
+        FROM resumo_vendas_diario r
+        JOIN localidades l ON r.localidade_id = l.id
+        WHERE {filtro}
+        GROUP BY r.data, l.uf
+    """,
+    "produto": """
+        SELECT r.data, r.produto_id AS serie, SUM(r.quantidade) AS valor
+        FROM resumo_vendas_diario r
+        WHERE {filtro}
+        GROUP BY r.data, r.produto_id
+    """,
+}
+
+_ajustes = OrderedDict()    # chave -> dict(versao, datas, series, valores, coeficientes)
+_trava = threading.Lock()
+estatisticas = {"reaproveitadas": 0, "reajustadas": 0}
+
+
+def matriz_modelo(datas, inicio):
+    """Colunas: intercepto, tendência (dias desde 'inicio') e terça..domingo."""
+    datas = pd.DatetimeIndex(datas)
+    dias = (datas - inicio).days.to_numpy(dtype=float)
+    semana = datas.dayofweek.to_numpy()
+    sazonal = (semana[:, None] == np.arange(1, 7)[None, :]).astype(float)
+    return np.column_stack([np.ones(len(datas)), dias, sazonal])
+
+
+def ajustar(X, Y):
+    """Coeficientes de todas as colunas de Y num único mínimos quadrados."""
+    return np.linalg.lstsq(X, Y, rcond=None)[0]
+
+
+def _ler_series(conn, nivel, dt_inicio, dt_fim, localidades):
+    filtro, params = montar_filtro(conn, dt_inicio, dt_fim, localidades, "r.data", "r.localidade_id")
+    df = ler_sql(conn, NIVEIS[nivel].format(filtro=filtro), params=params)
+    if df.empty:
+        return pd.DatetimeIndex([]), pd.Index([]), np.empty((0, 0))
+    df["data"] = pd.to_datetime(df["data"])
+    tabela = df.pivot_table(index="data", columns="serie", values="valor", aggfunc="sum", fill_value=0)
+    # Dias sem venda entram como zero (o rollup só tem linhas de dias com venda)
+    datas = pd.date_range(tabela.index.min(), tabela.index.max(), freq="D")
+    tabela = tabela.reindex(datas, fill_value=0)
+    return datas, tabela.columns, tabela.to_numpy(dtype=float)
+
+
+def _ajuste_atual(conn, nivel, dt_inicio, dt_fim, localidades):
+    caminho = cache_consultas.caminho_banco(conn)
+    chave = (caminho, nivel, dt_inicio, dt_fim, tuple(sorted(int(i) for i in localidades)))
+    versao = cache_consultas.versao_dados(caminho)
+    with _trava:
+        anterior = _ajustes.get(chave)
+        if anterior is not None and anterior["versao"] == versao:
+            _ajustes.move_to_end(chave)
+            estatisticas["reaproveitadas"] += anterior["coeficientes"].shape[1]
+            return anterior
+
+    datas, series, Y = _ler_series(conn, nivel, dt_inicio, dt_fim, localidades)
+    X = matriz_modelo(datas, datas[0]) if len(datas) else np.empty((0, 8))
+    coeficientes = np.zeros((X.shape[1], len(series)))
+    mudou = np.ones(len(series), dtype=bool)
+    if anterior is not None and anterior["datas"].equals(datas):
+        # Mesmo calendário: reaproveita as séries com valores idênticos
+        posicoes = anterior["series"].get_indexer(series)
+        conhecidas = posicoes >= 0
+        iguais = (anterior["valores"][:, posicoes[conhecidas]] == Y[:, conhecidas]).all(axis=0)
+        mudou[np.flatnonzero(conhecidas)[iguais]] = False
+        coeficientes[:, ~mudou] = anterior["coeficientes"][:, posicoes[~mudou]]
+    if len(datas) > 1 and mudou.any():
+        with desempenho.medir("previsão: ajuste", "cálculo") as medida:
+            coeficientes[:, mudou] = ajustar(X, Y[:, mudou])
+            medida["linhas"] = int(mudou.sum())
+    estatisticas["reajustadas"] += int(mudou.sum())
+    estatisticas["reaproveitadas"] += int((~mudou).sum())
+
+    ajuste = {"versao": versao, "datas": datas, "series": series, "valores": Y,
+              "coeficientes": coeficientes}
+    with _trava:
+        _ajustes[chave] = ajuste
+        _ajustes.move_to_end(chave)
+        while len(_ajustes) > LIMITE_AJUSTES:
+            _ajustes.popitem(last=False)
+    return ajuste
+
+
+def prever(conn, nivel, dt_inicio, dt_fim, localidades, horizonte=HORIZONTE):
+    """
+    Previsão dos próximos 'horizonte' dias após o último dia com dados, para
+    cada série do nível. Retorna DataFrame (serie, data, previsao); vazio se
+    houver menos de dois dias de histórico.
+    """
+    ajuste = _ajuste_atual(conn, nivel, dt_inicio, dt_fim, localidades)
+    datas = ajuste["datas"]
+    if len(datas) < 2:
+        return pd.DataFrame(columns=["serie", "data", "previsao"])
+    futuro = pd.date_range(datas[-1] + pd.Timedelta(days=1), periods=horizonte, freq="D")
+    # Faturamento e demanda não ficam negativos
+    valores = np.clip(matriz_modelo(futuro, datas[0]) @ ajuste["coeficientes"], 0, None)
+    return pd.DataFrame({
+        "serie": np.tile(ajuste["series"].to_numpy(), horizonte),
+        "data": np.repeat(futuro.to_numpy(), len(ajuste["series"])),
+        "previsao": valores.ravel(),
+    })
+
+
+def previsao_por_serie(conn, nivel, dt_inicio, dt_fim, localidades, horizonte=HORIZONTE):
+    """Total previsto no horizonte para cada série, do maior para o menor."""
+    df = prever(conn, nivel, dt_inicio, dt_fim, localidades, horizonte)
+    return df.groupby("serie")["previsao"].sum().sort_values(ascending=False)
+
+
+def limpar():
+    """Descarta os coeficientes guardados."""
+    with _trava:
+        _ajustes.clear()
@@ -0,0 +1,226 @@
+"""
+Rankings Mantidos na Gravação (tabelas 'ranking_vendas' e 'ranking_cobertura'):
+Os totais de cada cliente e de cada produto ficam guardados já somados por
+período e UF. O checkout soma os pedidos novos na mesma transação (como o
+resumo diário) e os painéis leem os primeiros colocados direto do índice
+(tipo, periodo, uf, total), sem agrupar todos os clientes a cada exibição: o
+custo depende do tamanho do ranking pedido, não do número de clientes ou de
+pedidos.
+
+O QUE É GUARDADO:
+- período: cada mês ('AAAA-MM') e o histórico inteiro (PERIODO_TOTAL);
+- UF: cada UF e todas juntas (TODAS_UFS, que inclui as vendas sem localidade);
+- clientes a partir de 'fato_vendas' e produtos a partir do resumo diário,
+  ambos pelo faturamento.
+
+COBERTURA:
+'ranking_cobertura' guarda, para cada período/UF, as localidades com vendas e
+a primeira e a última data vendida em cada uma. cobertura() só aponta um
+ranking guardado quando ele dá exatamente o resultado do filtro do painel: o
+intervalo de datas contém todas as vendas do período guardado (um mês só, ou
+o histórico inteiro) e a seleção contém todas as localidades com vendas (para
+uma UF, apenas localidades dela). Nos demais filtros retorna None e
+agregados.py faz a consulta exata nos fatos.
+
+MANUTENÇÃO:
+- atualizar_rankings(conn, pedido_ids): soma os pedidos recém-gravados. Deve
+  ser chamada na MESMA transação que grava os fatos e o resumo (pedidos.py).
+- reconstruir_rankings(conn): recalcula tudo a partir dos fatos (inclusive
+  das partições de histórico) e do resumo diário, depois de cargas em massa e
+  da correção das localidades. Rode depois de reconstruir o resumo.
+
+USO:
+    python ranking.py   # reconstrói os rankings
+"""
+
+import sqlite3
+from urllib.parse import quote
+
+from particoes import arquivos
+
+PERIODO_TOTAL = "total"
+TODAS_UFS = ""
+
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS ranking_vendas (
+        tipo TEXT NOT NULL,
+        periodo TEXT NOT NULL,
+        uf TEXT NOT NULL,
+        chave INTEGER NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (tipo, periodo, uf, chave)
+    ) WITHOUT ROWID""",
+    # Os primeiros colocados são lidos percorrendo este índice de trás para frente
+    "CREATE INDEX IF NOT EXISTS idx_ranking_vendas_total ON ranking_vendas (tipo, periodo, uf, total)",
+    """CREATE TABLE IF NOT EXISTS ranking_cobertura (
+        periodo TEXT NOT NULL,
+        uf TEXT NOT NULL,
+        localidade_id INTEGER NOT NULL,
+        primeira_data DATE NOT NULL,
+        ultima_data DATE NOT NULL,
+        PRIMARY KEY (periodo, uf, localidade_id)
+    ) WITHOUT ROWID""",
+]
+
+# Cada linha da origem ('{origem}', já somada por mês e localidade) conta para o
+# seu mês e para o total, na sua UF e em todas
+_GRUPOS = f"""CASE WHEN g.por_mes THEN o.mes ELSE '{PERIODO_TOTAL}' END,
+       CASE WHEN g.por_uf THEN l.uf ELSE '{TODAS_UFS}' END"""
+
+_ORIGEM = """FROM {origem} o
+LEFT JOIN main.localidades l ON o.localidade_id = l.id
+CROSS JOIN (SELECT 1 AS por_mes, 1 AS por_uf UNION ALL SELECT 1, 0
+            UNION ALL SELECT 0, 1 UNION ALL SELECT 0, 0) g
+WHERE (g.por_uf = 0 OR l.uf IS NOT NULL)"""
+
+SQL_SOMAR = f"""
+INSERT INTO main.ranking_vendas (tipo, periodo, uf, chave, total)
+SELECT '{{tipo}}', {_GRUPOS}, o.{{chave}}, SUM(o.{{valor}})
+{_ORIGEM} AND o.{{chave}} IS NOT NULL
+GROUP BY 2, 3, 4
+ON CONFLICT (tipo, periodo, uf, chave) DO UPDATE SET total = total + excluded.total
+"""
+
+SQL_COBRIR = f"""
+INSERT INTO main.ranking_cobertura (periodo, uf, localidade_id, primeira_data, ultima_data)
+SELECT {_GRUPOS}, o.localidade_id, MIN(o.primeira_data), MAX(o.ultima_data)
+{_ORIGEM}
+GROUP BY 1, 2, 3
+ON CONFLICT (periodo, uf, localidade_id) DO UPDATE SET
+    primeira_data = MIN(primeira_data, excluded.primeira_data),
+    ultima_data = MAX(ultima_data, excluded.ultima_data)
+"""
+
+# Checkout: só os fatos dos pedidos recém-gravados
+_PEDIDO = """(SELECT substr(data, 1, 7) AS mes, localidade_id, cliente_id, produto_id, total_item,
+        data AS primeira_data, data AS ultima_data
+    FROM main.fato_vendas WHERE pedido_id = ?)"""
+SQL_ATUALIZAR = [
+    SQL_SOMAR.format(tipo="cliente", chave="cliente_id", valor="total_item", origem=_PEDIDO),
+    SQL_SOMAR.format(tipo="produto", chave="produto_id", valor="total_item", origem=_PEDIDO),
+    SQL_COBRIR.format(origem=_PEDIDO),
+]
+
+# Reconstrução: clientes (e a cobertura) somados por mês/localidade em cada
+# arquivo, principal e partições; produtos do resumo diário, que já cobre o histórico inteiro
+SQL_PARCIAL_CLIENTES = """
+SELECT substr(data, 1, 7), localidade_id, cliente_id, SUM(total_item), MIN(data), MAX(data)
+FROM main.fato_vendas
+GROUP BY 1, 2, 3
+"""
+
+_PRODUTOS_POR_MES = """(SELECT substr(data, 1, 7) AS mes, localidade_id, produto_id, SUM(faturamento) AS faturamento
+    FROM main.resumo_vendas_diario GROUP BY 1, 2, 3)"""
+SQL_RECONSTRUIR = [
+    SQL_SOMAR.format(tipo="cliente", chave="cliente_id", valor="total_item", origem="temp.ranking_parcial"),
+    SQL_SOMAR.format(tipo="produto", chave="produto_id", valor="faturamento", origem=_PRODUTOS_POR_MES),
+    SQL_COBRIR.format(origem="temp.ranking_parcial"),
+]
+
+SQL_LER_COBERTURA = """
+SELECT localidade_id, primeira_data, ultima_data FROM ranking_cobertura
+WHERE periodo = ? AND uf = ?
+"""
+
+# Primeiros colocados de um período/UF guardado, com o nome da dimensão
+SQL_TOPO = """
+WITH topo AS (
+    SELECT chave, total FROM ranking_vendas
+    WHERE tipo = '{tipo}' AND periodo = :periodo AND uf = :uf
+    ORDER BY total DESC
+    LIMIT :limite
+)
+SELECT d.nome AS {tipo}, t.total AS total_item
+FROM topo t
+JOIN {tabela} d ON t.chave = d.id
+ORDER BY t.total DESC
+"""
+SQL_TOPO_CLIENTES = SQL_TOPO.format(tipo="cliente", tabela="clientes")
+SQL_TOPO_PRODUTOS = SQL_TOPO.format(tipo="produto", tabela="produtos")
+
+
+# ==========================================
+# MANUTENÇÃO
+# ==========================================
+def atualizar_rankings(conn, pedido_ids):
+    """Soma aos rankings os pedidos informados (sem commit)."""
+    parametros = [(pedido_id,) for pedido_id in pedido_ids]
+    for sql in SQL_ATUALIZAR:
+        conn.executemany(sql, parametros)
+
+
+def _parciais_particoes(conn):
+    # Conexão própria para cada partição em vez de ATTACH, que não é permitido
+    # dentro de uma transação (a migração 11 preenche os rankings dentro da sua)
+    for caminho in arquivos(conn):
+        origem = sqlite3.connect(f"file:{quote(caminho)}?mode=ro", uri=True)
+        try:
+            yield from origem.execute(SQL_PARCIAL_CLIENTES)
+        finally:
+            origem.close()
+
+
+def preencher_rankings(conn):
+    """Soma aos rankings (vazios) todas as vendas; não abre nem fecha transação."""
+    conn.execute("DROP TABLE IF EXISTS temp.ranking_parcial")
+    conn.execute("CREATE TEMP TABLE ranking_parcial "
+                 "(mes, localidade_id, cliente_id, total_item, primeira_data, ultima_data)")
+    conn.execute(f"INSERT INTO temp.ranking_parcial {SQL_PARCIAL_CLIENTES}")
+    conn.executemany("INSERT INTO temp.ranking_parcial VALUES (?, ?, ?, ?, ?, ?)", _parciais_particoes(conn))
+    for sql in SQL_RECONSTRUIR:
+        conn.execute(sql)
+    conn.execute("DROP TABLE temp.ranking_parcial")
+
+
+def reconstruir_rankings(conn):
+    """Recalcula os rankings inteiros numa única transação; retorna quantas linhas têm."""
+    with conn:
+        conn.execute("DELETE FROM main.ranking_vendas")
+        conn.execute("DELETE FROM main.ranking_cobertura")
+        preencher_rankings(conn)
+    return conn.execute("SELECT COUNT(*) FROM main.ranking_vendas").fetchone()[0]
+
+
+# ==========================================
+# LEITURA
+# ==========================================
+def _cobre(conn, periodo, uf, dt_inicio, dt_fim, selecao):
+    linhas = conn.execute(SQL_LER_COBERTURA, (periodo, uf)).fetchall()
+    if not linhas:
+        return False
+    if selecao is not None and any(localidade not in selecao for localidade, _, _ in linhas):
+        return False
+    if dt_inicio is not None and dt_inicio > min(primeira for _, primeira, _ in linhas):
+        return False
+    return dt_fim is None or dt_fim >= max(ultima for _, _, ultima in linhas)
+
+
+def cobertura(conn, dt_inicio=None, dt_fim=None, localidades=None):
+    """
+    (periodo, uf) do ranking guardado que dá o mesmo resultado que o filtro
+    (None em cada argumento = sem aquele filtro), ou None se nenhum der.
+    """
+    periodos = [PERIODO_TOTAL]
+    if dt_inicio is not None and dt_fim is not None and str(dt_inicio)[:7] == str(dt_fim)[:7]:
+        periodos.insert(0, str(dt_inicio)[:7])
+    selecao = None if localidades is None else {int(i) for i in localidades}
+    ufs = [TODAS_UFS]
+    if selecao:
+        uf_por_id = dict(conn.execute("SELECT id, uf FROM localidades"))
+        ufs_selecao = {uf_por_id.get(i) for i in selecao}
+        if len(ufs_selecao) == 1 and None not in ufs_selecao:
+            ufs.insert(0, ufs_selecao.pop())
+    dt_inicio = None if dt_inicio is None else str(dt_inicio)
+    dt_fim = None if dt_fim is None else str(dt_fim)
+    for periodo in periodos:
+        for uf in ufs:
+            if _cobre(conn, periodo, uf, dt_inicio, dt_fim, selecao):
+                return periodo, uf
+    return None
+
+
+if __name__ == "__main__":
+    from banco import conectar
+
+    linhas = reconstruir_rankings(conectar())
+    print(f"Sucesso! Rankings reconstruídos com {linhas} linhas.")
@@ -0,0 +1,279 @@
+"""
+Recibos em PDF (geração fora do caixa e acervo em disco):
+Monta o recibo (FPDF) num pool de processos, para que o checkout do PDV
+('cadastro2.py') retorne assim que o pedido é confirmado no banco. A tela
+recebe um Future e mostra o botão de download quando o PDF fica pronto.
+
+POR QUE PROCESSOS:
+O FPDF é Python puro e segura o GIL enquanto desenha a página; numa thread
+ele ainda disputaria CPU com o script do Streamlit. Os processos são criados
+com 'spawn' (não herdam as threads e conexões do servidor) e reaproveitados
+entre os recibos.
+
+ACERVO:
+- Cada recibo é gravado uma única vez em PASTA_RECIBOS (uma subpasta por
+  milhar de pedido_id) e registrado na tabela 'recibos' (migração 6).
+- obter_recibo(conn, pedido_id): devolve o arquivo guardado; se ele faltar
+  (nunca gerado ou apagado do disco), remonta o recibo a partir de
+  pedidos/fato_vendas, inclusive de pedidos já arquivados (particoes.py), e o
+  guarda para as próximas vezes.
+- gerar_recibos_periodo(...): gera em paralelo, em todos os núcleos, os
+  recibos que ainda não existem num período (ex.: fechamento do mês).
+
+USO:
+    futuro = enviar_recibo(id_pedido, "Ana Silva", itens, total, "14/02/2026 10:30")
+    pdf_bytes = obter_recibo(conn, 123)
+    python recibos.py --inicio 2026-01-01 --fim 2026-01-31 [--processos 8]
+"""
+
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+
+from fpdf import FPDF
+
+from banco import conectar
+from fila_escrita import enviar_escrita
+import particoes
+
+PROCESSOS = int(os.environ.get("RECIBOS_PROCESSOS", "2"))
+PASTA_RECIBOS = os.environ.get("RECIBOS_DIR", "recibos")
+RECIBOS_POR_TAREFA = 200    # recibos enviados juntos a um processo na geração em lote
+
+_pool = None
+_trava = threading.Lock()
+
+SQL_CABECALHOS = """
+SELECT p.id, COALESCE(c.nome, ''), p.data
+FROM pedidos p
+LEFT JOIN clientes c ON p.cliente_id = c.id
+WHERE {filtro}
+ORDER BY p.id
+"""
+
+# Preço gravado na venda (fato_vendas.py): a segunda via sai igual à original
+SQL_ITENS = """
+SELECT f.pedido_id, pr.nome, f.quantidade, f.preco_unitario
+FROM fato_vendas f
+JOIN produtos pr ON f.produto_id = pr.id
+WHERE f.pedido_id IN (SELECT p.id FROM pedidos p WHERE {filtro})
+ORDER BY f.pedido_id, f.item_id
+"""
+
+SQL_INDEXAR = """
+INSERT INTO recibos (pedido_id, arquivo, tamanho, gerado_em) VALUES (?, ?, ?, datetime('now'))
+ON CONFLICT (pedido_id) DO UPDATE SET
+    arquivo = excluded.arquivo, tamanho = excluded.tamanho, gerado_em = excluded.gerado_em
+"""
+
+
+# ==========================================
+# MONTAGEM DO PDF
+# ==========================================
+def gerar_recibo_pdf(id_pedido, nome_cliente, itens, total, momento):
+    """PDF do recibo em bytes. 'itens': dicts com nome, qtd, preco e subtotal."""
+    pdf = FPDF()
+    pdf.add_page()
+
+    # Cabeçalho
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(200, 10, "RECIBO DE VENDA", ln=True, align="C")
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(200, 10, f"Pedido ID: {id_pedido} | Data: {momento}", ln=True, align="C")
+    pdf.ln(10)
+
+    # Dados do Cliente
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, f"Cliente: {nome_cliente}", ln=True)
+    pdf.ln(5)
+
+    # Tabela de Itens
+    pdf.set_fill_color(200, 200, 200)
+    pdf.cell(80, 10, "Produto", 1, 0, "C", True)
+    pdf.cell(30, 10, "Qtd", 1, 0, "C", True)
+    pdf.cell(40, 10, "Unitário", 1, 0, "C", True)
+    pdf.cell(40, 10, "Subtotal", 1, 1, "C", True)
+
+    pdf.set_font("Arial", "", 12)
+    for item in itens:
+        pdf.cell(80, 10, item['nome'], 1)
+        pdf.cell(30, 10, str(item['qtd']), 1, 0, "C")
+        pdf.cell(40, 10, f"R$ {item['preco']:.2f}", 1, 0, "C")
+        pdf.cell(40, 10, f"R$ {item['subtotal']:.2f}", 1, 1, "C")
+
+    # Total
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, f"TOTAL: R$ {total:.2f}", ln=True, align="R")
+
+    return pdf.output(dest="S").encode("latin-1")
+
+
+# ==========================================
+# ACERVO EM DISCO
+# ==========================================
+def caminho_recibo(pedido_id):
+    """Caminho do arquivo relativo à pasta do acervo (uma subpasta por milhar)."""
+    return os.path.join(f"{pedido_id // 1000:06d}", f"recibo_{pedido_id}.pdf")
+
+
+def _gravar_arquivo(pasta, pedido_id, pdf):
+    relativo = caminho_recibo(pedido_id)
+    completo = os.path.join(pasta, relativo)
+    os.makedirs(os.path.dirname(completo), exist_ok=True)
+    # Grava num temporário e troca de nome: nenhum leitor vê um PDF pela metade
+    temporario = f"{completo}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(pdf)
+    os.replace(temporario, completo)
+    return pedido_id, relativo, len(pdf)
+
+
+def _gerar_e_gravar(pasta, pedido_id, nome_cliente, itens, total, momento):
+    # Executado nos processos do pool (checkout): grava e devolve os bytes para a tela
+    pdf = gerar_recibo_pdf(pedido_id, nome_cliente, itens, total, momento)
+    _gravar_arquivo(pasta, pedido_id, pdf)
+    return pdf
+
+
+def _gerar_lote(pasta, pedidos):
+    # Executado nos processos do pool (lote): só os metadados voltam ao processo principal
+    return [_gravar_arquivo(pasta, dados[0], gerar_recibo_pdf(*dados)) for dados in pedidos]
+
+
+def _indexar(conn, gravados):
+    with conn:
+        conn.executemany(SQL_INDEXAR, gravados)
+    return len(gravados)
+
+
+def dados_pedidos(conn, filtro, params):
+    """[(pedido_id, nome_cliente, itens, total, momento)] dos pedidos que atendem 'filtro'."""
+    itens = {}
+    for pedido_id, nome, qtd, preco in conn.execute(SQL_ITENS.format(filtro=filtro), params):
+        itens.setdefault(pedido_id, []).append(
+            {"nome": nome, "qtd": qtd, "preco": preco, "subtotal": preco * qtd})
+    pedidos = []
+    for pedido_id, nome_cliente, data in conn.execute(SQL_CABECALHOS.format(filtro=filtro), params):
+        itens_pedido = itens.get(pedido_id, [])
+        momento = date.fromisoformat(data[:10]).strftime('%d/%m/%Y')
+        pedidos.append((pedido_id, nome_cliente, itens_pedido,
+                        sum(item['subtotal'] for item in itens_pedido), momento))
+    return pedidos
+
+
+def obter_recibo(conn, pedido_id, caminho=None, pasta=PASTA_RECIBOS):
+    """
+    Bytes do recibo do pedido (do acervo ou remontado); None se o pedido não
+    existe. 'caminho' é o banco de 'conn', para a fila de escrita.
+    """
+    linha = conn.execute("SELECT arquivo FROM recibos WHERE pedido_id = ?", (pedido_id,)).fetchone()
+    if linha is not None:
+        try:
+            with open(os.path.join(pasta, linha[0]), "rb") as arquivo:
+                return arquivo.read()
+        except FileNotFoundError:
+            pass
+    data = particoes.data_do_pedido(conn, pedido_id)
+    if data is None:
+        return None
+    # Pedido arquivado: anexa a partição do dia dele só durante a remontagem
+    particoes.preparar(conn, data, data)
+    try:
+        dados = dados_pedidos(conn, "p.id = :pedido_id", {"pedido_id": pedido_id})
+    finally:
+        particoes.liberar(conn)
+    if not dados:
+        return None
+    pdf = gerar_recibo_pdf(*dados[0])
+    # Pela fila de escrita, como em enviar_recibo
+    enviar_escrita(_indexar, [_gravar_arquivo(pasta, pedido_id, pdf)], caminho=caminho)
+    return pdf
+
+
+# ==========================================
+# GERAÇÃO EM SEGUNDO PLANO
+# ==========================================
+def _novo_pool(processos):
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _obter_pool():
+    global _pool
+    with _trava:
+        if _pool is None:
+            _pool = _novo_pool(PROCESSOS)
+        return _pool
+
+
+def enviar_recibo(id_pedido, nome_cliente, itens, total, momento, caminho=None, pasta=PASTA_RECIBOS):
+    """
+    Agenda o recibo no pool e retorna um Future com os bytes do PDF. O arquivo
+    entra no acervo e, quando pronto, é registrado na tabela 'recibos'.
+    """
+    # Valores simples (sem tipos do NumPy/pandas) para o envio ao processo
+    itens = [{"nome": str(item['nome']), "qtd": int(item['qtd']),
+              "preco": float(item['preco']), "subtotal": float(item['subtotal'])} for item in itens]
+    futuro = _obter_pool().submit(_gerar_e_gravar, pasta, id_pedido, str(nome_cliente),
+                                  itens, float(total), momento)
+
+    def registrar(futuro):
+        # Pela fila de escrita (fila_escrita.py), sem disputar o lock com os checkouts
+        if futuro.exception() is None:
+            enviar_escrita(_indexar, [(id_pedido, caminho_recibo(id_pedido), len(futuro.result()))],
+                           caminho=caminho)
+    futuro.add_done_callback(registrar)
+    return futuro
+
+
+def _indexar_prontos(conn, prontos):
+    return sum(_indexar(conn, futuro.result()) for futuro in prontos)
+
+
+def gerar_recibos_periodo(conn, dt_inicio, dt_fim, processos=None, refazer=False, pasta=PASTA_RECIBOS):
+    """
+    Gera os recibos dos pedidos do período em paralelo (um processo por núcleo
+    por padrão). Sem 'refazer', pula os pedidos que já têm recibo no acervo.
+    Retorna quantos recibos foram gerados.
+    """
+    # Períodos já arquivados também entram (partições anexadas só para a leitura)
+    particoes.preparar(conn, dt_inicio, dt_fim)
+    filtro = "p.data BETWEEN :dt_inicio AND :dt_fim"
+    if not refazer:
+        filtro += " AND p.id NOT IN (SELECT pedido_id FROM recibos)"
+    params = {"dt_inicio": dt_inicio, "dt_fim": dt_fim}
+    ids = [linha[0] for linha in conn.execute(f"SELECT p.id FROM pedidos p WHERE {filtro} ORDER BY p.id", params)]
+
+    processos = processos or os.cpu_count()
+    gerados = 0
+    with _novo_pool(processos) as pool:
+        em_andamento = set()
+        for inicio in range(0, len(ids), RECIBOS_POR_TAREFA):
+            lote = ids[inicio:inicio + RECIBOS_POR_TAREFA]
+            dados = dados_pedidos(conn, f"{filtro} AND p.id BETWEEN :primeiro AND :ultimo",
+                                  {**params, "primeiro": lote[0], "ultimo": lote[-1]})
+            em_andamento.add(pool.submit(_gerar_lote, pasta, dados))
+            # Limita os lotes em memória à espera de um processo livre
+            if len(em_andamento) >= 2 * processos:
+                prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                gerados += _indexar_prontos(conn, prontos)
+        gerados += _indexar_prontos(conn, wait(em_andamento).done)
+    return gerados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os recibos em PDF de um período")
+    parser.add_argument("--inicio", required=True, help="data inicial (AAAA-MM-DD)")
+    parser.add_argument("--fim", required=True, help="data final (AAAA-MM-DD)")
+    parser.add_argument("--processos", type=int, default=None, help="padrão: um por núcleo")
+    parser.add_argument("--refazer", action="store_true", help="gera de novo os recibos já existentes")
+    parser.add_argument("--pasta", default=PASTA_RECIBOS)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    total = gerar_recibos_periodo(conectar(), args.inicio, args.fim, args.processos, args.refazer, args.pasta)
+    print(f"Sucesso! {total} recibos gerados em {time.perf_counter() - t0:.1f} s.")
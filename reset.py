@@ -1,8 +1,13 @@
 """
 DESCRIÇÃO DO SCRIPT:
 Este utilitário é responsável por realizar o 'reset' do ambiente de dados.
-Ele verifica a existência do arquivo de banco de dados SQLite ('vendas.db')
-e o remove fisicamente do diretório. 
+Ele remove fisicamente o banco de dados SQLite ('vendas.db', ou VENDAS_DB) e
+tudo o que pertence a ele:
+- os arquivos '-wal' e '-shm' do modo WAL (um WAL antigo ao lado de um banco
+  novo poderia ressuscitar ou corromper dados);
+- as partições de histórico registradas no banco (particoes.py);
+- o acervo de recibos em PDF (recibos.py);
+- o log de consultas lentas (desempenho.py).
 
 MOTIVO DE USO:
 - Limpar dados de teste e começar do zero.
@@ -11,10 +16,61 @@ MOTIVO DE USO:
 """
 
 import os
+import shutil
+import sqlite3
 
-# Verifica se o arquivo existe antes de tentar deletar (evita erros)
-if os.path.exists("vendas.db"):
-    os.remove("vendas.db")
-    print("🧹 Sucesso: O banco de dados 'vendas.db' foi removido!")
+from banco import CAMINHO_DB
+from desempenho import ARQUIVO_LOG
+from particoes import PASTA_PARTICOES
+from recibos import PASTA_RECIBOS
+
+SUFIXOS = ("", "-wal", "-shm", "-journal")
+
+
+def remover_sqlite(caminho):
+    """Remove o arquivo SQLite e os arquivos auxiliares dele; retorna se havia algo."""
+    removeu = False
+    for sufixo in SUFIXOS:
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+            removeu = True
+    return removeu
+
+
+def particoes_registradas(caminho):
+    """Caminhos das partições registradas no banco (vazio se não houver registro)."""
+    if not os.path.exists(caminho):
+        return []
+    conn = sqlite3.connect(caminho)
+    try:
+        arquivos = [linha[0] for linha in conn.execute("SELECT arquivo FROM particoes")]
+    except sqlite3.OperationalError:
+        arquivos = []   # banco anterior à migração das partições
+    finally:
+        conn.close()
+    pasta = os.path.dirname(caminho)
+    return [os.path.join(pasta, arquivo) for arquivo in arquivos]
+
+
+# Lidas antes: o registro das partições fica dentro do próprio banco
+particoes = particoes_registradas(CAMINHO_DB)
+
+if remover_sqlite(CAMINHO_DB):
+    print(f"🧹 Sucesso: O banco de dados '{CAMINHO_DB}' foi removido!")
 else:
-    print("ℹ️ Aviso: O arquivo 'vendas.db' não foi encontrado (o banco já está limpo).")
\ No newline at end of file
+    print(f"ℹ️ Aviso: O arquivo '{CAMINHO_DB}' não foi encontrado (o banco já está limpo).")
+
+removidas = sum(remover_sqlite(caminho) for caminho in particoes)
+pasta_particoes = os.path.join(os.path.dirname(CAMINHO_DB), PASTA_PARTICOES)
+# A pasta só sai se ficou vazia: pode guardar partições de outro banco
+if os.path.isdir(pasta_particoes) and not os.listdir(pasta_particoes):
+    os.rmdir(pasta_particoes)
+if removidas:
+    print(f"🧹 {removidas} partição(ões) de histórico removida(s).")
+
+if os.path.isdir(PASTA_RECIBOS):
+    shutil.rmtree(PASTA_RECIBOS)
+    print(f"🧹 Acervo de recibos '{PASTA_RECIBOS}' removido.")
+
+if remover_sqlite(os.path.join(os.path.dirname(CAMINHO_DB), ARQUIVO_LOG)):
+    print(f"🧹 Log de consultas lentas '{ARQUIVO_LOG}' removido.")
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Resumo Diário de Vendas (tabela 'resumo_vendas_diario'):
+Tabela pré-agregada por dia × localidade (localidade_id) × produto com
+faturamento, quantidade e número de pedidos. Os painéis leem este resumo em
+vez de percorrer os itens a cada carregamento, então o custo acompanha o
+número de dias e não o número de itens vendidos.
+
+O resumo é derivado de 'fato_vendas' (fato_vendas.py), com o preço de cada
+venda; alterar o preço de um produto não muda o faturamento já resumido.
+
+MANUTENÇÃO:
+- atualizar_resumo(conn, pedido_ids): soma os pedidos recém-gravados ao resumo.
+  Deve ser chamada na MESMA transação que insere os itens, depois dos fatos
+  (ver pedidos.py).
+- reconstruir_resumo(conn): completa os fatos que faltam e recalcula tudo a
+  partir deles (backfill após cargas em massa como p2.py/p3.py).
+
+OBSERVAÇÃO:
+A coluna 'pedidos' conta pedidos distintos dentro de cada combinação
+dia/localidade/produto; somá-la entre produtos conta duas vezes o pedido que
+tem mais de um produto.
+
+USO:
+    python resumo_diario.py   # reconstrói o resumo completo
+"""
+
+from fato_vendas import preencher_fatos
+from particoes import esquemas_um_a_um
+
+SQL_CRIAR = """
+CREATE TABLE IF NOT EXISTS resumo_vendas_diario (
+    data DATE NOT NULL,
+    localidade_id INTEGER NOT NULL DEFAULT 0,
+    produto_id INTEGER NOT NULL,
+    faturamento REAL NOT NULL DEFAULT 0,
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    pedidos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (data, localidade_id, produto_id)
+) WITHOUT ROWID
+"""
+
+# Soma um pedido ao resumo (upsert por dia/localidade/produto)
+SQL_ATUALIZAR = """
+INSERT INTO resumo_vendas_diario (data, localidade_id, produto_id, faturamento, quantidade, pedidos)
+SELECT f.data, f.localidade_id, f.produto_id, SUM(f.total_item), SUM(f.quantidade), 1
+FROM fato_vendas f
+WHERE f.pedido_id = ?
+GROUP BY f.data, f.localidade_id, f.produto_id
+ON CONFLICT (data, localidade_id, produto_id) DO UPDATE SET
+    faturamento = faturamento + excluded.faturamento,
+    quantidade = quantidade + excluded.quantidade,
+    pedidos = pedidos + excluded.pedidos
+"""
+
+# Um pedido fica num único arquivo, então as contagens de cada arquivo se somam
+SQL_PARCIAL = """
+INSERT INTO temp.resumo_parcial
+SELECT f.data, f.localidade_id, f.produto_id,
+       SUM(f.total_item), SUM(f.quantidade), COUNT(DISTINCT f.pedido_id)
+FROM {esquema}.fato_vendas f
+GROUP BY f.data, f.localidade_id, f.produto_id
+"""
+
+SQL_RECONSTRUIR = """
+INSERT INTO main.resumo_vendas_diario (data, localidade_id, produto_id, faturamento, quantidade, pedidos)
+SELECT data, localidade_id, produto_id, SUM(faturamento), SUM(quantidade), SUM(pedidos)
+FROM temp.resumo_parcial
+GROUP BY data, localidade_id, produto_id
+"""
+
+
+def atualizar_resumo(conn, pedido_ids):
+    """Acrescenta ao resumo os pedidos informados (sem commit)."""
+    conn.executemany(SQL_ATUALIZAR, [(pedido_id,) for pedido_id in pedido_ids])
+
+
+def reconstruir_resumo(conn):
+    """
+    Completa os fatos e recalcula o resumo inteiro, incluindo as partições
+    de histórico (particoes.py); a troca do resumo é uma única transação.
+    """
+    preencher_fatos(conn)
+    conn.execute("DROP TABLE IF EXISTS temp.resumo_parcial")
+    conn.execute("CREATE TEMP TABLE resumo_parcial "
+                 "(data, localidade_id, produto_id, faturamento, quantidade, pedidos)")
+    # Uma partição anexada por vez: o histórico pode ter mais arquivos que o limite de anexos
+    for esquema in esquemas_um_a_um(conn):
+        with conn:
+            conn.execute(SQL_PARCIAL.format(esquema=esquema))
+    with conn:
+        conn.execute(SQL_CRIAR)
+        conn.execute("DELETE FROM main.resumo_vendas_diario")
+        conn.execute(SQL_RECONSTRUIR)
+    conn.execute("DROP TABLE temp.resumo_parcial")
+    return conn.execute("SELECT COUNT(*) FROM main.resumo_vendas_diario").fetchone()[0]
+
+
+if __name__ == "__main__":
+    from banco import conectar
+
+    linhas = reconstruir_resumo(conectar())
+    print(f"Sucesso! Resumo diário reconstruído com {linhas} linhas.")
@@ -11,11 +11,10 @@ st.title("Teste de Conexão")
 st.write("Se você está vendo isso, o Streamlit está funcionando!")
 
 try:
-    import sqlite3
-    conn = sqlite3.connect("vendas.db")
+    from banco import conectar
+    conn = conectar()
     df = pd.read_sql("SELECT * FROM clientes LIMIT 5", conn)
     st.write("Dados do Banco:")
     st.dataframe(df)
-    conn.close()
 except Exception as e:
     st.error(f"Erro ao acessar o banco: {e}")
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Configuração dos testes:
+- A raiz do repositório entra no sys.path (os módulos são planos, sem pacote).
+- 'caminho_banco' é uma cópia, só do teste, de uma base pequena gerada uma vez
+  por sessão com gerar_dados.py (pode receber escritas).
+"""
+
+import os
+import shutil
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gerar_dados  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def _base_gerada(tmp_path_factory):
+    caminho = tmp_path_factory.mktemp("base") / "vendas.db"
+    gerar_dados.gerar(str(caminho), 42, 100, 50, 2000, inicio=date(2026, 1, 1), dias=60, itens_max=3)
+    return caminho
+
+
+@pytest.fixture
+def caminho_banco(_base_gerada, tmp_path):
+    caminho = tmp_path / "vendas.db"
+    shutil.copy(_base_gerada, caminho)
+    return str(caminho)
@@ -0,0 +1,69 @@
+"""
+Resumo diário e rankings mantidos no checkout (resumo_diario.py, ranking.py):
+depois de pedidos gravados pela fila de escrita, por vários caixas ao mesmo
+tempo, as tabelas têm de ser iguais às que a reconstrução completa produz.
+"""
+
+import random
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import fila_escrita
+from ranking import reconstruir_rankings
+from resumo_diario import reconstruir_resumo
+
+CAIXAS = 10
+PEDIDOS_POR_CAIXA = 30
+
+# Valores REAL arredondados: a reconstrução soma as mesmas parcelas em outra ordem
+TABELAS = {
+    "resumo_vendas_diario": "SELECT data, localidade_id, produto_id, ROUND(faturamento, 6), quantidade, pedidos "
+                            "FROM resumo_vendas_diario ORDER BY 1, 2, 3",
+    "ranking_vendas": "SELECT tipo, periodo, uf, chave, ROUND(total, 6) FROM ranking_vendas ORDER BY 1, 2, 3, 4",
+    "ranking_cobertura": "SELECT * FROM ranking_cobertura ORDER BY 1, 2, 3",
+}
+
+
+def _conteudo(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return {tabela: conn.execute(sql).fetchall() for tabela, sql in TABELAS.items()}
+    finally:
+        conn.close()
+
+
+def _caixa(caminho, semente, clientes, produtos):
+    rnd = random.Random(semente)
+    for _ in range(PEDIDOS_POR_CAIXA):
+        # Inclui um mês sem vendas na base, produto repetido e preço do carrinho diferente do cadastro
+        data = f"2026-{rnd.randint(1, 4):02d}-{rnd.randint(1, 28):02d}"
+        itens = [(produto_id, rnd.randint(1, 3)) for produto_id in rnd.choices(produtos, k=rnd.randint(1, 4))]
+        if rnd.random() < 0.3:
+            itens.append((rnd.choice(produtos), 1, round(rnd.uniform(1, 500), 2)))
+        fila_escrita.registrar_pedido(rnd.choice(clientes), data, itens, caminho=caminho)
+
+
+def test_checkout_igual_a_reconstrucao(caminho_banco):
+    conn = sqlite3.connect(caminho_banco)
+    clientes = [linha[0] for linha in conn.execute("SELECT id FROM clientes")]
+    produtos = [linha[0] for linha in conn.execute("SELECT id FROM produtos")]
+    antes = conn.execute("SELECT COUNT(*) FROM pedidos").fetchone()[0]
+    conn.close()
+
+    with ThreadPoolExecutor(CAIXAS) as caixas:
+        for futuro in [caixas.submit(_caixa, caminho_banco, semente, clientes, produtos)
+                       for semente in range(CAIXAS)]:
+            futuro.result()
+
+    incremental = _conteudo(caminho_banco)
+    conn = sqlite3.connect(caminho_banco)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM pedidos").fetchone()[0] == antes + CAIXAS * PEDIDOS_POR_CAIXA
+        reconstruir_resumo(conn)
+        reconstruir_rankings(conn)
+    finally:
+        conn.close()
+    reconstruido = _conteudo(caminho_banco)
+
+    for tabela in TABELAS:
+        assert incremental[tabela] == reconstruido[tabela], tabela
@@ -0,0 +1,35 @@
+"""Planos de execução das consultas monitoradas (migracoes.verificar_planos)."""
+
+import sqlite3
+
+import pytest
+
+import filtros
+import migracoes
+
+
+@pytest.fixture
+def conn(caminho_banco):
+    conn = sqlite3.connect(caminho_banco)
+    yield conn
+    conn.close()
+
+
+def test_nenhuma_consulta_faz_varredura_completa(conn):
+    assert migracoes.verificar_planos(conn) == {}
+
+
+@pytest.mark.parametrize("tipo", ["lista", "tabela temporária"])
+def test_filtro_de_localidades(conn, tipo):
+    consultas = {nome: consulta for nome, consulta in migracoes.consultas_agregadas(conn).items()
+                 if nome.endswith(f"({tipo})")}
+    assert consultas
+    # Seleção pequena: lista IN; grande: tabela temporária da conexão
+    usam_tabela = [filtros.TABELA_SELECAO in sql for sql, *_ in consultas.values()]
+    assert all(usam_tabela) if tipo == "tabela temporária" else not any(usam_tabela)
+    assert migracoes.verificar_planos(conn, consultas) == {}
+
+
+def test_varredura_completa_e_apontada(conn):
+    consultas = {"sem índice": ("SELECT * FROM fato_vendas WHERE quantidade = ?", (3,))}
+    assert list(migracoes.verificar_planos(conn, consultas)) == ["sem índice"]